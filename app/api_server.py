@@ -1,14 +1,25 @@
 from fastapi import FastAPI, Response
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi_mcp import FastApiMCP
-from pathlib import Path
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
+from importlib.util import find_spec
+import asyncio
 
 from app.core.config import settings
-from app.core.db import setup_db
+from app.core.db import current_generation, remove_stale_generations
+from app.core.sync import setup_db
+from app.core.refresh import run_refresher
+from app.core.analytics import load_analytics
+from app.core.metrics import MetricsMiddleware
+from app.core.profiler import profiler
 
 from app.routes.members import router as members_router
 from app.routes.interests_total_value import router as interests_total_value_router
 from app.routes.party import router as party_router
+from app.routes.search import router as search_router
+from app.routes.export import router as export_router
+from app.routes.metrics import router as metrics_router
+from app.routes.debug import router as debug_router
 
 import logging
 
@@ -21,19 +32,55 @@ logging.basicConfig(
 # Startup hook for DB setup
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    db_path = Path(settings.SQLITE_DB_PATH)
+    remove_stale_generations()
+
+    db_path = current_generation().path
     if not db_path.exists():
         logging.info(f"Database not found at {db_path}, initializing...")
-        setup_db()
+        # setup_db drives its own event loop for concurrent fetching
+        await asyncio.to_thread(setup_db)
     else:
         logging.info(f"Database already exists at {db_path}, skipping setup.")
+
+    # refreshed generations are loaded by the listener `load_analytics` registers
+    await asyncio.to_thread(load_analytics, current_generation())
+
+    refresher = None
+    if settings.REFRESH_INTERVAL_SECONDS:
+        refresher = asyncio.create_task(
+            run_refresher(settings.REFRESH_INTERVAL_SECONDS)
+        )
+
     yield
 
+    if refresher:
+        refresher.cancel()
+        with suppress(asyncio.CancelledError):
+            await refresher
+
+    await current_generation().dispose_async_engine()
+
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MIN_SIZE)
+# outermost, so requests are timed until their compressed response is sent
+app.add_middleware(MetricsMiddleware, routes=app.router)
 
 app.include_router(members_router)
 app.include_router(interests_total_value_router)
 app.include_router(party_router)
+app.include_router(search_router)
+app.include_router(export_router)
+app.include_router(metrics_router)
+app.include_router(debug_router)
+
+if settings.PROFILER_ENABLED:
+    profiler.enable()
+
+# snapshots need the optional pyarrow dependency
+if find_spec("pyarrow"):
+    from app.routes.snapshot import router as snapshot_router
+
+    app.include_router(snapshot_router)
 
 
 @app.get("/")
@@ -49,7 +96,11 @@ mcp = FastApiMCP(
         "search_members_with_grouped_interest_values",
         "search_members",
         "search_member_interests",
-        "search_party"
+        "search_party",
+        "search_party_totals",
+        "search_category_totals",
+        "search_interest_timeseries",
+        "search_text"
     ],
 )
 mcp.mount_http()
@@ -1,2 +1,2 @@
-from app.client.client_interface import Client, Response
-from app.client.clients import member_client, interest_client
+from app.client.client_interface import Client, AsyncClient, Response
+from app.client.clients import make_client, make_async_client
@@ -12,3 +12,9 @@ class Response(Protocol):
 
 class Client(Protocol):
     def get(self, url: str, *, params: Mapping[str, Any] | None = None) -> Response: ...
+
+
+class AsyncClient(Protocol):
+    async def get(
+        self, url: str, *, params: Mapping[str, Any] | None = None
+    ) -> Response: ...
@@ -1,5 +1,34 @@
-from httpx import Response, Client
-from typing import Any, Mapping
+from app.core.config import settings
+from app.client.decoding import loads
+from app.client.store import (
+    AsyncCachingClient,
+    AsyncReplayClient,
+    CachingClient,
+    ReplayClient,
+    ResponseStore,
+)
+from app.core.metrics import (
+    upstream_rate_limit_wait,
+    upstream_requests,
+    upstream_retries,
+)
+
+from httpx import Response, Client, AsyncClient, Limits, Timeout, TransportError
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from importlib.util import find_spec
+from random import Random
+from threading import Lock
+from time import monotonic, sleep
+from logging import getLogger
+from typing import Any, Dict, Mapping, Tuple
+import asyncio
+
+logger = getLogger(__name__)
+
+# statuses worth asking again for, rather than failing the whole fetch
+RETRY_STATUSES = (429, 500, 502, 503, 504)
 
 
 class httpxResponseAdapter:
@@ -7,7 +36,7 @@ class httpxResponseAdapter:
         self.response = response
 
     def json(self) -> Any:
-        return self.response.json()
+        return loads(self.response.content)
 
     def raise_for_status(self) -> None:
         self.response.raise_for_status()
@@ -16,20 +45,280 @@ class httpxResponseAdapter:
     def status_code(self) -> int:
         return self.response.status_code
 
+    @property
+    def headers(self) -> Mapping[str, str]:
+        return self.response.headers
+
+    @property
+    def content(self) -> bytes:
+        return self.response.content
+
+
+def retry_after_seconds(response: Response) -> float | None:
+    """
+    The wait asked for by the `Retry-After` header of `response`, in seconds or as a date.
+    """
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+@dataclass
+class Retry:
+    """
+    When to retry a request, and how long to wait first: `Retry-After` when the upstream sends
+    it, otherwise exponential backoff with full jitter. Waits never exceed
+    `max_backoff_seconds`, so one large `Retry-After` cannot stall a sync.
+    """
+
+    attempts: int = 5  # retries after the first request
+    backoff_seconds: float = 0.5  # largest wait before the first retry
+    max_backoff_seconds: float = 30.0
+    statuses: Tuple[int, ...] = RETRY_STATUSES
+    seed: int | None = None
+
+    def __post_init__(self) -> None:
+        self._random = Random(self.seed)
+
+    def delay(self, attempt: int, response: Response | None = None) -> float:
+        if response is not None:
+            retry_after = retry_after_seconds(response)
+            if retry_after is not None:
+                return min(retry_after, self.max_backoff_seconds)
+        ceiling = min(self.max_backoff_seconds, self.backoff_seconds * 2**attempt)
+        return self._random.uniform(0, ceiling)
+
+
+class TokenBucket:
+    """
+    Allows `rate` requests per second, in bursts of up to `burst`. Callers reserve a token and
+    wait until it is theirs, so waiting callers are served in order.
+    """
+
+    def __init__(self, rate: float, burst: float | None = None):
+        self.rate = rate
+        self.burst = burst or rate
+        self.tokens = self.burst
+        self.updated = monotonic()
+        self._lock = Lock()
+
+    def reserve(self) -> float:
+        """
+        Take a token, returning the seconds until it may be used.
+        """
+        with self._lock:
+            now = monotonic()
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            upstream_rate_limit_wait.inc(wait)
+        return wait
+
+    def acquire(self) -> None:
+        wait = self.reserve()
+        if wait:
+            sleep(wait)
+
+    async def acquire_async(self) -> None:
+        wait = self.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
 
 class httpxClientAdapter:
-    def __init__(self, client: Client):
+    def __init__(
+        self,
+        client: Client,
+        retry: Retry | None = None,
+        limiter: TokenBucket | None = None,
+    ):
         self.client = client
+        self.retry = retry or Retry(attempts=0)
+        self.limiter = limiter
 
     def get(
-        self, url: str, *, params: Mapping[str, Any] | None = None
+        self,
+        url: str,
+        *,
+        params: Mapping[str, Any] | None = None,
+        headers: Mapping[str, str] | None = None,
     ) -> httpxResponseAdapter:
-        return httpxResponseAdapter(self.client.get(url, params=params))
+        attempt = 0
+        while True:
+            if self.limiter:
+                self.limiter.acquire()
+            try:
+                response, error = (
+                    self.client.get(url, params=params, headers=headers),
+                    None,
+                )
+            except TransportError as exc:
+                response, error = None, exc
+            wait = _retry_wait(self.retry, attempt, response, error)
+            if wait is None:
+                return _result(response, error)
+            sleep(wait)
+            attempt += 1
 
 
-member_client = httpxClientAdapter(
-    Client(base_url="https://members-api.parliament.uk/api", follow_redirects=True)
-)
-interest_client = httpxClientAdapter(
-    Client(base_url="https://interests-api.parliament.uk/api/v1", follow_redirects=True)
-)
+class httpxAsyncClientAdapter:
+    """
+    Async counterpart of `httpxClientAdapter`. Use it as an async context manager so the
+    underlying connection pool is closed on the event loop that opened it.
+    """
+
+    def __init__(
+        self,
+        client: AsyncClient,
+        retry: Retry | None = None,
+        limiter: TokenBucket | None = None,
+    ):
+        self.client = client
+        self.retry = retry or Retry(attempts=0)
+        self.limiter = limiter
+
+    async def get(
+        self,
+        url: str,
+        *,
+        params: Mapping[str, Any] | None = None,
+        headers: Mapping[str, str] | None = None,
+    ) -> httpxResponseAdapter:
+        attempt = 0
+        while True:
+            if self.limiter:
+                await self.limiter.acquire_async()
+            try:
+                response, error = (
+                    await self.client.get(url, params=params, headers=headers),
+                    None,
+                )
+            except TransportError as exc:
+                response, error = None, exc
+            wait = _retry_wait(self.retry, attempt, response, error)
+            if wait is None:
+                return _result(response, error)
+            await asyncio.sleep(wait)
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def __aenter__(self) -> "httpxAsyncClientAdapter":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+
+def _retry_wait(
+    retry: Retry,
+    attempt: int,
+    response: Response | None,
+    error: TransportError | None,
+) -> float | None:
+    """
+    Seconds to wait before retrying, or None if the request is done, successfully or not.
+    """
+    if response is not None:
+        upstream_requests.inc(status=response.status_code)
+        if response.status_code not in retry.statuses:
+            return None
+        reason = str(response.status_code)
+    else:
+        reason = type(error).__name__
+    if attempt >= retry.attempts:
+        return None
+    upstream_retries.inc(reason=reason)
+    delay = retry.delay(attempt, response)
+    logger.warning(f"Retrying after {reason} in {delay:.2f}s (retry {attempt + 1})")
+    return delay
+
+
+def _result(
+    response: Response | None, error: TransportError | None
+) -> httpxResponseAdapter:
+    if error is not None:
+        raise error
+    assert response is not None
+    return httpxResponseAdapter(response)
+
+
+def _client_options(base_url: str) -> Dict[str, Any]:
+    return {
+        "base_url": base_url,
+        "follow_redirects": True,
+        "timeout": Timeout(
+            settings.HTTP_TIMEOUT_SECONDS, connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS
+        ),
+        "limits": Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        # http2 needs the `http2` extra (h2)
+        "http2": settings.HTTP2 and find_spec("h2") is not None,
+    }
+
+
+def _retry() -> Retry:
+    return Retry(
+        attempts=settings.HTTP_RETRIES,
+        backoff_seconds=settings.HTTP_BACKOFF_SECONDS,
+        max_backoff_seconds=settings.HTTP_MAX_BACKOFF_SECONDS,
+    )
+
+
+def _limiter() -> TokenBucket | None:
+    if not settings.HTTP_RATE_LIMIT:
+        return None
+    return TokenBucket(settings.HTTP_RATE_LIMIT, settings.HTTP_RATE_LIMIT_BURST)
+
+
+def _store(base_url: str) -> ResponseStore | None:
+    if not settings.UPSTREAM_STORE:
+        return None
+    if settings.UPSTREAM_STORE not in ("cache", "replay"):
+        raise ValueError(
+            f"UPSTREAM_STORE must be 'cache' or 'replay', not {settings.UPSTREAM_STORE!r}"
+        )
+    return ResponseStore(settings.UPSTREAM_STORE_DIR, namespace=base_url)
+
+
+def make_client(base_url: str) -> httpxClientAdapter | CachingClient | ReplayClient:
+    store = _store(base_url)
+    if store and settings.UPSTREAM_STORE == "replay":
+        return ReplayClient(store)
+    client = httpxClientAdapter(
+        Client(**_client_options(base_url)), _retry(), _limiter()
+    )
+    return CachingClient(client, store) if store else client
+
+
+# httpx.AsyncClient binds its connections to the event loop that first uses it, so
+# async clients are created per fetch rather than shared at module level.
+def make_async_client(
+    base_url: str,
+) -> httpxAsyncClientAdapter | AsyncCachingClient | AsyncReplayClient:
+    store = _store(base_url)
+    if store and settings.UPSTREAM_STORE == "replay":
+        return AsyncReplayClient(store)
+    client = httpxAsyncClientAdapter(
+        AsyncClient(**_client_options(base_url)), _retry(), _limiter()
+    )
+    return AsyncCachingClient(client, store) if store else client
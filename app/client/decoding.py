@@ -0,0 +1,11 @@
+from app.core.config import settings
+
+from importlib.util import find_spec
+from typing import Any, Callable
+import json
+
+# page bodies are decoded with orjson, several times faster than the standard library, when
+# the `orjson` extra is installed
+loads: Callable[[bytes | str], Any] = json.loads
+if settings.ORJSON and find_spec("orjson"):
+    from orjson import loads
@@ -1,7 +1,22 @@
-from app.client import Client
+from app.client import Client, AsyncClient
+from app.core.metrics import pages_fetched
 
-from typing import Any, Iterable, Dict
+from typing import (
+    Any,
+    Iterable,
+    Iterator,
+    AsyncIterator,
+    AsyncGenerator,
+    Dict,
+    Deque,
+    TypeVar,
+)
+from collections import deque
 from logging import Logger
+from datetime import date
+import asyncio
+
+T = TypeVar("T")
 
 
 def fetch_all(
@@ -13,6 +28,7 @@ def fetch_all(
 ) -> Iterable[Dict[str, Any]]:
     """
     Fetch all items from a paginated API endpoint. Goes through the pages of the API response until all items are fetched.
+    Pages are requested with the same params as `fetch_all_async` sends, so pages stored by either can be replayed by the other.
     """
     if logger:
         logger.info(
@@ -20,11 +36,15 @@ def fetch_all(
         )
 
     skip: int = 0
+    take: int = int(params.get("take", 20))
 
     while True:
-        response = client.get(relative_url, params={**params, "skip": skip})
+        response = client.get(
+            relative_url, params={**params, "skip": skip, "take": take}
+        )
 
         response.raise_for_status()
+        pages_fetched.inc(endpoint=relative_url)
 
         data = response.json()
 
@@ -33,7 +53,10 @@ def fetch_all(
         for item in data.get("items", []):
             yield item
 
-        if len(data.get("items", [])) < 20:
+        # the upstream may cap the page size below what was asked for
+        take = min(take, int(data.get("take") or take))
+
+        if len(data.get("items", [])) < take:
             if logger:
                 logger.info(f"Fetched {skip} items in total.")
             break
@@ -54,12 +77,148 @@ def fetch_all_active_members(
 
 
 def fetch_all_interests(
-    client: Client, logger: Logger | None = None
+    client: Client,
+    logger: Logger | None = None,
+    published_from: date | None = None,
+    page_size: int = 20,
 ) -> Iterable[Dict[str, Any]]:
     return fetch_all(
         client=client,
         relative_url="/Interests",
-        params={"ExpandChildInterests": "false"},
+        params=interests_params(published_from, page_size),
         description="interests",
         logger=logger,
     )
+
+
+def interests_params(
+    published_from: date | None = None, page_size: int = 20
+) -> Dict[str, Any]:
+    params: Dict[str, Any] = {"ExpandChildInterests": "false", "take": page_size}
+    if published_from:
+        params["PublishedFrom"] = published_from.isoformat()
+    return params
+
+
+async def fetch_all_async(
+    client: AsyncClient,
+    relative_url: str,
+    params: Dict[str, Any],
+    description: str | None = None,
+    logger: Logger | None = None,
+    concurrency: int = 8,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Fetch all items from a paginated API endpoint, requesting up to `concurrency` pages at once.
+    Items are yielded in page order. The first page is fetched on its own so that the page size
+    the upstream actually honours (and the total number of results, when reported) is known
+    before the remaining pages are requested.
+    """
+    if logger:
+        logger.info(
+            f"Fetching {description or 'items'} from {relative_url} with params: {params}"
+        )
+
+    take: int = int(params.get("take", 20))
+
+    async def fetch_page(skip: int) -> Dict[str, Any]:
+        response = await client.get(
+            relative_url, params={**params, "skip": skip, "take": take}
+        )
+        response.raise_for_status()
+        pages_fetched.inc(endpoint=relative_url)
+        return response.json()
+
+    data = await fetch_page(0)
+    items = data.get("items", [])
+    for item in items:
+        yield item
+
+    # the upstream may cap the page size below what was asked for
+    take = min(take, int(data.get("take") or take))
+    total: int | None = data.get("totalResults")
+    fetched: int = len(items)
+    next_skip: int = len(items)
+
+    pending: Deque[asyncio.Task[Dict[str, Any]]] = deque()
+
+    def schedule() -> None:
+        nonlocal next_skip
+        while len(pending) < concurrency and (total is None or next_skip < total):
+            pending.append(asyncio.ensure_future(fetch_page(next_skip)))
+            next_skip += take
+
+    try:
+        if len(items) >= take:
+            schedule()
+
+        while pending:
+            data = await pending.popleft()
+            items = data.get("items", [])
+            fetched += len(items)
+
+            for item in items:
+                yield item
+
+            if len(items) < take:
+                break
+
+            schedule()
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    if logger:
+        logger.info(f"Fetched {fetched} items in total.")
+
+
+def iterate_async(iterable: AsyncGenerator[T, None]) -> Iterator[T]:
+    """
+    Drive an async iterator from synchronous code on a private event loop, so concurrent fetches
+    can feed the synchronous database loaders. Must not be called from a thread that is already
+    running an event loop.
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(anext(iterable))
+            except StopAsyncIteration:
+                break
+    finally:
+        loop.run_until_complete(iterable.aclose())
+        loop.close()
+
+
+async def fetch_all_active_members_async(
+    client: AsyncClient, logger: Logger | None = None, concurrency: int = 8
+) -> AsyncIterator[Dict[str, Any]]:
+    async for item in fetch_all_async(
+        client=client,
+        relative_url="/Members/Search",
+        # the members api does not return more than 20 items per page
+        params={"IsCurrentMember": "true", "take": 20},
+        description="active members",
+        logger=logger,
+        concurrency=concurrency,
+    ):
+        yield item
+
+
+async def fetch_all_interests_async(
+    client: AsyncClient,
+    logger: Logger | None = None,
+    concurrency: int = 8,
+    page_size: int = 20,
+    published_from: date | None = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    async for item in fetch_all_async(
+        client=client,
+        relative_url="/Interests",
+        params=interests_params(published_from, page_size),
+        description="interests",
+        logger=logger,
+        concurrency=concurrency,
+    ):
+        yield item
@@ -0,0 +1,231 @@
+from app.client.decoding import loads
+from app.core.metrics import upstream_store_lookups
+
+from httpx import HTTPStatusError, Request, Response
+from pathlib import Path
+from time import time
+from typing import TYPE_CHECKING, Any, Dict, Mapping, Tuple
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+
+if TYPE_CHECKING:
+    # the clients wrap their adapters in the store, so the adapters are only types here
+    from app.client.clients import (
+        httpxAsyncClientAdapter,
+        httpxClientAdapter,
+        httpxResponseAdapter,
+    )
+
+# Raw pages of the upstream apis, stored gzipped on disk and keyed by the url and params they
+# were fetched with. `CachingClient` stores the pages it fetches and revalidates them with a
+# conditional GET, and `ReplayClient` serves them without a network, e.g. to reload the
+# database after a schema change, or to benchmark parsing and loading apart from fetching.
+
+
+class ResponseNotStored(Exception):
+    pass
+
+
+class StoredResponse:
+    """
+    A page read back from the store, with the `Response` interface of the client adapters.
+    """
+
+    def __init__(self, url: str, body: bytes, status_code: int = 200):
+        self.url = url
+        self.body = body
+        self._status_code = status_code
+
+    def json(self) -> Any:
+        return loads(self.body)
+
+    def raise_for_status(self) -> None:
+        if self._status_code >= 400:
+            request = Request("GET", self.url)
+            raise HTTPStatusError(
+                f"Stored response for {self.url} has status {self._status_code}",
+                request=request,
+                response=Response(self._status_code, request=request),
+            )
+
+    @property
+    def status_code(self) -> int:
+        return self._status_code
+
+
+class ResponseStore:
+    def __init__(self, directory: str | Path, namespace: str = ""):
+        self.directory = Path(directory)
+        self.namespace = namespace
+
+    def key(self, url: str, params: Mapping[str, Any] | None) -> str:
+        params_text = "&".join(
+            f"{name}={value}" for name, value in sorted((params or {}).items())
+        )
+        return hashlib.sha256(
+            f"{self.namespace}{url}?{params_text}".encode()
+        ).hexdigest()
+
+    def _paths(self, key: str) -> Tuple[Path, Path]:
+        base = self.directory / key[:2] / key
+        return base.with_suffix(".json.gz"), base.with_suffix(".meta.json")
+
+    def metadata(self, key: str) -> Dict[str, Any] | None:
+        _, meta_path = self._paths(key)
+        try:
+            return json.loads(meta_path.read_text())
+        except FileNotFoundError:
+            return None
+
+    def read(self, key: str) -> bytes | None:
+        body_path, _ = self._paths(key)
+        try:
+            return gzip.decompress(body_path.read_bytes())
+        except FileNotFoundError:
+            return None
+
+    def write(
+        self,
+        key: str,
+        url: str,
+        params: Mapping[str, Any] | None,
+        body: bytes,
+        headers: Mapping[str, str],
+    ) -> None:
+        body_path, meta_path = self._paths(key)
+        body_path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "url": self.namespace + url,
+            "params": {name: str(value) for name, value in (params or {}).items()},
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "stored_at": time(),
+        }
+        # written to temporary files and renamed, so readers never see half a page
+        for path, content in (
+            (body_path, gzip.compress(body, compresslevel=6)),
+            (meta_path, json.dumps(meta).encode()),
+        ):
+            temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            temporary.write_bytes(content)
+            temporary.replace(path)
+
+    def validators(self, key: str) -> Dict[str, str]:
+        """
+        The headers asking the upstream to answer 304 if the stored page is still current.
+        """
+        meta = self.metadata(key) or {}
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def replay(self, url: str, params: Mapping[str, Any] | None) -> StoredResponse:
+        body = self.read(self.key(url, params))
+        if body is None:
+            raise ResponseNotStored(
+                f"No stored response for {url} with params {params}"
+            )
+        upstream_store_lookups.inc(result="replayed")
+        return StoredResponse(self.namespace + url, body)
+
+    def update(
+        self,
+        url: str,
+        params: Mapping[str, Any] | None,
+        key: str,
+        response: "httpxResponseAdapter",
+    ) -> "httpxResponseAdapter | StoredResponse":
+        """
+        Store a fresh page, or read back the stored one if the upstream answered 304.
+        """
+        if response.status_code == 304:
+            body = self.read(key)
+            if body is not None:
+                upstream_store_lookups.inc(result="not_modified")
+                return StoredResponse(self.namespace + url, body)
+        elif response.status_code == 200:
+            self.write(key, url, params, response.content, response.headers)
+            upstream_store_lookups.inc(result="stored")
+        return response
+
+
+class CachingClient:
+    """
+    Fetches through `client`, storing each page and revalidating stored pages with the
+    upstream before they are used again.
+    """
+
+    def __init__(self, client: "httpxClientAdapter", store: ResponseStore):
+        self.client = client
+        self.store = store
+
+    def get(
+        self, url: str, *, params: Mapping[str, Any] | None = None
+    ) -> "httpxResponseAdapter | StoredResponse":
+        key = self.store.key(url, params)
+        response = self.client.get(
+            url, params=params, headers=self.store.validators(key)
+        )
+        return self.store.update(url, params, key, response)
+
+
+class AsyncCachingClient:
+    def __init__(self, client: "httpxAsyncClientAdapter", store: ResponseStore):
+        self.client = client
+        self.store = store
+
+    async def get(
+        self, url: str, *, params: Mapping[str, Any] | None = None
+    ) -> "httpxResponseAdapter | StoredResponse":
+        key = self.store.key(url, params)
+        headers = await asyncio.to_thread(self.store.validators, key)
+        response = await self.client.get(url, params=params, headers=headers)
+        return await asyncio.to_thread(self.store.update, url, params, key, response)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def __aenter__(self) -> "AsyncCachingClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+
+class ReplayClient:
+    """
+    Serves only stored pages, raising `ResponseNotStored` for any other request.
+    """
+
+    def __init__(self, store: ResponseStore):
+        self.store = store
+
+    def get(
+        self, url: str, *, params: Mapping[str, Any] | None = None
+    ) -> StoredResponse:
+        return self.store.replay(url, params)
+
+
+class AsyncReplayClient:
+    def __init__(self, store: ResponseStore):
+        self.store = store
+
+    async def get(
+        self, url: str, *, params: Mapping[str, Any] | None = None
+    ) -> StoredResponse:
+        return await asyncio.to_thread(self.store.replay, url, params)
+
+    async def aclose(self) -> None:
+        pass
+
+    async def __aenter__(self) -> "AsyncReplayClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        pass
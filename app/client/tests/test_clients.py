@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from typing import Iterator, List
+import asyncio
+import httpx
+import pytest
+
+import app.core.metrics as metrics
+from app.client.clients import (
+    Retry,
+    TokenBucket,
+    httpxAsyncClientAdapter,
+    httpxClientAdapter,
+    retry_after_seconds,
+)
+from app.client.fetch import fetch_all, fetch_all_async
+from benchmarks import synthetic
+from benchmarks.upstream import Faults, MEMBERS_PREFIX, serve, synthetic_app
+
+SCALE = 0.1
+
+
+@pytest.fixture
+def flaky_upstream() -> Iterator[str]:
+    faults = Faults(error_rate=0.2, throttle_rate=0.1, retry_after_seconds=0.0, seed=1)
+    with serve(synthetic_app(SCALE, faults)) as base_url:
+        yield base_url + MEMBERS_PREFIX
+
+
+def fast_retry(attempts: int = 20) -> Retry:
+    return Retry(attempts=attempts, backoff_seconds=0.001, seed=0)
+
+
+def test_retry_after_in_seconds_or_as_a_date():
+    assert retry_after_seconds(httpx.Response(429, headers={"Retry-After": "3"})) == 3
+    later = datetime.now(timezone.utc) + timedelta(seconds=30)
+    response = httpx.Response(503, headers={"Retry-After": format_datetime(later)})
+    assert 25 < retry_after_seconds(response) <= 30
+    assert retry_after_seconds(httpx.Response(503)) is None
+
+
+def test_backoff_is_jittered_and_capped():
+    retry = Retry(backoff_seconds=1, max_backoff_seconds=4, seed=0)
+    delays = [retry.delay(attempt) for attempt in range(10)]
+
+    assert all(0 <= delay <= min(4, 2**attempt) for attempt, delay in enumerate(delays))
+    assert len(set(delays)) == len(delays)
+    assert retry.delay(0, httpx.Response(429, headers={"Retry-After": "3"})) == 3
+
+
+def test_retry_after_is_capped():
+    retry = Retry(max_backoff_seconds=30)
+    assert retry.delay(0, httpx.Response(429, headers={"Retry-After": "3600"})) == 30
+    later = datetime.now(timezone.utc) + timedelta(days=1)
+    response = httpx.Response(503, headers={"Retry-After": format_datetime(later)})
+    assert retry.delay(0, response) == 30
+
+
+def test_token_bucket_spaces_requests_after_a_burst():
+    bucket = TokenBucket(rate=100, burst=2)
+    waits = [bucket.reserve() for _ in range(5)]
+
+    assert waits[:2] == [0, 0]
+    assert waits[2:] == pytest.approx([0.01, 0.02, 0.03], abs=0.005)
+
+
+def test_fetch_all_survives_throttling_and_errors(flaky_upstream: str):
+    retried = metrics.upstream_retries.value(reason="429")
+    client = httpxClientAdapter(
+        httpx.Client(base_url=flaky_upstream), fast_retry(), TokenBucket(rate=1000)
+    )
+
+    items = list(fetch_all(client, "/Members/Search", params={"take": 20}))
+
+    assert len(items) == synthetic.member_count(SCALE)
+    assert metrics.upstream_retries.value(reason="429") > retried
+
+
+def test_fetch_all_async_survives_throttling_and_errors(flaky_upstream: str):
+    async def fetch() -> List[dict]:
+        async with httpxAsyncClientAdapter(
+            httpx.AsyncClient(base_url=flaky_upstream), fast_retry()
+        ) as client:
+            return [
+                item
+                async for item in fetch_all_async(
+                    client, "/Members/Search", params={"take": 20}, concurrency=4
+                )
+            ]
+
+    items = asyncio.run(fetch())
+
+    assert [item["value"]["id"] for item in items] == [
+        synthetic.member_id(number) for number in range(synthetic.member_count(SCALE))
+    ]
+
+
+def test_errors_are_returned_once_retries_run_out():
+    with serve(synthetic_app(SCALE, Faults(error_rate=1))) as base_url:
+        client = httpxClientAdapter(
+            httpx.Client(base_url=base_url + MEMBERS_PREFIX), fast_retry(attempts=2)
+        )
+        response = client.get("/Members/Search")
+
+    assert response.status_code >= 500
+    with pytest.raises(httpx.HTTPStatusError):
+        response.raise_for_status()
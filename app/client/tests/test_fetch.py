@@ -1,12 +1,13 @@
 import json
+import asyncio
 from unittest.mock import Mock
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List
 import pytest
 from functools import partial
 
-from app.client import Client, Response
-from app.client.fetch import fetch_all
+from app.client import Client, AsyncClient, Response
+from app.client.fetch import fetch_all, fetch_all_async, iterate_async
 
 
 members_data = json.loads(
@@ -49,3 +50,93 @@ def test_fetch_all(
     results = list(fetch_all(mock_client, relative_url, params))
 
     assert results == mock_data["items"]
+
+
+async def collect(
+    mock_client: AsyncClient, relative_url: str, params: Dict[str, Any], **kwargs: Any
+) -> List[Dict[str, Any]]:
+    return [
+        item
+        async for item in fetch_all_async(mock_client, relative_url, params, **kwargs)
+    ]
+
+
+@pytest.mark.parametrize(
+    "mock_data, relative_url, params",
+    [
+        (members_data, "/Members/Search", {"IsCurrentMember": "true", "take": 20}),
+        (interests_data, "/Interests", {"ExpandChildInterests": "false"}),
+        (members_data, "/Members/Search", {"IsCurrentMember": "true", "take": 5}),
+        (interests_data, "/Interests", {"ExpandChildInterests": "false", "take": 3}),
+    ],
+)
+def test_fetch_all_async(
+    mock_data: Dict[str, Any], relative_url: str, params: Dict[str, Any]
+):
+    mock_client = Mock(spec=AsyncClient)
+    mock_client.get.side_effect = partial(mock_get, mock_data)
+
+    results = asyncio.run(collect(mock_client, relative_url, params, concurrency=4))
+
+    assert results == mock_data["items"]
+
+
+def test_fetch_all_async_respects_upstream_page_size():
+    def capped_get(url: str, params: Dict[str, Any] | None = None) -> Response:
+        params = {
+            **(params or {}),
+            "take": min(params.get("take", 20) if params else 20, 7),
+        }
+        response = mock_get(members_data, url, params)
+        response.json.return_value = {
+            **response.json.return_value,
+            "take": 7,
+            "totalResults": len(members_data["items"]),
+        }
+        return response
+
+    mock_client = Mock(spec=AsyncClient)
+    mock_client.get.side_effect = capped_get
+
+    results = asyncio.run(
+        collect(mock_client, "/Members/Search", {"take": 100}, concurrency=2)
+    )
+
+    assert results == members_data["items"]
+    # pages after the first are requested with the page size the upstream honoured
+    requested_skips = sorted(
+        call.kwargs["params"]["skip"] for call in mock_client.get.call_args_list
+    )
+    assert requested_skips == [0, 7, 14, 21]
+
+
+def test_fetch_all_async_bounds_concurrency():
+    in_flight = 0
+    max_in_flight = 0
+
+    async def slow_get(url: str, params: Dict[str, Any] | None = None) -> Response:
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+        return mock_get(interests_data, url, params)
+
+    mock_client = Mock(spec=AsyncClient)
+    mock_client.get.side_effect = slow_get
+
+    results = asyncio.run(
+        collect(mock_client, "/Interests", {"take": 1}, concurrency=3)
+    )
+
+    assert results == interests_data["items"]
+    assert max_in_flight == 3
+
+
+def test_iterate_async():
+    async def numbers():
+        for number in range(5):
+            await asyncio.sleep(0)
+            yield number
+
+    assert list(iterate_async(numbers())) == [0, 1, 2, 3, 4]
@@ -0,0 +1,158 @@
+from pathlib import Path
+from typing import Any, Dict, List
+import asyncio
+import json
+import httpx
+import pytest
+
+from app.client.clients import (
+    httpxClientAdapter,
+    make_async_client,
+    make_client,
+)
+from app.client.fetch import (
+    fetch_all,
+    fetch_all_async,
+    fetch_all_interests,
+    fetch_all_interests_async,
+)
+from app.client.store import (
+    AsyncReplayClient,
+    CachingClient,
+    ReplayClient,
+    ResponseNotStored,
+    ResponseStore,
+)
+from app.client.tests.test_fetch import members_data
+from app.core.config import settings
+from benchmarks.upstream import INTERESTS_PREFIX, serve, synthetic_app
+
+BASE_URL = "https://members.example/api"
+ETAG = '"v1"'
+
+
+class Upstream:
+    """
+    Serves the mock members in pages, answering 304 to requests that send the current ETag.
+    """
+
+    def __init__(self) -> None:
+        self.requests: List[httpx.Request] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if request.headers.get("If-None-Match") == ETAG:
+            return httpx.Response(304, headers={"ETag": ETAG})
+        skip = int(request.url.params.get("skip", 0))
+        items = members_data["items"][skip : skip + 20]
+        return httpx.Response(200, json={"items": items}, headers={"ETag": ETAG})
+
+
+def caching_client(upstream: Upstream, store: ResponseStore) -> CachingClient:
+    return CachingClient(
+        httpxClientAdapter(
+            httpx.Client(base_url=BASE_URL, transport=httpx.MockTransport(upstream))
+        ),
+        store,
+    )
+
+
+def fetch(client: Any) -> List[Dict[str, Any]]:
+    return list(fetch_all(client, "/Members/Search", params={"take": 20}))
+
+
+def test_stored_pages_are_revalidated(tmp_path: Path):
+    upstream = Upstream()
+    store = ResponseStore(tmp_path, namespace=BASE_URL)
+    client = caching_client(upstream, store)
+
+    first = fetch(client)
+    assert first == members_data["items"]
+    assert not any("If-None-Match" in request.headers for request in upstream.requests)
+    pages = len(upstream.requests)
+    assert len(list(tmp_path.rglob("*.json.gz"))) == pages
+
+    upstream.requests.clear()
+    assert fetch(client) == first
+    assert len(upstream.requests) == pages
+    assert all(
+        request.headers["If-None-Match"] == ETAG for request in upstream.requests
+    )
+
+
+def test_replay_reads_only_stored_pages(tmp_path: Path):
+    store = ResponseStore(tmp_path, namespace=BASE_URL)
+    fetch(caching_client(Upstream(), store))
+
+    assert fetch(ReplayClient(store)) == members_data["items"]
+
+    with pytest.raises(ResponseNotStored):
+        ReplayClient(store).get("/Members/Search", params={"take": 50, "skip": 0})
+    with pytest.raises(ResponseNotStored):
+        fetch(ReplayClient(ResponseStore(tmp_path, namespace="https://other")))
+
+
+def test_async_replay(tmp_path: Path):
+    store = ResponseStore(tmp_path, namespace=BASE_URL)
+    fetch(caching_client(Upstream(), store))
+
+    async def replay() -> List[Dict[str, Any]]:
+        async with AsyncReplayClient(store) as client:
+            return [
+                item
+                async for item in fetch_all_async(
+                    client, "/Members/Search", params={"take": 20}
+                )
+            ]
+
+    assert asyncio.run(replay()) == members_data["items"]
+
+
+def test_pages_are_stored_compressed_with_their_validators(tmp_path: Path):
+    store = ResponseStore(tmp_path, namespace=BASE_URL)
+    fetch(caching_client(Upstream(), store))
+
+    key = store.key("/Members/Search", {"take": 20, "skip": 0})
+    assert json.loads(store.read(key))["items"] == members_data["items"][:20]
+    assert store.metadata(key)["etag"] == ETAG
+    assert store.validators(key) == {"If-None-Match": ETAG}
+
+
+def test_clients_follow_the_store_setting(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(settings, "UPSTREAM_STORE_DIR", str(tmp_path))
+    assert isinstance(make_client(BASE_URL), httpxClientAdapter)
+
+    monkeypatch.setattr(settings, "UPSTREAM_STORE", "cache")
+    assert isinstance(make_client(BASE_URL), CachingClient)
+
+    monkeypatch.setattr(settings, "UPSTREAM_STORE", "replay")
+    assert isinstance(make_client(BASE_URL), ReplayClient)
+    assert isinstance(make_async_client(BASE_URL), AsyncReplayClient)
+
+    monkeypatch.setattr(settings, "UPSTREAM_STORE", "record")
+    with pytest.raises(ValueError):
+        make_client(BASE_URL)
+
+
+def test_pages_stored_by_the_sync_fetch_replay_async(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(settings, "UPSTREAM_STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "UPSTREAM_STORE", "cache")
+    # the stand-in api caps pages at 20 items, below the page size asked for
+    with serve(synthetic_app(0.05)) as base_url:
+        url = base_url + INTERESTS_PREFIX
+        stored = list(fetch_all_interests(make_client(url), page_size=50))
+
+    monkeypatch.setattr(settings, "UPSTREAM_STORE", "replay")
+
+    async def replay() -> List[Dict[str, Any]]:
+        async with make_async_client(url) as client:
+            return [
+                item async for item in fetch_all_interests_async(client, page_size=50)
+            ]
+
+    assert len(stored) > 20
+    assert asyncio.run(replay()) == stored
@@ -0,0 +1,112 @@
+from unittest.mock import Mock
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+import asyncio
+import pytest
+from sqlalchemy import event
+
+import app.core.db as db
+import app.core.sync as sync
+from app.core.cache import response_cache
+from app.core.config import settings
+from app.client import Client
+from app.client.tests.test_fetch import mock_get, members_data, interests_data
+
+
+def member_from_interest(
+    interest: Dict[str, Any], party_ids: Dict[str, int]
+) -> Dict[str, Any]:
+    """
+    A members api item for the member an interest belongs to, built from the summary of the
+    member included in the interest.
+    """
+    member = interest["member"]
+    party_id = party_ids.setdefault(member["party"], 1000 + len(party_ids))
+    return {
+        "value": {
+            "id": member["id"],
+            "nameDisplayAs": member["nameDisplayAs"],
+            "nameListAs": member["nameListAs"],
+            "latestParty": {"id": party_id, "name": member["party"]},
+            "latestHouseMembership": {
+                "house": 1 if member["house"] == "Commons" else 2,
+                "membershipFrom": member["memberFrom"],
+            },
+        }
+    }
+
+
+_party_ids: Dict[str, int] = {
+    item["value"]["latestParty"]["name"]: item["value"]["latestParty"]["id"]
+    for item in members_data["items"]
+}
+# the mock members and the members of the mock interests do not overlap, so the members of
+# the interests are served alongside the mock members
+served_members_data: Dict[str, Any] = {
+    "items": members_data["items"]
+    + list(
+        {
+            item["value"]["id"]: item
+            for item in (
+                member_from_interest(interest, _party_ids)
+                for interest in interests_data["items"]
+            )
+        }.values()
+    )
+}
+
+
+@pytest.fixture
+def clients(monkeypatch: pytest.MonkeyPatch) -> Mock:
+    member_client = Mock(spec=Client)
+    member_client.get.side_effect = partial(mock_get, served_members_data)
+    interest_client = Mock(spec=Client)
+    interest_client.get.side_effect = partial(mock_get, interests_data)
+
+    monkeypatch.setattr(settings, "FETCH_ASYNC", False)
+    monkeypatch.setattr(sync, "member_client", member_client)
+    monkeypatch.setattr(sync, "interest_client", interest_client)
+    return interest_client
+
+
+@pytest.fixture
+def live_db(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, clients: Mock
+) -> Iterator[db.DatabaseGeneration]:
+    """
+    A live database generation in a temporary directory, loaded from the mock responses.
+    """
+    monkeypatch.setattr(settings, "SQLITE_DB_PATH", str(tmp_path / "members.db"))
+    # syncs run by the tests are seen straight away, and reading the data version more often
+    # would add statements to the ones the tests count
+    monkeypatch.setattr(settings, "DATA_VERSION_CHECK_SECONDS", 60.0)
+    generation = db.DatabaseGeneration(0, db.generation_path(0))
+    monkeypatch.setattr(db, "_generation", generation)
+    monkeypatch.setattr(db, "engine", generation.engine)
+    # every test's database is generation 0, so responses cached by another test would match
+    response_cache.clear()
+    sync.setup_db()
+    yield generation
+    asyncio.run(generation.dispose_async_engine())
+
+
+@contextmanager
+def record_statements(generation: db.DatabaseGeneration) -> Iterator[List[str]]:
+    """
+    Collect the SQL statements run on `generation`, by sync sessions and by async ones.
+    """
+    statements: List[str] = []
+
+    def record(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+        statements.append(statement)
+
+    engines = [generation.reader_engine, generation.async_reader_engine.sync_engine]
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", record)
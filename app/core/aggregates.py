@@ -0,0 +1,247 @@
+from app.models import Interest, Member, MemberInterestTotal, MonetaryValueField
+
+from sqlmodel import Session, select, delete, func, col, literal
+from sqlalchemy import (
+    Engine,
+    Date,
+    DateTime,
+    ColumnElement,
+    Integer,
+    ScalarSelect,
+    Subquery,
+    cast,
+    insert,
+    type_coerce,
+)
+from datetime import date, datetime, timedelta
+from enum import Enum
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+# interests without a published date are totalled under this date, so they count towards
+# all-time totals but never fall within a range of dates
+UNDATED = datetime.min
+
+
+def pounds_and_pence(value: Any) -> ColumnElement[float]:
+    """
+    `value`, a sum of monetary values, rounded to whole pence. Running totals, and the
+    differences of them, pick up float noise (28404.279999999995 rather than 28404.28), which
+    would otherwise reach clients and break the exact comparisons of keyset cursors.
+    """
+    return func.round(value, 2)
+
+
+def refresh_interest_totals(bind: Engine) -> None:
+    """
+    Rebuild the running totals of each member's interests by publication date.
+    """
+    published_date = func.coalesce(
+        Interest.published_date, literal(UNDATED, DateTime)
+    ).label("published_date")
+    daily = (
+        select(
+            col(Interest.member_id).label("member_id"),
+            published_date,
+            func.coalesce(func.sum(MonetaryValueField.value), 0.0).label("value"),
+            func.count(col(Interest.id)).label("count"),
+        )
+        .join(
+            MonetaryValueField,
+            col(MonetaryValueField.interest_id) == col(Interest.id),
+            isouter=True,
+        )
+        .where(col(Interest.member_id).is_not(None))
+        .group_by(col(Interest.member_id), published_date)
+        .subquery()
+    )
+    window = {
+        "partition_by": daily.c.member_id,
+        "order_by": daily.c.published_date,
+    }
+    running = select(
+        daily.c.member_id,
+        daily.c.published_date,
+        daily.c.value,
+        daily.c.count,
+        func.sum(daily.c.value).over(**window),
+        func.sum(daily.c.count).over(**window),
+    )
+
+    with bind.begin() as connection:
+        connection.execute(delete(MemberInterestTotal))
+        connection.execute(
+            insert(MemberInterestTotal).from_select(
+                [
+                    "member_id",
+                    "published_date",
+                    "value",
+                    "count",
+                    "cumulative_value",
+                    "cumulative_count",
+                ],
+                running,
+            )
+        )
+
+
+def _cumulative(
+    column: Any, until: datetime | None, inclusive: bool
+) -> ScalarSelect[Any]:
+    """
+    The member's latest cumulative `column` published up to `until`, or overall if None.
+    """
+    statement = select(column).where(
+        col(MemberInterestTotal.member_id) == col(Member.id)
+    )
+    if until is not None:
+        published_date = col(MemberInterestTotal.published_date)
+        statement = statement.where(
+            published_date <= until if inclusive else published_date < until
+        )
+    return (
+        statement.order_by(col(MemberInterestTotal.published_date).desc())
+        .limit(1)
+        .correlate(Member)
+        .scalar_subquery()
+    )
+
+
+def member_interest_totals(
+    published_after: datetime | None, published_before: datetime | None
+) -> Tuple[ColumnElement[float], ColumnElement[int]]:
+    """
+    Expressions for the total value and number of each member's interests published within
+    the (inclusive) range of dates, each looked up with two index seeks per member.
+    """
+    upper: datetime | None = published_before
+    lower: datetime | None = published_after
+    if lower is None and upper is not None:
+        # exclude undated interests from a bounded range
+        lower = UNDATED + timedelta(microseconds=1)
+
+    def between(column: Any) -> ColumnElement[Any]:
+        total = func.coalesce(_cumulative(column, upper, inclusive=True), 0)
+        if lower is None:
+            return total
+        return total - func.coalesce(_cumulative(column, lower, inclusive=False), 0)
+
+    return (
+        pounds_and_pence(between(MemberInterestTotal.cumulative_value)),
+        between(MemberInterestTotal.cumulative_count),
+    )
+
+
+class GroupTotals(NamedTuple):
+    group_id: int | None
+    member_count: int
+    interest_count: int
+    total_value: float
+    # (member id, member name, total value, interest count) of the members with the largest
+    # total values, leaving out those whose interests have no value
+    top_contributors: List[Tuple[int, str | None, float, int]]
+
+    def fields(self) -> Dict[str, Any]:
+        """
+        The totals as the fields of a `GroupInterestTotals` response.
+        """
+        return {
+            "member_count": self.member_count,
+            "interest_count": self.interest_count,
+            "total_interests_value": self.total_value,
+            "mean_value_per_member": (
+                self.total_value / self.member_count if self.member_count else 0.0
+            ),
+            "mean_value_per_interest": (
+                self.total_value / self.interest_count if self.interest_count else 0.0
+            ),
+            "top_contributors": [
+                {
+                    "member_id": member_id,
+                    "member_name": name,
+                    "total_interests_value": total,
+                    "interest_count": count,
+                }
+                for member_id, name, total, count in self.top_contributors
+            ],
+        }
+
+
+def group_totals(session: Session, per_member: Subquery, top: int) -> List[GroupTotals]:
+    """
+    Totals of the groups in `per_member`, a subquery of `group_id`, `member_id`, `name`,
+    `total` and `count` with one row per member of each group, largest total first. The `top`
+    members of each group by total value are read with a window over the same subquery, so
+    both queries are grouped in the database rather than summed from every member's row.
+    """
+    grouped = session.exec(
+        select(
+            per_member.c.group_id,
+            func.count(per_member.c.member_id),
+            func.coalesce(func.sum(per_member.c.count), 0),
+            pounds_and_pence(func.coalesce(func.sum(per_member.c.total), 0.0)),
+        ).group_by(per_member.c.group_id)
+    ).all()
+
+    contributors: Dict[int | None, List[Tuple[int, str | None, float, int]]] = {
+        row[0]: [] for row in grouped
+    }
+    if top > 0:
+        rank = (
+            func.row_number()
+            .over(
+                partition_by=per_member.c.group_id,
+                order_by=(per_member.c.total.desc(), per_member.c.member_id),
+            )
+            .label("rank")
+        )
+        ranked = (
+            select(per_member, rank).where(per_member.c.total > 0).subquery("ranked")
+        )
+        for row in session.exec(
+            select(
+                ranked.c.group_id,
+                ranked.c.member_id,
+                ranked.c.name,
+                ranked.c.total,
+                ranked.c.count,
+            )
+            .where(ranked.c.rank <= top)
+            .order_by(ranked.c.group_id, ranked.c.rank)
+        ):
+            contributors[row[0]].append((row[1], row[2], float(row[3]), row[4]))
+
+    return sorted(
+        (
+            GroupTotals(id, members, interests, float(total), contributors[id])
+            for id, members, interests, total in grouped
+        ),
+        key=lambda group: (-group.total_value, group.group_id is None, group.group_id),
+    )
+
+
+class Period(str, Enum):
+    WEEK = "week"
+    MONTH = "month"
+    QUARTER = "quarter"
+
+
+class InterestDate(str, Enum):
+    PUBLISHED = "published_date"
+    REGISTRATION = "registration_date"
+
+
+def period_start(column: Any, period: Period) -> ColumnElement[date]:
+    """
+    The first day of the week (starting on Monday), month or quarter `column` falls in,
+    computed by SQLite so rows can be grouped by period in a single query.
+    """
+    if period == Period.WEEK:
+        start = func.date(column, "weekday 0", "-6 days")
+    elif period == Period.MONTH:
+        start = func.date(column, "start of month")
+    else:
+        month = cast(func.strftime("%m", column), Integer)
+        start = func.date(
+            column, "start of month", func.printf("-%d months", (month - 1) % 3)
+        )
+    return type_coerce(start, Date)
@@ -0,0 +1,282 @@
+from app.models import Interest, Member, MonetaryValueField, Party
+from app.models.api_models import MemberWithTotalInterestValue
+from app.core.config import settings
+from app.core.db import DatabaseGeneration, current_generation, generation_listeners
+import app.core.filters as filter
+
+from sqlmodel import Session, select, col
+from datetime import date, datetime, time
+from importlib.util import find_spec
+from logging import getLogger
+from typing import Any, List, Tuple
+import threading
+
+# numpy is optional, without it totals are always computed by the database
+NUMPY_INSTALLED = find_spec("numpy") is not None
+if NUMPY_INSTALLED:
+    import numpy as np
+
+logger = getLogger(__name__)
+logger.setLevel(settings.LOG_LEVEL.value)
+
+EPOCH = date(1970, 1, 1)
+
+
+def _day(value: datetime) -> int:
+    return (value.date() - EPOCH).days
+
+
+class InterestAnalytics:
+    """
+    Every member's interests held in memory as contiguous NumPy columns, one row per interest,
+    so members can be ranked by the total value of their interests with vectorized masks and
+    `bincount` rather than a query. Built from, and only used for, one version of the data of
+    one generation.
+
+    Published dates are held as whole days, which matches the database exactly as long as
+    every published date is at midnight, as the upstream api publishes them. Otherwise
+    `exact` is False and the engine is not used.
+    """
+
+    # published_days of interests without a published date
+    UNDATED_DAY = -(2**62)
+
+    def __init__(
+        self,
+        generation: DatabaseGeneration,
+        version: int,
+        member_ids: "np.ndarray",
+        member_party_ids: "np.ndarray",
+        member_houses: "np.ndarray",
+        interests: List[Tuple[Any, ...]],
+    ):
+        self.generation = generation
+        self.version = version
+        # members, sorted by id. Missing party ids and houses are -1
+        self.member_ids = member_ids
+        self.member_party_ids = member_party_ids
+        self.member_houses = member_houses
+
+        # interests of members in the members table, with their member's position in it
+        member_id, category_id, published_date, value = (
+            zip(*interests) if interests else ((), (), (), ())
+        )
+        member_id = np.array(member_id, dtype=np.int64)
+        index = np.minimum(
+            np.searchsorted(self.member_ids, member_id), len(self.member_ids) - 1
+        )
+        known = (
+            self.member_ids[index] == member_id
+            if len(self.member_ids)
+            else np.zeros(len(member_id), dtype=bool)
+        )
+        self.member_index = index[known]
+        self.member_id = member_id[known]
+        self.party_id = self.member_party_ids[self.member_index]
+        self.house = self.member_houses[self.member_index]
+        self.category_id = np.array(
+            [-1 if id is None else id for id in category_id], dtype=np.int64
+        )[known]
+        self.published_day = np.array(
+            [self.UNDATED_DAY if day is None else _day(day) for day in published_date],
+            dtype=np.int64,
+        )[known]
+        self.value = np.array(
+            [0.0 if amount is None else amount for amount in value], dtype=np.float64
+        )[known]
+        self.exact = all(day is None or day.time() == time(0) for day in published_date)
+
+    @classmethod
+    def from_db(cls, generation: DatabaseGeneration) -> "InterestAnalytics":
+        # read first, so a sync landing while the rows are read makes the engine look stale
+        version = generation.data_version().version
+        with Session(generation.reader_engine) as session:
+            members = session.exec(
+                select(Member.id, Member.party_id, Member.house).order_by(
+                    col(Member.id)
+                )
+            ).all()
+            interests = session.exec(
+                select(
+                    Interest.member_id,
+                    Interest.category_id,
+                    Interest.published_date,
+                    MonetaryValueField.value,
+                )
+                .join(
+                    MonetaryValueField,
+                    col(MonetaryValueField.interest_id) == col(Interest.id),
+                    isouter=True,
+                )
+                .where(col(Interest.member_id).is_not(None))
+            ).all()
+
+        def column(position: int) -> "np.ndarray":
+            return np.array(
+                [-1 if row[position] is None else row[position] for row in members],
+                dtype=np.int64,
+            )
+
+        return cls(
+            generation, version, column(0), column(1), column(2), list(interests)
+        )
+
+    def _in_dates(
+        self, published_after: datetime | None, published_before: datetime | None
+    ) -> "np.ndarray | None":
+        """
+        Mask of the interests published within the (inclusive) range, as in
+        `member_interest_totals`. Undated interests only count when there is no range.
+        """
+        if published_after is None and published_before is None:
+            return None
+        mask = self.published_day != self.UNDATED_DAY
+        if published_after is not None:
+            # interests are published at midnight, so one later in the day starts the next
+            first_day = _day(published_after) + (published_after.time() != time(0))
+            mask &= self.published_day >= first_day
+        if published_before is not None:
+            mask &= self.published_day <= _day(published_before)
+        return mask
+
+    def search(
+        self,
+        session: Session,
+        member_name: str | None = None,
+        party: str | None = None,
+        house: int | None = None,
+        published_after: datetime | None = None,
+        published_before: datetime | None = None,
+        after: Tuple[float, int] | None = None,
+        skip: int = 0,
+        take: int | None = None,
+    ) -> List[MemberWithTotalInterestValue]:
+        """
+        Members ranked by the total value of their interests, as
+        `search_members_with_grouped_interest_values` queries them from the database. Only
+        name and party matches, and the members on the page, are read from `session`.
+        """
+        in_dates = self._in_dates(published_after, published_before)
+        member_index, value = self.member_index, self.value
+        if in_dates is not None:
+            member_index, value = member_index[in_dates], value[in_dates]
+
+        members = len(self.member_ids)
+        # rounded to whole pence, as by `pounds_and_pence`, so the totals and cursors match the
+        # database's exactly
+        totals = np.round(
+            np.bincount(member_index, weights=value, minlength=members), 2
+        )
+        candidates = np.ones(members, dtype=bool)
+        if in_dates is not None:
+            candidates &= np.bincount(member_index, minlength=members) > 0
+        if house:
+            candidates &= self.member_houses == house
+        if party:
+            party_ids = session.exec(filter.by_party(select(Party.id), party)).all()
+            candidates &= np.isin(self.member_party_ids, party_ids)
+        if member_name:
+            member_ids = session.exec(
+                filter.by_member_name(select(Member.id), member_name)
+            ).all()
+            candidates &= np.isin(self.member_ids, member_ids)
+        if after:
+            last_total, last_id = after
+            candidates &= (totals < last_total) | (
+                (totals == last_total) & (self.member_ids > last_id)
+            )
+
+        selected = np.flatnonzero(candidates)
+        ranked = selected[np.lexsort((self.member_ids[selected], -totals[selected]))]
+        page = ranked[skip : skip + take] if take else ranked[skip:]
+
+        page_ids = self.member_ids[page].tolist()
+        loaded = {
+            member.id: member
+            for member in session.exec(
+                select(Member).where(col(Member.id).in_(page_ids))
+            )
+        }
+        return [
+            MemberWithTotalInterestValue(
+                member=loaded[member_id], total_interests_value=float(total)
+            )
+            for member_id, total in zip(page_ids, totals[page].tolist())
+        ]
+
+
+_analytics: InterestAnalytics | None = None
+
+
+def load_analytics(generation: DatabaseGeneration) -> None:
+    """
+    Build the analytics engine for `generation`, e.g. at startup, after each refresh and after
+    each sync in place. Failing to build it only means totals are computed by the database.
+    """
+    global _analytics
+    if not (settings.ANALYTICS_ENGINE and NUMPY_INSTALLED):
+        return
+    try:
+        analytics = InterestAnalytics.from_db(generation)
+    except Exception:
+        logger.exception("Could not build the analytics engine, using the database.")
+        _analytics = None
+        return
+
+    if not analytics.exact:
+        logger.warning("Published dates are not whole days, using the database.")
+    _analytics = analytics
+    logger.info(
+        f"Loaded {len(analytics.value)} interests of generation {generation.number} "
+        "into the analytics engine."
+    )
+
+
+generation_listeners.append(load_analytics)
+
+
+_rebuild_lock = threading.Lock()
+# the latest rebuild after a sync in place, kept so tests can wait for it
+_rebuild_thread: threading.Thread | None = None
+
+
+def _rebuild_in_background(generation: DatabaseGeneration) -> None:
+    global _rebuild_thread
+    if not _rebuild_lock.acquire(blocking=False):
+        return  # already rebuilding
+
+    def rebuild() -> None:
+        try:
+            load_analytics(generation)
+        finally:
+            _rebuild_lock.release()
+
+    _rebuild_thread = threading.Thread(
+        target=rebuild, name="analytics-rebuild", daemon=True
+    )
+    _rebuild_thread.start()
+
+
+def current_analytics(
+    generation: DatabaseGeneration | None = None, version: int | None = None
+) -> InterestAnalytics | None:
+    """
+    The analytics engine, if enabled and built from the current data of `generation` (the
+    live one by default), whose data is at `version` (read from it by default). When the data
+    was synced in place since, the engine is rebuilt in the background, and totals are
+    computed by the database meanwhile.
+    """
+    analytics = _analytics
+    generation = generation or current_generation()
+    if not (
+        settings.ANALYTICS_ENGINE
+        and analytics is not None
+        and analytics.generation is generation
+    ):
+        return None
+    if version is None:
+        version = generation.data_version().version
+    if analytics.version != version:
+        _rebuild_in_background(generation)
+        return None
+    return analytics if analytics.exact else None
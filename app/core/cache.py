@@ -0,0 +1,235 @@
+from app.core.config import settings
+from app.core.db import (
+    DatabaseGeneration,
+    DataVersionValue,
+    SessionRunner,
+    generation_listeners,
+)
+from app.core.metrics import register_cache_metrics
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlmodel import Session
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from functools import lru_cache
+from hashlib import sha1
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Tuple
+from time import monotonic
+import threading
+
+
+class CachedResponse(NamedTuple):
+    content: bytes
+    headers: Dict[str, str] = {}  # e.g. the cursor of the next page
+
+
+class ResponseCache:
+    """
+    LRU cache of serialized responses. Entries expire `ttl_seconds` after being stored, and the
+    least recently used entries are evicted to keep within `max_entries` and `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = monotonic,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.size_bytes = 0
+        self._entries: OrderedDict[Hashable, Tuple[float, CachedResponse]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key: Hashable) -> CachedResponse | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self.clock():
+                self._remove(key)
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, response: CachedResponse) -> None:
+        if len(response.content) > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (self.clock() + self.ttl_seconds, response)
+            self.size_bytes += len(response.content)
+
+            while (
+                len(self._entries) > self.max_entries
+                or self.size_bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def _remove(self, key: Hashable) -> None:
+        _, response = self._entries.pop(key)
+        self.size_bytes -= len(response.content)
+
+
+response_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+)
+register_cache_metrics(response_cache)
+
+
+def _clear_on_refresh(generation: DatabaseGeneration) -> None:
+    if settings.RESPONSE_CACHE_CLEAR_ON_REFRESH:
+        response_cache.clear()
+
+
+generation_listeners.append(_clear_on_refresh)
+
+
+def cache_key(route: str, **params: Any) -> Tuple[Hashable, ...]:
+    """
+    Key for a response of `route` to the (already type converted) query parameters.
+    `cached_response` adds the data it is read from to the key.
+    """
+    return (
+        route,
+        tuple(
+            sorted(
+                (name, value.isoformat() if isinstance(value, datetime) else value)
+                for name, value in params.items()
+            )
+        ),
+    )
+
+
+@lru_cache
+def _adapter(response_type: Any) -> TypeAdapter[Any]:
+    return TypeAdapter(response_type)
+
+
+def last_modified(version: DataVersionValue) -> datetime | None:
+    """
+    When the data at `version` was last synced with the upstream apis, in UTC and truncated to
+    the whole seconds HTTP dates can express.
+    """
+    synced = version.synced_at
+    if synced is None:
+        return None
+    # syncs are recorded in local time
+    return synced.astimezone(timezone.utc).replace(microsecond=0)
+
+
+# the data can be synced in place at any time, so clients revalidate every response, which
+# the `ETag` makes cheap
+CACHE_CONTROL = "no-cache"
+
+
+def validators(key: Tuple[Hashable, ...], version: DataVersionValue) -> Dict[str, str]:
+    """
+    `ETag`, `Last-Modified` and `Cache-Control` headers for the response stored under `key`,
+    read from data at `version`. The key holds the query, the generation number and the data
+    version, and the sync time tells apart versions with the same number, e.g. after the
+    database was rebuilt.
+    """
+    modified = last_modified(version)
+    digest = sha1(repr((key, modified)).encode()).hexdigest()
+    # weak, as the bytes sent may differ by content encoding
+    headers = {"ETag": f'W/"{digest}"', "Cache-Control": CACHE_CONTROL}
+    if modified:
+        headers["Last-Modified"] = format_datetime(modified, usegmt=True)
+    return headers
+
+
+def not_modified(request: Request, headers: Dict[str, str]) -> bool:
+    """
+    Whether the client already holds the response described by `headers`. As in RFC 9110,
+    `If-Modified-Since` is ignored when `If-None-Match` is sent.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or headers["ETag"].removeprefix("W/") in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or "Last-Modified" not in headers:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return parsedate_to_datetime(headers["Last-Modified"]) <= since
+
+
+async def cached_response(
+    request: Request,
+    key: Tuple[Hashable, ...],
+    response_type: Any,
+    runner: SessionRunner,
+    load: Callable[[Session], Any],
+    headers_for: Callable[[Any], Dict[str, str]] | None = None,
+) -> Response:
+    """
+    The JSON response stored under `key`, or the result of `load` serialized as
+    `response_type` and stored for later requests. `load` is run by `runner`, and serialized
+    there too so relationships can still be loaded lazily. `headers_for` adds headers derived
+    from the result, which are stored with it. Conditional requests for a response the client
+    already holds get an empty `304 Not Modified` without `load` being called.
+    """
+    # the generation the runner reads from, which a swap meanwhile does not change, and the
+    # version of its data, which is only read from the database off the event loop
+    generation = runner.generation
+    version = await generation.data_version_async()
+    key = (*key, generation.number, version.version)
+    headers = validators(key, version)
+    if not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+
+    cached = response_cache.get(key) if settings.RESPONSE_CACHE_ENABLED else None
+    if cached is None:
+        adapter = _adapter(response_type)
+
+        def serialize(session: Session) -> CachedResponse:
+            result = load(session)
+            return CachedResponse(
+                adapter.dump_json(result), headers_for(result) if headers_for else {}
+            )
+
+        cached = await runner.run(serialize)
+        if settings.RESPONSE_CACHE_ENABLED:
+            response_cache.set(key, cached)
+    return Response(
+        content=cached.content,
+        media_type="application/json",
+        headers={**headers, **cached.headers},
+    )
@@ -20,5 +20,89 @@ class Settings:
 
     LOG_LEVEL: LogLevel = LogLevel.INFO
 
+    # database connections
+    DB_ASYNC: bool = True  # query with aiosqlite when installed, otherwise on worker threads
+    DB_POOL_SIZE: int = 20  # connections kept open per engine
+    DB_MAX_OVERFLOW: int = 20  # extra connections opened under load, closed when returned
+    DB_POOL_TIMEOUT_SECONDS: float = 30  # wait for a free connection before failing
+    DB_BUSY_TIMEOUT_SECONDS: float = 5  # wait for a locked database before failing
+
+    # sqlite performance profile, applied to every connection (None keeps sqlite's default)
+    SQLITE_JOURNAL_MODE: str | None = "WAL"  # readers are not blocked by writes
+    SQLITE_SYNCHRONOUS: str | None = "NORMAL"  # durable enough in WAL mode, fewer fsyncs
+    SQLITE_MMAP_SIZE: int | None = 256 * 1024 * 1024  # bytes of the file read through mmap
+    SQLITE_CACHE_SIZE_KIB: int | None = 64 * 1024  # page cache per connection
+    SQLITE_TEMP_STORE: str | None = "MEMORY"  # sorts and temporary indexes
+    SQLITE_READ_ONLY_READERS: bool = True  # requests use separate `mode=ro` connections
+
+    # upstream apis, e.g. the stand-in server in `benchmarks/upstream.py` for offline runs
+    MEMBERS_API_URL: str = os.environ.get(
+        "MEMBERS_API_URL", "https://members-api.parliament.uk/api"
+    )
+    INTERESTS_API_URL: str = os.environ.get(
+        "INTERESTS_API_URL", "https://interests-api.parliament.uk/api/v1"
+    )
+
+    # upstream http clients
+    HTTP_TIMEOUT_SECONDS: float = 30  # to read a response, or to write or wait for a connection
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = 10
+    HTTP_MAX_CONNECTIONS: int = 20  # per client, at least FETCH_CONCURRENCY
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30
+    HTTP2: bool = True  # when the `http2` extra (h2) is installed
+    HTTP_RETRIES: int = 5  # of requests answered 429 or 5xx, or failing to connect
+    HTTP_BACKOFF_SECONDS: float = 0.5  # doubled each retry, jittered, unless Retry-After is sent
+    HTTP_MAX_BACKOFF_SECONDS: float = 30
+    HTTP_RATE_LIMIT: float | None = None  # requests per second per client, unlimited when None
+    HTTP_RATE_LIMIT_BURST: float | None = None  # defaults to HTTP_RATE_LIMIT
+
+    # raw upstream pages stored on disk: "cache" stores pages and revalidates them with a
+    # conditional GET, "replay" fetches only from the stored pages, without a network
+    UPSTREAM_STORE: str | None = os.environ.get("UPSTREAM_STORE")
+    UPSTREAM_STORE_DIR: str = os.path.join(CURRENT_WORKING_DIR, "app", "data", "upstream")
+
+    # ingestion
+    FETCH_ASYNC: bool = True  # fetch pages concurrently when building the database
+    FETCH_CONCURRENCY: int = 8  # maximum number of pages requested at once
+    INTERESTS_PAGE_SIZE: int = 50  # capped to whatever the upstream allows
+    ORJSON: bool = True  # decode pages with orjson when installed
+    PARSE_PROCESSES: int = 0  # parse items on this many worker processes, if more than one
+    PARSE_BATCH_SIZE: int = 200  # items sent to a worker process at a time
+
+    # background refresh, disabled when None
+    REFRESH_INTERVAL_SECONDS: int | None = 60 * 60
+    REFRESH_FULL: bool = False  # rebuild from scratch instead of syncing a copy of the live db
+    # how often the live db is checked for syncs written in place, e.g. by `make sync` from cron
+    DATA_VERSION_CHECK_SECONDS: float = 1.0
+
+    # in-process cache of serialized responses
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1024
+    RESPONSE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    RESPONSE_CACHE_TTL_SECONDS: float = 15 * 60
+    RESPONSE_CACHE_CLEAR_ON_REFRESH: bool = True  # otherwise stale entries age out
+
+    # rank members by their interests in memory, when numpy is installed
+    ANALYTICS_ENGINE: bool = True
+
+    # request, query and ingest metrics served at /metrics
+    METRICS_ENABLED: bool = True
+
+    # opt-in profiler of the sql run, listed at /debug/queries
+    PROFILER_ENABLED: bool = False
+    PROFILER_SLOW_QUERY_SECONDS: float = 0.1  # slower queries are logged with their plan
+    PROFILER_MAX_STATEMENTS: int = 1000  # distinct statements tracked, new ones are ignored
+    PROFILER_SLOW_QUERIES_KEPT: int = 100  # most recent slow queries listed
+
+    # bulk exports
+    EXPORT_BATCH_SIZE: int = 1000  # rows read from the database cursor at a time
+    GZIP_MIN_SIZE: int = 1024  # responses smaller than this are sent uncompressed
+
+    # columnar snapshots, which need the `snapshot` extra (pyarrow)
+    SNAPSHOT_DIR: str = os.path.join(CURRENT_WORKING_DIR, "app", "data", "snapshots")
+    SNAPSHOT_FORMAT: str = "parquet"  # or "arrow" for Arrow IPC files
+    SNAPSHOT_COMPRESSION: str = "zstd"
+    SNAPSHOT_DICTIONARY_MAX_RATIO: float = 0.5  # dictionary encode strings at most this unique
+
 
 settings = Settings()
@@ -1,59 +1,671 @@
 from app.models import (
-    member_and_party_from_dict,
-    interest_from_dict,
+    DataVersion,
+    InterestField,
+    MemberInterestTotal,
+    SyncWatermark,
+    TableRow,
 )
-
-# from backend.client.mock_clients import mock_interest_client, mock_member_client
-from app.client.fetch import fetch_all_active_members, fetch_all_interests
-from app.client import member_client, interest_client
 from app.core.config import settings, LogLevel
+from app.core.search import init_search_index, reindex_interests
+from app.core.aggregates import refresh_interest_totals
+import app.core.metrics as metrics
 
-from sqlmodel import SQLModel, create_engine, Session
-from typing import Iterable, Iterator, Tuple
+from sqlmodel import SQLModel, create_engine, Session, select, delete, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import (
+    Engine,
+    Connection,
+    Executable,
+    Row,
+    Table,
+    Index,
+    event,
+    exc,
+    and_,
+    inspect,
+    or_,
+)
+from sqlalchemy.dialects.sqlite import insert, Insert
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from anyio import CapacityLimiter, to_thread
+from typing import (
+    AsyncIterator,
+    Callable,
+    Iterable,
+    Iterator,
+    Tuple,
+    Dict,
+    List,
+    Any,
+    NamedTuple,
+    Sequence,
+    TypeVar,
+)
+from collections import defaultdict
+from functools import partial
+from contextlib import asynccontextmanager, contextmanager
+from importlib.util import find_spec
+from pathlib import Path
+import asyncio
+import threading
 from itertools import batched
+from datetime import datetime
+from time import monotonic, perf_counter, time
 from logging import getLogger
 
 logger = getLogger(__name__)
 logger.setLevel(settings.LOG_LEVEL.value)
 
-engine = create_engine(settings.SQLITE_DB, echo=settings.LOG_LEVEL == LogLevel.DEBUG)
+
+T = TypeVar("T")
+
+# aiosqlite is optional, without it queries from async routes run on worker threads
+ASYNC_DRIVER_INSTALLED = find_spec("aiosqlite") is not None
+
+
+def _engine_options() -> Dict[str, Any]:
+    return {
+        "echo": settings.LOG_LEVEL == LogLevel.DEBUG,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "connect_args": {"timeout": settings.DB_BUSY_TIMEOUT_SECONDS},
+    }
+
+
+def _pragmas(read_only: bool) -> Dict[str, Any]:
+    pragmas = {
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        # negative sizes are in KiB rather than pages
+        "cache_size": (
+            -settings.SQLITE_CACHE_SIZE_KIB if settings.SQLITE_CACHE_SIZE_KIB else None
+        ),
+        "temp_store": settings.SQLITE_TEMP_STORE,
+    }
+    if not read_only:
+        # the journal mode is stored in the file, and only writers can change it
+        pragmas["journal_mode"] = settings.SQLITE_JOURNAL_MODE
+        pragmas["synchronous"] = settings.SQLITE_SYNCHRONOUS
+    return {name: value for name, value in pragmas.items() if value is not None}
+
+
+def _apply_pragmas(engine: Engine, read_only: bool) -> None:
+    pragmas = _pragmas(read_only)
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+
+def _url(driver: str, path: Path, read_only: bool) -> str:
+    if read_only:
+        return f"sqlite+{driver}:///file:{path}?mode=ro&uri=true"
+    return f"sqlite+{driver}:///{path}"
+
+
+def make_engine(path: Path, read_only: bool = False) -> Engine:
+    engine = create_engine(_url("pysqlite", path, read_only), **_engine_options())
+    _apply_pragmas(engine, read_only)
+    return engine
+
+
+def make_async_engine(path: Path, read_only: bool = False) -> AsyncEngine:
+    engine = create_async_engine(
+        _url("aiosqlite", path, read_only), **_engine_options()
+    )
+    _apply_pragmas(engine.sync_engine, read_only)
+    return engine
+
+
+def generation_path(number: int) -> Path:
+    """
+    Generation 0 is `settings.SQLITE_DB_PATH` itself, later generations are built next to it
+    e.g. `members.3.db`.
+    """
+    path = Path(settings.SQLITE_DB_PATH)
+    if number == 0:
+        return path
+    return path.with_name(f"{path.stem}.{number}{path.suffix}")
+
+
+def existing_generations() -> Dict[int, Path]:
+    path = Path(settings.SQLITE_DB_PATH)
+    generations = {0: path} if path.exists() else {}
+    for candidate in path.parent.glob(f"{path.stem}.*{path.suffix}"):
+        number = candidate.name[len(path.stem) + 1 : -len(path.suffix) or None]
+        if number.isdigit():
+            generations[int(number)] = candidate
+    return generations
+
+
+def remove_database_files(path: Path) -> None:
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        Path(f"{path}{suffix}").unlink(missing_ok=True)
+
+
+class DatabaseGeneration:
+    """
+    One version of the database file and its engines. Sessions hold a reference to the
+    generation they were opened on, so when a newer generation replaces it, requests already in
+    flight finish against this one, and its engines and files are only removed once the last of
+    them has released it.
+
+    `engine` is used to build and sync the database, while requests read through separate
+    read-only engines so they never take write locks.
+    """
+
+    def __init__(self, number: int, path: Path):
+        self.number = number
+        self.path = path
+        self.engine = make_engine(path)
+        self._reader_engine: Engine | None = None
+        self._async_reader_engine: AsyncEngine | None = None
+        # when the generation started serving requests, used to predict the next refresh
+        self.live_since = time()
+        self._active = 0
+        self._retired = False
+        self._lock = threading.Lock()
+        # (checked at, syncs bumped by this process then, version), see `data_version`
+        self._data_version: Tuple[float, int, DataVersionValue] | None = None
+
+    @property
+    def reader_engine(self) -> Engine:
+        """
+        Engine for sessions serving requests, created on first use.
+        """
+        if not settings.SQLITE_READ_ONLY_READERS:
+            return self.engine
+        with self._lock:
+            if self._reader_engine is None:
+                self._reader_engine = make_engine(self.path, read_only=True)
+            return self._reader_engine
+
+    @property
+    def async_reader_engine(self) -> AsyncEngine:
+        """
+        Engine for async sessions serving requests, created on first use.
+        """
+        with self._lock:
+            if self._async_reader_engine is None:
+                self._async_reader_engine = make_async_engine(
+                    self.path, read_only=settings.SQLITE_READ_ONLY_READERS
+                )
+            return self._async_reader_engine
+
+    def data_version(self) -> "DataVersionValue":
+        """
+        How many syncs were written to this generation and when the last one finished. Syncs
+        by this process are seen straight away, and syncs by another one (e.g. `make sync`
+        from cron) within `settings.DATA_VERSION_CHECK_SECONDS`.
+        """
+        version = self._checked_data_version()
+        if version is None:
+            bumps = _data_version_bumps
+            version = read_data_version(self.reader_engine)
+            self._data_version = (monotonic(), bumps, version)
+        return version
+
+    async def data_version_async(self) -> "DataVersionValue":
+        """
+        `data_version` for the event loop, where the database is only read, on a worker
+        thread, when the version is due to be checked again.
+        """
+        version = self._checked_data_version()
+        if version is None:
+            version = await to_thread.run_sync(self.data_version)
+        return version
+
+    def _checked_data_version(self) -> "DataVersionValue | None":
+        """The version last read, unless a sync was bumped or the check is due since."""
+        memo = self._data_version
+        if (
+            memo is None
+            or memo[1] != _data_version_bumps
+            or monotonic() - memo[0] >= settings.DATA_VERSION_CHECK_SECONDS
+        ):
+            return None
+        return memo[2]
+
+    async def dispose_async_engine(self) -> None:
+        """
+        Close the async engine's connections, each of which holds an aiosqlite thread that
+        would otherwise keep the process alive.
+        """
+        if self._async_reader_engine is not None:
+            await self._async_reader_engine.dispose()
+
+    def acquire(self) -> None:
+        with self._lock:
+            self._active += 1
+
+    def release(self) -> None:
+        with self._lock:
+            self._active -= 1
+            close = self._retired and self._active == 0
+        if close:
+            self._close()
+
+    def retire(self) -> None:
+        with self._lock:
+            self._retired = True
+            close = self._active == 0
+        if close:
+            self._close()
+
+    def _close(self) -> None:
+        self.engine.dispose()
+        if self._reader_engine is not None:
+            self._reader_engine.dispose()
+        if self._async_reader_engine is not None:
+            self._dispose_async_engine(self._async_reader_engine)
+        remove_database_files(self.path)
+        logger.info(f"Removed database generation {self.number} at {self.path}.")
+
+    def _dispose_async_engine(self, engine: AsyncEngine) -> None:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # e.g. retired from the refresher's worker thread
+            asyncio.run(engine.dispose())
+        else:
+            # released by the last request using it, the reference keeps the task alive
+            self._disposal = asyncio.ensure_future(engine.dispose())
+
+
+_generation_lock = threading.Lock()
+_latest_generation = max(existing_generations(), default=0)
+_generation = DatabaseGeneration(
+    _latest_generation, generation_path(_latest_generation)
+)
+# the engine of the live generation, kept up to date by `swap_generation`
+engine = _generation.engine
+
+
+# called with the new generation after each swap, e.g. to drop cached responses
+generation_listeners: List[Callable[[DatabaseGeneration], None]] = []
+
+
+def current_generation() -> DatabaseGeneration:
+    return _generation
+
+
+def get_engine() -> Engine:
+    return _generation.engine
+
+
+def swap_generation(generation: DatabaseGeneration) -> None:
+    """
+    Make `generation` the live database. New sessions are opened on it straight away, while
+    the previous generation is removed once its in-flight sessions have closed.
+    """
+    global _generation, engine
+    with _generation_lock:
+        previous, _generation = _generation, generation
+        engine = generation.engine
+        generation.live_since = time()
+    logger.info(
+        f"Switched from database generation {previous.number} to {generation.number}."
+    )
+    previous.retire()
+
+    for listener in generation_listeners:
+        listener(generation)
+
+
+def remove_stale_generations() -> None:
+    """
+    Remove generation files left behind by a previous run, e.g. a refresh interrupted midway.
+    """
+    for number, path in existing_generations().items():
+        if number != _generation.number:
+            logger.info(f"Removing stale database generation {number} at {path}.")
+            remove_database_files(path)
+
+
+@contextmanager
+def pinned_generation() -> Iterator[DatabaseGeneration]:
+    """
+    The live generation, which is not removed before the block exits even if a newer one is
+    swapped in meanwhile.
+    """
+    with _generation_lock:
+        generation = _generation
+        generation.acquire()
+    try:
+        yield generation
+    finally:
+        generation.release()
 
 
 # for fastapi dependency injection
 def get_session() -> Iterator[Session]:
-    with Session(engine) as session:
-        yield session
+    with pinned_generation() as generation:
+        with Session(generation.reader_engine) as session:
+            yield session
+
+
+class SessionRunner:
+    """
+    Runs blocking ORM code from async routes without tying up a thread of the server's
+    threadpool for each request. `run` calls a function with a sync `Session`, either inside an
+    aiosqlite backed `AsyncSession` or, when that is unavailable, on a worker thread limited to
+    the number of connections the pool can hand out. Sessions are opened on `generation`,
+    which is kept while the runner is in use.
+    """
+
+    def __init__(
+        self,
+        generation: DatabaseGeneration,
+        session: Session | None = None,
+        async_session: AsyncSession | None = None,
+        limiter: CapacityLimiter | None = None,
+    ):
+        self.generation = generation
+        self.session = session
+        self.async_session = async_session
+        self.limiter = limiter
+
+    async def run(self, function: Callable[[Session], T]) -> T:
+        if self.async_session is not None:
+            return await self.async_session.run_sync(function)
+        assert self.session is not None
+        return await to_thread.run_sync(function, self.session, limiter=self.limiter)
+
+    async def stream(
+        self, statement: Executable, batch_size: int
+    ) -> AsyncIterator[Sequence[Row[Any]]]:
+        """
+        The rows of `statement` in batches of `batch_size`, read from the database cursor as
+        they are consumed rather than all loaded up front.
+        """
+        statement = statement.execution_options(yield_per=batch_size)
+        if self.async_session is not None:
+            result = await self.async_session.stream(statement)
+            async for partition in result.partitions():
+                yield partition
+            return
+
+        assert self.session is not None
+        sync_result = await self.run(
+            lambda session: session.connection().execute(statement)
+        )
+        while partition := await to_thread.run_sync(
+            sync_result.fetchmany, batch_size, limiter=self.limiter
+        ):
+            yield partition
+
+
+# created on first use, as it belongs to the running event loop
+_thread_limiter: CapacityLimiter | None = None
+
+
+def _get_thread_limiter() -> CapacityLimiter:
+    global _thread_limiter
+    if _thread_limiter is None:
+        _thread_limiter = CapacityLimiter(
+            settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+        )
+    return _thread_limiter
+
+
+@asynccontextmanager
+async def session_runner() -> AsyncIterator[SessionRunner]:
+    """
+    A `SessionRunner` on the live generation, which is kept until the runner is closed.
+    """
+    with pinned_generation() as generation:
+        if settings.DB_ASYNC and ASYNC_DRIVER_INSTALLED:
+            async with AsyncSession(generation.async_reader_engine) as async_session:
+                yield SessionRunner(generation, async_session=async_session)
+        else:
+            with Session(generation.reader_engine) as session:
+                yield SessionRunner(
+                    generation, session=session, limiter=_get_thread_limiter()
+                )
+
+
+# for fastapi dependency injection in async routes
+async def get_session_runner() -> AsyncIterator[SessionRunner]:
+    async with session_runner() as runner:
+        yield runner
+
+
+class DataVersionValue(NamedTuple):
+    version: int
+    synced_at: datetime | None  # local time, like the sync watermarks
+
 
+# syncs bumped by this process, so generations re-read their version without waiting
+_data_version_bumps = 0
 
-def init_db():
-    SQLModel.metadata.create_all(engine)
+
+def bump_data_version(bind: Engine | None = None) -> None:
+    """
+    Record that a sync was written to the database, invalidating anything derived from the
+    previous version, e.g. cached responses and their `ETag`s.
+    """
+    global _data_version_bumps
+    table = DataVersion.__table__
+    statement = insert(table).values(id=1, version=1, synced_at=datetime.now())
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.id],
+        set_={
+            "version": table.c.version + 1,
+            "synced_at": statement.excluded.synced_at,
+        },
+    )
+    with (bind or get_engine()).begin() as connection:
+        connection.execute(statement)
+    _data_version_bumps += 1
+
+
+def read_data_version(bind: Engine) -> DataVersionValue:
+    """
+    The data version stored in the database. Databases synced before versions were recorded
+    count as version 0, last synced at their latest watermark.
+    """
+    with Session(bind) as session:
+        try:
+            row = session.get(DataVersion, 1)
+            if row is not None:
+                return DataVersionValue(row.version, row.synced_at)
+            synced_at = session.exec(
+                select(func.max(SyncWatermark.last_synced_at))
+            ).one()
+        except exc.OperationalError:
+            # tables not created yet
+            return DataVersionValue(0, None)
+    return DataVersionValue(0, synced_at)
+
+
+def init_db(bind: Engine | None = None):
+    bind = bind or get_engine()
+    new_tables = set(SQLModel.metadata.tables) - set(inspect(bind).get_table_names())
+    SQLModel.metadata.create_all(bind)
+    migrate_indexes(bind)
+    with bind.begin() as connection:
+        init_search_index(connection)
+
+    # aggregates added to an existing database are filled from the rows already in it
+    if MemberInterestTotal.__tablename__ in new_tables:
+        refresh_interest_totals(bind)
+
+
+def migrate_indexes(bind: Engine) -> None:
+    """
+    `create_all` only creates indexes alongside new tables, so add any declared index that an
+    existing database is missing. Duplicate rows are removed (keeping the newest) before a
+    unique index is created, and the planner statistics are refreshed afterwards.
+    """
+    with bind.begin() as connection:
+        inspector = inspect(connection)
+        created = False
+        for table in SQLModel.metadata.sorted_tables:
+            existing = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in existing:
+                    continue
+                if index.unique:
+                    _delete_duplicates(connection, table, index)
+                logger.info(f"Creating index {index.name} on {table.name}.")
+                index.create(connection)
+                created = True
+
+        # refresh the statistics the query planner uses to choose between indexes
+        if created:
+            connection.exec_driver_sql("ANALYZE")
+
+
+def _delete_duplicates(connection: Connection, table: Table, index: Index) -> None:
+    key_columns = list(index.columns)
+    primary_key = list(table.primary_key.columns)[0]
+    # unique indexes allow any number of rows with a NULL key column, so those are kept, even
+    # though GROUP BY would put them in one group
+    complete_key = and_(*(column.is_not(None) for column in key_columns))
+    newest = select(func.max(primary_key)).where(complete_key).group_by(*key_columns)
+    connection.execute(delete(table).where(complete_key, primary_key.not_in(newest)))
+
+
+class UpsertStats(NamedTuple):
+    rows: int = 0  # rows sent to the database
+    seconds: float = 0.0
+    changed: int = 0  # rows actually inserted or updated
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def _conflict_columns(table: Table) -> List[str]:
+    """
+    Rows are matched on the primary key, unless the table declares a unique index, in which
+    case the primary key is generated by the database and the unique columns are matched.
+    """
+    for index in table.indexes:
+        if index.unique:
+            return [column.name for column in index.columns]
+    return [column.name for column in table.primary_key.columns]
+
+
+def _upsert_statement(table: Table, only_changed: bool) -> Insert:
+    conflict_columns = _conflict_columns(table)
+    statement = insert(table)
+    updated_columns = [
+        column
+        for column in table.columns
+        if column.name not in conflict_columns and not column.primary_key
+    ]
+    return statement.on_conflict_do_update(
+        index_elements=conflict_columns,
+        set_={
+            column.name: statement.excluded[column.name] for column in updated_columns
+        },
+        # skip the write entirely when an existing row already holds the same values
+        where=(
+            or_(
+                *(
+                    column.is_distinct_from(statement.excluded[column.name])
+                    for column in updated_columns
+                )
+            )
+            if only_changed and updated_columns
+            else None
+        ),
+    )
+
+
+def _row(
+    model: SQLModel | TableRow, table: Table, conflict_columns: List[str]
+) -> Dict[str, Any]:
+    get = model.values.get if isinstance(model, TableRow) else partial(getattr, model)
+    return {
+        column.name: get(column.name)
+        for column in table.columns
+        if not column.primary_key or column.name in conflict_columns
+    }
 
 
 def merge_to_db(
-    items: Iterable[Tuple[SQLModel | None, ...]], batch_size: int = 100
-) -> None:
-    number_upserted: int = 0
-    with Session(engine) as session:
+    items: Iterable[Tuple[SQLModel | TableRow | None, ...]],
+    batch_size: int = 500,
+    bind: Engine | None = None,
+    only_changed: bool = True,
+) -> Dict[str, UpsertStats]:
+    """
+    Upsert parsed models, or `TableRow`s of their values, grouped by table, as batched
+    `INSERT ... ON CONFLICT DO UPDATE` statements. Each batch of `batch_size` items is written
+    and committed before the next is read, so memory use does not grow with the number of
+    items. With `only_changed`, rows whose values already match the database are left
+    untouched. The search index of interests whose fields changed is rebuilt once per batch.
+    Returns the number of rows sent, the number changed and the time spent writing them for
+    each table.
+    """
+    bind = bind or get_engine()
+    stats: Dict[str, UpsertStats] = {}
+    statements: Dict[Table, Insert] = {}
+    conflict_columns: Dict[Table, List[str]] = {}
+    fields: Table = InterestField.__table__  # type: ignore[attr-defined]
+
+    with bind.connect() as connection:
         for batch in batched(items, batch_size):
+            # rows are keyed by their conflict columns so repeated rows, such as a party shared
+            # by many members, are only written once per batch
+            rows: Dict[Table, Dict[Tuple[Any, ...], Dict[str, Any]]] = defaultdict(dict)
             for models in batch:
                 for model in models:
-                    if model:
-                        session.merge(model)
-                    number_upserted += 1
-
-            session.commit()
-        logger.info(f"Upserted {number_upserted} items.")
-
-
-def setup_db():
-    init_db()
+                    if not model:
+                        continue
+                    table: Table = (
+                        SQLModel.metadata.tables[model.table]
+                        if isinstance(model, TableRow)
+                        else model.__table__  # type: ignore[attr-defined]
+                    )
+                    if table not in statements:
+                        statements[table] = _upsert_statement(table, only_changed)
+                        if table is fields:
+                            # the interests to re-index, as only changed rows are returned
+                            statements[table] = statements[table].returning(
+                                fields.c.interest_id
+                            )
+                        conflict_columns[table] = _conflict_columns(table)
+                    row = _row(model, table, conflict_columns[table])
+                    key = tuple(row[name] for name in conflict_columns[table])
+                    rows[table][key] = row
 
-    members_data = fetch_all_active_members(client=member_client)
-    parsed_member_data = map(member_and_party_from_dict, members_data)
+            # parents are written before the rows that reference them
+            for table in SQLModel.metadata.sorted_tables:
+                if table not in rows:
+                    continue
+                start = perf_counter()
+                result = connection.execute(
+                    statements[table], list(rows[table].values())
+                )
+                if table is fields:
+                    reindexed = result.scalars().all()
+                    reindex_interests(connection, reindexed)
+                    changed = len(reindexed)
+                else:
+                    changed = max(result.rowcount, 0)
+                elapsed = perf_counter() - start
+                metrics.rows_upserted.inc(len(rows[table]), table=table.name)
+                metrics.rows_changed.inc(changed, table=table.name)
+                previous = stats.get(table.name, UpsertStats())
+                stats[table.name] = UpsertStats(
+                    rows=previous.rows + len(rows[table]),
+                    seconds=previous.seconds + elapsed,
+                    changed=previous.changed + changed,
+                )
 
-    merge_to_db(parsed_member_data)
+            connection.commit()
 
-    interests_data = fetch_all_interests(client=interest_client)
-    parsed_interests_data = map(interest_from_dict, interests_data)
+    for table_name, table_stats in stats.items():
+        logger.info(
+            f"Upserted {table_stats.rows} rows ({table_stats.changed} changed) into "
+            f"{table_name} in {table_stats.seconds:.2f}s "
+            f"({table_stats.rows_per_second:.0f} rows/s)."
+        )
 
-    merge_to_db(parsed_interests_data)
+    return stats
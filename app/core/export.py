@@ -0,0 +1,75 @@
+from app.models import Member, Interest, InterestField
+from app.core.config import settings
+from app.core.db import session_runner
+
+from sqlmodel import SQLModel
+from sqlalchemy import Row, Table, select
+from datetime import date, datetime
+from enum import Enum
+from io import StringIO
+from typing import Any, AsyncIterator, Dict, List, Sequence
+import csv
+import json
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+MEDIA_TYPES: Dict[ExportFormat, str] = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+EXPORT_TABLES: Dict[str, Table] = {
+    name: SQLModel.metadata.tables[str(model.__tablename__)]
+    for name, model in (
+        ("members", Member),
+        ("interests", Interest),
+        ("interest_fields", InterestField),
+    )
+}
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _ndjson(columns: List[str], rows: Sequence[Row[Any]]) -> str:
+    return "".join(
+        json.dumps(dict(zip(columns, map(_plain, row))), ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+
+def _csv(rows: Sequence[Any]) -> str:
+    buffer = StringIO()
+    csv.writer(buffer).writerows(
+        ["" if value is None else _plain(value) for value in row] for row in rows
+    )
+    return buffer.getvalue()
+
+
+async def export_table(
+    table: Table, format: ExportFormat, batch_size: int | None = None
+) -> AsyncIterator[str]:
+    """
+    Every row of `table` in primary key order, as NDJSON lines or CSV with a header row. Rows
+    are read from a database cursor and encoded a batch at a time, so memory use does not
+    grow with the size of the table. The generation being read is kept until the export ends.
+    """
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    columns = [column.name for column in table.columns]
+    statement = select(table).order_by(*table.primary_key.columns)
+
+    if format == ExportFormat.CSV:
+        yield _csv([columns])
+
+    async with session_runner() as runner:
+        async for rows in runner.stream(statement, batch_size):
+            yield (
+                _ndjson(columns, rows) if format == ExportFormat.NDJSON else _csv(rows)
+            )
@@ -1,6 +1,6 @@
-from app.models import Member, Party, Interest
+from app.models import Member, Party, Interest, InterestCategory
 
-from sqlmodel import func, col
+from sqlmodel import func, col, text
 from typing import Optional, Any
 from sqlmodel.sql.expression import Select, SelectOfScalar
 from datetime import datetime
@@ -18,8 +18,14 @@ def by_member_name(
     statement: Select[Any] | SelectOfScalar[Any], name: Optional[str]
 ) -> Select[Any] | SelectOfScalar[Any]:
     if name:
+        # answered from the trigram index on member names, which matches substrings and
+        # ignores case like `lower(name) LIKE '%name%'` would
         return statement.where(
-            func.lower(Member.name_display_as).like(f"%{name.lower()}%")
+            col(Member.id).in_(
+                text(
+                    "SELECT rowid FROM member_search WHERE name LIKE :member_name_pattern"
+                ).bindparams(member_name_pattern=f"%{name}%")
+            )
         )
     return statement
 
@@ -32,6 +38,16 @@ def by_party(
     return statement
 
 
+def by_category(
+    statement: Select[Any] | SelectOfScalar[Any], category: Optional[str]
+) -> Select[Any] | SelectOfScalar[Any]:
+    if category:
+        return statement.where(
+            func.lower(InterestCategory.name).like(f"%{category.lower()}%")
+        )
+    return statement
+
+
 def by_house(
     statement: Select[Any] | SelectOfScalar[Any], house: Optional[int]
 ) -> Select[Any] | SelectOfScalar[Any]:
@@ -0,0 +1,423 @@
+from app.core.config import settings
+
+from sqlalchemy import Engine, event
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from bisect import bisect_left
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+import threading
+
+# Metrics of the running app, served at `/metrics` in the Prometheus text format. Metrics are
+# kept in memory, per process, and reset when it restarts, as Prometheus expects.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+)
+PHASE_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else f"{int(value)}"
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _labels(self, labels: Dict[str, Any]) -> Labels:
+        if set(labels) != set(self.label_names):
+            raise ValueError(
+                f"{self.name} has labels {self.label_names}, not {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _label_text(self, values: Labels, extra: str = "") -> str:
+        pairs = [
+            f'{name}="{_escape(value)}"'
+            for name, value in zip(self.label_names, values)
+        ]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """
+    A total that only goes up, or is read from `function` when the metrics are rendered, e.g.
+    the hits of a cache.
+    """
+
+    type = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        label_names: Sequence[str] = (),
+        function: Callable[[], float] | None = None,
+    ):
+        super().__init__(name, help, label_names)
+        self.function = function
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._labels(labels), 0.0)
+
+    def samples(self) -> Iterable[str]:
+        if self.function is not None:
+            yield f"{self.name} {_format(self.function())}"
+            return
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{self._label_text(key)} {_format(value)}"
+
+
+class Gauge(Counter):
+    """
+    A value that goes up and down, or is read from `function`, e.g. the size of a cache.
+    """
+
+    type = "gauge"
+
+    def dec(self, amount: float = 1, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._labels(labels)
+        with self._lock:
+            self._values[key] = value
+
+    @contextmanager
+    def track_in_progress(self, **labels: Any) -> Iterator[None]:
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # per label values, the count in each bucket (not cumulative), the sum and the count
+        self._values: Dict[Labels, Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._labels(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total, count = self._values.get(
+                key, ([0] * (len(self.buckets) + 1), 0.0, 0)
+            )
+            counts[index] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - start, **labels)
+
+    def count(self, **labels: Any) -> int:
+        values = self._values.get(self._labels(labels))
+        return values[2] if values else 0
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            values = sorted(
+                (key, (list(counts), total, count))
+                for key, (counts, total, count) in self._values.items()
+            )
+        for key, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                label_text = self._label_text(key, f'le="{_format(bound)}"')
+                yield f"{self.name}_bucket{label_text} {cumulative}"
+            yield f"{self.name}_sum{self._label_text(key)} {_format(total)}"
+            yield f"{self.name}_count{self._label_text(key)} {count}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Any:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self.metrics.values()) + "\n"
+
+
+registry = Registry()
+
+# requests, labelled by route template so ids in paths do not each get their own series,
+# and by whether they came from a client or from an MCP tool call
+http_requests: Counter = registry.register(
+    Counter(
+        "mp_http_requests_total",
+        "Requests answered, by route, MCP operation and status.",
+        ("method", "route", "operation", "interface", "status"),
+    )
+)
+http_request_duration: Histogram = registry.register(
+    Histogram(
+        "mp_http_request_duration_seconds",
+        "Time to answer requests, until the last byte of the response was sent.",
+        ("method", "route", "operation", "interface"),
+    )
+)
+http_requests_in_progress: Gauge = registry.register(
+    Gauge(
+        "mp_http_requests_in_progress",
+        "Requests being answered.",
+        ("method", "route", "operation", "interface"),
+    )
+)
+
+db_queries: Counter = registry.register(
+    Counter(
+        "mp_db_queries_total", "Statements run on the database, by kind.", ("kind",)
+    )
+)
+db_query_duration: Histogram = registry.register(
+    Histogram(
+        "mp_db_query_duration_seconds",
+        "Time to run statements on the database, by kind.",
+        ("kind",),
+    )
+)
+
+pages_fetched: Counter = registry.register(
+    Counter(
+        "mp_ingest_pages_fetched_total",
+        "Pages fetched from the upstream apis.",
+        ("endpoint",),
+    )
+)
+items_parsed: Counter = registry.register(
+    Counter(
+        "mp_ingest_items_parsed_total",
+        "Items from the upstream apis parsed into models.",
+        ("source",),
+    )
+)
+upstream_requests: Counter = registry.register(
+    Counter(
+        "mp_upstream_requests_total",
+        "Requests to the upstream apis answered, by status, including retried ones.",
+        ("status",),
+    )
+)
+upstream_retries: Counter = registry.register(
+    Counter(
+        "mp_upstream_retries_total",
+        "Requests to the upstream apis retried, by the status or error that failed them.",
+        ("reason",),
+    )
+)
+upstream_rate_limit_wait: Counter = registry.register(
+    Counter(
+        "mp_upstream_rate_limit_wait_seconds_total",
+        "Time requests to the upstream apis waited for the client-side rate limiter.",
+    )
+)
+upstream_store_lookups: Counter = registry.register(
+    Counter(
+        "mp_upstream_store_lookups_total",
+        "Pages of the upstream apis stored on disk, revalidated as not modified, or replayed.",
+        ("result",),
+    )
+)
+rows_upserted: Counter = registry.register(
+    Counter(
+        "mp_ingest_rows_upserted_total",
+        "Rows sent to the database by merge_to_db.",
+        ("table",),
+    )
+)
+rows_changed: Counter = registry.register(
+    Counter(
+        "mp_ingest_rows_changed_total",
+        "Rows merge_to_db inserted or updated, rather than found unchanged.",
+        ("table",),
+    )
+)
+ingest_phase_duration: Histogram = registry.register(
+    Histogram(
+        "mp_ingest_phase_duration_seconds",
+        "Time spent in each phase of syncing and refreshing the database.",
+        ("phase",),
+        buckets=PHASE_BUCKETS,
+    )
+)
+
+
+# the host fastapi-mcp sends the requests of MCP tool calls to
+MCP_HOST = "apiserver"
+
+
+def _route(app: Any, scope: Scope) -> Tuple[str, str]:
+    """
+    The path template and operation id of the route `scope` is for.
+    """
+    for route in getattr(app, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", scope["path"]), str(
+                getattr(route, "operation_id", None) or ""
+            )
+    return "unmatched", ""
+
+
+class MetricsMiddleware:
+    """
+    Count and time each request, from when it arrives until its response is sent, e.g. all
+    of a streamed export.
+    """
+
+    def __init__(self, app: ASGIApp, routes: Any = None):
+        self.app = app
+        self.routes = routes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        route, operation = _route(self.routes, scope)
+        host = dict(scope.get("headers") or {}).get(b"host", b"").decode()
+        labels = {
+            "method": scope["method"],
+            "route": route,
+            "operation": operation,
+            "interface": "mcp" if host == MCP_HOST else "http",
+        }
+        status = 500
+
+        async def send_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = perf_counter()
+        try:
+            with http_requests_in_progress.track_in_progress(**labels):
+                await self.app(scope, receive, send_status)
+        finally:
+            http_request_duration.observe(perf_counter() - start, **labels)
+            http_requests.inc(status=status, **labels)
+
+
+def _statement_kind(statement: str) -> str:
+    words = statement.lstrip().split(None, 1)
+    return words[0].lower() if words else "other"
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+    conn.info.setdefault("query_start", []).append(perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _end_query(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    elapsed = perf_counter() - starts.pop()
+    if settings.METRICS_ENABLED:
+        kind = _statement_kind(statement)
+        db_queries.inc(kind=kind)
+        db_query_duration.observe(elapsed, kind=kind)
+
+
+def register_cache_metrics(cache: Any) -> None:
+    """
+    Report the lookups and size of the response cache, read when the metrics are rendered.
+    """
+    registry.register(
+        Counter(
+            "mp_response_cache_hits_total",
+            "Responses served from the cache.",
+            function=lambda: cache.hits,
+        )
+    )
+    registry.register(
+        Counter(
+            "mp_response_cache_misses_total",
+            "Responses looked up but not in the cache.",
+            function=lambda: cache.misses,
+        )
+    )
+    for name, help, function in (
+        (
+            "mp_response_cache_hit_ratio",
+            "Share of lookups served from the cache.",
+            lambda: cache.hit_ratio,
+        ),
+        ("mp_response_cache_entries", "Responses in the cache.", lambda: len(cache)),
+        (
+            "mp_response_cache_bytes",
+            "Size of the cached responses.",
+            lambda: cache.size_bytes,
+        ),
+    ):
+        registry.register(Gauge(name, help, function=function))
@@ -0,0 +1,43 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as Base64Error
+from typing import Any, Tuple
+import json
+
+# header holding the cursor of the page after the one returned, when there may be one
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(*key: int | float) -> str:
+    """
+    An opaque token for the sort key of the last row of a page, from which the next page is
+    fetched with a `WHERE` on the key rather than an `OFFSET`.
+    """
+    return urlsafe_b64encode(json.dumps(key, separators=(",", ":")).encode()).decode()
+
+
+def decode_cursor(cursor: str | None, *types: type) -> Tuple[Any, ...] | None:
+    """
+    The sort key encoded in `cursor`, checked to have one value of each of `types`.
+    """
+    if not cursor:
+        return None
+    try:
+        key = json.loads(urlsafe_b64decode(cursor.encode()))
+    except (Base64Error, UnicodeError, ValueError):
+        raise InvalidCursor(f"Malformed cursor {cursor!r}")
+
+    if not isinstance(key, list) or len(key) != len(types):
+        raise InvalidCursor(f"Cursor {cursor!r} is not for this search")
+    values = []
+    for value, expected in zip(key, types):
+        # json does not tell apart whole floats and ints
+        if expected is float and isinstance(value, int) and not isinstance(value, bool):
+            value = float(value)
+        if not isinstance(value, expected) or isinstance(value, bool):
+            raise InvalidCursor(f"Cursor {cursor!r} is not for this search")
+        values.append(value)
+    return tuple(values)
@@ -0,0 +1,248 @@
+from app.core.config import settings
+
+from sqlalchemy import Engine, event
+from collections import deque
+from dataclasses import dataclass, field
+from time import perf_counter, time
+from logging import getLogger
+from typing import Any, Deque, Dict, List
+import re
+import threading
+
+logger = getLogger(__name__)
+logger.setLevel(settings.LOG_LEVEL.value)
+
+# Opt-in profiler of the statements run on every engine. Statements are grouped by their
+# normalized SQL, so the same query with different parameters, or a different number of
+# values in an `IN` list, is counted as one. Statements slower than
+# `settings.PROFILER_SLOW_QUERY_SECONDS` are logged with their query plan, which shows whether
+# sqlite searched an index or scanned a whole table.
+
+_WHITESPACE = re.compile(r"\s+")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_VALUE_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+EXPLAINABLE = ("select", "insert", "update", "delete", "with")
+
+
+def normalize(statement: str) -> str:
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    statement = _LITERALS.sub("?", statement)
+    return _VALUE_LISTS.sub("(?, ...)", statement)
+
+
+@dataclass
+class StatementStats:
+    statement: str
+    calls: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    rows: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "statement": self.statement,
+            "calls": self.calls,
+            "total_ms": self.total_seconds * 1000,
+            "mean_ms": self.total_seconds / self.calls * 1000 if self.calls else 0.0,
+            "max_ms": self.max_seconds * 1000,
+            "rows": self.rows,
+        }
+
+
+@dataclass
+class SlowQuery:
+    statement: str
+    parameters: str
+    seconds: float
+    rows: int | None
+    plan: List[str] = field(default_factory=list)
+    at: float = field(default_factory=time)
+
+    @property
+    def scans(self) -> List[str]:
+        """
+        Steps of the plan reading a whole table or index, rather than searching one.
+        """
+        return [step.strip() for step in self.plan if step.strip().startswith("SCAN")]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "statement": self.statement,
+            "parameters": self.parameters,
+            "ms": self.seconds * 1000,
+            "rows": self.rows,
+            "plan": self.plan,
+            "scans": self.scans,
+            "at": self.at,
+        }
+
+
+class _CountingCursor:
+    """
+    Counts the rows fetched through a DB-API cursor, reporting them when it is closed.
+    """
+
+    def __init__(self, cursor: Any, done: Any):
+        self._cursor = cursor
+        self._done = done
+        self._rows = 0
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+    def __iter__(self) -> Any:
+        for row in self._cursor:
+            self._rows += 1
+            yield row
+
+    def fetchone(self) -> Any:
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, *args: Any) -> Any:
+        rows = self._cursor.fetchmany(*args)
+        self._rows += len(rows)
+        return rows
+
+    def fetchall(self) -> Any:
+        rows = self._cursor.fetchall()
+        self._rows += len(rows)
+        return rows
+
+    def close(self) -> None:
+        done, self._done = self._done, None
+        if done:
+            done(self._rows)
+        self._cursor.close()
+
+
+def query_plan(dbapi_connection: Any, statement: str, parameters: Any) -> List[str]:
+    """
+    The steps of sqlite's plan for `statement`, indented as in the sqlite3 shell.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+
+    depth: Dict[int, int] = {}
+    plan = []
+    for id, parent, _, detail in rows:
+        depth[id] = depth.get(parent, -1) + 1
+        plan.append("  " * depth[id] + detail)
+    return plan
+
+
+class Profiler:
+    def __init__(self) -> None:
+        self.statements: Dict[str, StatementStats] = {}
+        self.slow_queries: Deque[SlowQuery] = deque(
+            maxlen=settings.PROFILER_SLOW_QUERIES_KEPT
+        )
+        self.enabled = False
+        self._lock = threading.Lock()
+
+    def enable(self) -> None:
+        if not self.enabled:
+            event.listen(Engine, "before_cursor_execute", self._before)
+            event.listen(Engine, "after_cursor_execute", self._after)
+            self.enabled = True
+
+    def disable(self) -> None:
+        if self.enabled:
+            event.remove(Engine, "before_cursor_execute", self._before)
+            event.remove(Engine, "after_cursor_execute", self._after)
+            self.enabled = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self.statements.clear()
+            self.slow_queries.clear()
+
+    def top(self, n: int, order_by: str = "total_seconds") -> List[StatementStats]:
+        with self._lock:
+            statements = list(self.statements.values())
+        return sorted(
+            statements, key=lambda stats: getattr(stats, order_by), reverse=True
+        )[:n]
+
+    def _before(self, conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+        conn.info.setdefault("profiler_start", []).append(perf_counter())
+
+    def _after(
+        self,
+        conn: Any,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> None:
+        starts = conn.info.get("profiler_start")
+        if not starts:
+            return
+        seconds = perf_counter() - starts.pop()
+        normalized = normalize(statement)
+
+        def record(rows: int | None) -> None:
+            self._record(normalized, seconds, rows)
+            if seconds >= settings.PROFILER_SLOW_QUERY_SECONDS:
+                self._slow(
+                    conn, statement, normalized, parameters, executemany, seconds, rows
+                )
+
+        if cursor.description is not None and context is not None:
+            # rows are only known once fetched, so they are counted until the cursor closes
+            context.cursor = _CountingCursor(cursor, record)
+        else:
+            record(cursor.rowcount if cursor.rowcount >= 0 else None)
+
+    def _record(self, statement: str, seconds: float, rows: int | None) -> None:
+        with self._lock:
+            stats = self.statements.get(statement)
+            if stats is None:
+                if len(self.statements) >= settings.PROFILER_MAX_STATEMENTS:
+                    return
+                stats = self.statements[statement] = StatementStats(statement)
+            stats.calls += 1
+            stats.total_seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.rows += rows or 0
+
+    def _slow(
+        self,
+        conn: Any,
+        statement: str,
+        normalized: str,
+        parameters: Any,
+        executemany: bool,
+        seconds: float,
+        rows: int | None,
+    ) -> None:
+        plan: List[str] = []
+        if not executemany and normalized.lower().startswith(EXPLAINABLE):
+            try:
+                plan = query_plan(
+                    conn.connection.dbapi_connection, statement, parameters
+                )
+            except Exception:
+                logger.debug(f"Could not explain {normalized}", exc_info=True)
+        slow = SlowQuery(normalized, _parameters(parameters), seconds, rows, plan)
+        with self._lock:
+            self.slow_queries.append(slow)
+        logger.warning(
+            f"Slow query ({seconds * 1000:.1f}ms, {rows} rows): {normalized}\n"
+            + "\n".join(plan)
+        )
+
+
+def _parameters(parameters: Any, limit: int = 200) -> str:
+    text = repr(parameters)
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+profiler = Profiler()
@@ -0,0 +1,101 @@
+from app.models import Member, Interest, SyncWatermark
+from app.core.config import settings
+from app.core.db import (
+    DatabaseGeneration,
+    current_generation,
+    generation_path,
+    remove_database_files,
+    swap_generation,
+)
+from app.core.sync import sync_db
+import app.core.metrics as metrics
+
+from sqlmodel import Session, select, func
+from sqlalchemy import Engine
+from contextlib import closing
+from logging import getLogger
+import asyncio
+import sqlite3
+
+logger = getLogger(__name__)
+logger.setLevel(settings.LOG_LEVEL.value)
+
+
+class ValidationError(Exception):
+    pass
+
+
+def validate_db(bind: Engine) -> None:
+    """
+    Check a freshly built database is intact and holds data before it is made live.
+    """
+    with bind.connect() as connection:
+        integrity = connection.exec_driver_sql("PRAGMA quick_check").scalar()
+    if integrity != "ok":
+        raise ValidationError(f"Integrity check failed: {integrity}")
+
+    with Session(bind) as session:
+        for model in (Member, Interest, SyncWatermark):
+            if not session.exec(select(func.count()).select_from(model)).one():
+                raise ValidationError(f"No rows in {model.__tablename__}")
+
+
+def build_generation() -> DatabaseGeneration:
+    """
+    Build the next database generation in a new file next to the live one. Unless
+    `settings.REFRESH_FULL` is set, the live database is copied and incrementally synced,
+    otherwise the new file is loaded from scratch. The live database is only read from, so
+    requests keep being served from it while the new generation is built.
+    """
+    live = current_generation()
+    generation = DatabaseGeneration(live.number + 1, generation_path(live.number + 1))
+    remove_database_files(generation.path)
+
+    try:
+        full = settings.REFRESH_FULL or not live.path.exists()
+        if not full:
+            with (
+                closing(
+                    sqlite3.connect(f"file:{live.path}?mode=ro", uri=True)
+                ) as source,
+                closing(sqlite3.connect(generation.path)) as target,
+            ):
+                source.backup(target)
+
+        sync_db(generation.engine, full=full)
+        with metrics.ingest_phase_duration.time(phase="validate"):
+            validate_db(generation.engine)
+
+        # fold the write-ahead log into the file, so readers of the new generation do not
+        # start out reading pages through it
+        with generation.engine.connect() as connection:
+            connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    except Exception:
+        generation.retire()
+        raise
+
+    return generation
+
+
+def refresh_db() -> DatabaseGeneration:
+    """
+    Build and validate a new database generation, then switch requests over to it.
+    """
+    with metrics.ingest_phase_duration.time(phase="refresh"):
+        generation = build_generation()
+    swap_generation(generation)
+    return generation
+
+
+async def run_refresher(interval_seconds: float) -> None:
+    """
+    Refresh the database every `interval_seconds` until cancelled. A failed refresh is logged
+    and the live generation kept until the next attempt.
+    """
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            # syncing drives its own event loop, so it runs in a worker thread
+            await asyncio.to_thread(refresh_db)
+        except Exception:
+            logger.exception("Database refresh failed, keeping the current generation.")
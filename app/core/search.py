@@ -0,0 +1,205 @@
+from sqlalchemy import Connection, TextClause, bindparam, text
+from typing import Iterable, List, Dict, Any
+import re
+
+# Full-text indexes over member and interest text. Members and interests are kept in sync with
+# the tables by triggers, so every write path (bulk upserts, syncs, refreshes) maintains them.
+#
+# Member names and constituencies use the trigram tokenizer, which also lets substring
+# `LIKE '%x%'` filters on them be answered from the index. Interest summaries and field values
+# use word tokens, with the values of all fields of an interest concatenated into one column.
+# Each index row shares its rowid with the row it indexes, so triggers update it by key.
+#
+# Field values are not indexed by triggers on `interestfield`: those would rebuild an
+# interest's row once per field written. `merge_to_db` instead calls `reindex_interests` once
+# per batch, for the interests whose fields it changed, and other writers of fields rebuild the
+# index (`rebuild_search_index`) when they finish.
+
+SEARCH_INDEX_DDL: List[str] = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS member_search
+    USING fts5(name, constituency, tokenize = 'trigram')
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS interest_search
+    USING fts5(summary, field_values, tokenize = 'unicode61 remove_diacritics 2')
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS member_search_insert AFTER INSERT ON member BEGIN
+        INSERT INTO member_search (rowid, name, constituency)
+        VALUES (new.id, new.name_display_as, new.membership_from);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS member_search_update AFTER UPDATE ON member BEGIN
+        DELETE FROM member_search WHERE rowid = old.id;
+        INSERT INTO member_search (rowid, name, constituency)
+        VALUES (new.id, new.name_display_as, new.membership_from);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS member_search_delete AFTER DELETE ON member BEGIN
+        DELETE FROM member_search WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS interest_search_insert AFTER INSERT ON interest BEGIN
+        INSERT INTO interest_search (rowid, summary, field_values)
+        VALUES (
+            new.id,
+            new.summary,
+            (SELECT group_concat(value, ' ') FROM interestfield WHERE interest_id = new.id)
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS interest_search_update AFTER UPDATE ON interest BEGIN
+        DELETE FROM interest_search WHERE rowid = old.id;
+        INSERT INTO interest_search (rowid, summary, field_values)
+        VALUES (
+            new.id,
+            new.summary,
+            (SELECT group_concat(value, ' ') FROM interestfield WHERE interest_id = new.id)
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS interest_search_delete AFTER DELETE ON interest BEGIN
+        DELETE FROM interest_search WHERE rowid = old.id;
+    END
+    """,
+]
+
+# triggers from earlier versions of the index
+DROP_OUTDATED_TRIGGERS: List[str] = [
+    f"DROP TRIGGER IF EXISTS interestfield_search_{event}"
+    for event in ("insert", "update", "delete")
+]
+
+REBUILD_SEARCH_INDEX: List[str] = [
+    "DELETE FROM member_search",
+    """
+    INSERT INTO member_search (rowid, name, constituency)
+    SELECT id, name_display_as, membership_from FROM member
+    """,
+    "DELETE FROM interest_search",
+    """
+    INSERT INTO interest_search (rowid, summary, field_values)
+    SELECT
+        interest.id,
+        interest.summary,
+        (SELECT group_concat(value, ' ') FROM interestfield WHERE interest_id = interest.id)
+    FROM interest
+    """,
+]
+
+
+def init_search_index(connection: Connection) -> None:
+    """
+    Create the full-text indexes and their triggers. Indexes added to an existing database are
+    filled from the rows already in it.
+    """
+    existing = set(
+        connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master "
+            "WHERE name IN ('member_search', 'interest_search')"
+        ).scalars()
+    )
+    for statement in [*DROP_OUTDATED_TRIGGERS, *SEARCH_INDEX_DDL]:
+        connection.exec_driver_sql(statement)
+    if existing != {"member_search", "interest_search"}:
+        rebuild_search_index(connection)
+
+
+def rebuild_search_index(connection: Connection) -> None:
+    """Refill the full-text indexes from the tables."""
+    for statement in REBUILD_SEARCH_INDEX:
+        connection.exec_driver_sql(statement)
+
+
+REINDEX_INTERESTS: List[TextClause] = [
+    text("DELETE FROM interest_search WHERE rowid IN :ids").bindparams(
+        bindparam("ids", expanding=True)
+    ),
+    text("""
+    INSERT INTO interest_search (rowid, summary, field_values)
+    SELECT
+        interest.id,
+        interest.summary,
+        (SELECT group_concat(value, ' ') FROM interestfield WHERE interest_id = interest.id)
+    FROM interest
+    WHERE interest.id IN :ids
+    """).bindparams(bindparam("ids", expanding=True)),
+]
+
+
+def reindex_interests(connection: Connection, interest_ids: Iterable[int]) -> None:
+    """Rebuild the index rows of the given interests, with the current values of their fields."""
+    ids = sorted(set(interest_ids))
+    if not ids:
+        return
+    for statement in REINDEX_INTERESTS:
+        connection.execute(statement, {"ids": ids})
+
+
+def match_expression(query: str, min_length: int = 1) -> str | None:
+    """
+    Turn free text into an FTS5 query matching rows containing every word, so user input cannot
+    inject query syntax. Words are matched as prefixes, and words shorter than `min_length` are
+    dropped (the trigram tokenizer cannot match fewer than 3 characters).
+    """
+    words = [word for word in re.findall(r"\w+", query) if len(word) >= min_length]
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+MEMBER_SEARCH = text("""
+    SELECT
+        'member' AS kind,
+        member.id AS id,
+        member.id AS member_id,
+        member.name_display_as AS member_name,
+        snippet(member_search, -1, '[', ']', '…', 12) AS snippet,
+        bm25(member_search, 2.0, 1.0) AS score
+    FROM member_search
+    JOIN member ON member.id = member_search.rowid
+    WHERE member_search MATCH :query
+    ORDER BY score
+    LIMIT :limit
+    """)
+
+INTEREST_SEARCH = text("""
+    SELECT
+        'interest' AS kind,
+        interest.id AS id,
+        interest.member_id AS member_id,
+        member.name_display_as AS member_name,
+        snippet(interest_search, -1, '[', ']', '…', 12) AS snippet,
+        bm25(interest_search, 2.0, 1.0) AS score
+    FROM interest_search
+    JOIN interest ON interest.id = interest_search.rowid
+    LEFT JOIN member ON member.id = interest.member_id
+    WHERE interest_search MATCH :query
+    ORDER BY score
+    LIMIT :limit
+    """)
+
+
+def search(connection: Connection, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    Members and interests matching `query`, best matches first. Scores are FTS5 bm25 ranks,
+    where lower is better.
+    """
+    matches: List[Dict[str, Any]] = []
+
+    for statement, expression in (
+        (MEMBER_SEARCH, match_expression(query, min_length=3)),
+        (INTEREST_SEARCH, match_expression(query)),
+    ):
+        if expression:
+            rows = connection.execute(statement, {"query": expression, "limit": limit})
+            matches.extend(dict(row) for row in rows.mappings())
+
+    matches.sort(key=lambda match: match["score"])
+    return matches[:limit]
@@ -0,0 +1,319 @@
+from app.models import MemberInterestTotal
+from app.core.config import settings
+from app.core.db import (
+    existing_generations,
+    generation_path,
+    init_db,
+    make_engine,
+    pinned_generation,
+    remove_database_files,
+)
+from app.core.aggregates import refresh_interest_totals
+from app.core.search import rebuild_search_index
+
+from sqlmodel import SQLModel
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Connection,
+    DateTime,
+    Engine,
+    Float,
+    Integer,
+    String,
+    Table,
+    TypeDecorator,
+    insert,
+    select,
+)
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+from logging import getLogger
+import argparse
+import json
+import logging
+import os
+import shutil
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc
+import pyarrow.parquet as pq
+
+logger = getLogger(__name__)
+logger.setLevel(settings.LOG_LEVEL.value)
+
+# Snapshots are directories named by the time they were taken, holding one Parquet (or Arrow
+# IPC) file per table and a manifest listing the files and their row counts. Strings that
+# repeat a lot, like category and field names, are stored dictionary encoded.
+
+SNAPSHOT_FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+FORMATS = ("parquet", "arrow")
+
+# rebuilt from the other tables when a snapshot is loaded
+DERIVED_TABLES = {MemberInterestTotal.__tablename__}
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def snapshot_tables() -> List[Table]:
+    return [
+        table
+        for table in SQLModel.metadata.sorted_tables
+        if table.name not in DERIVED_TABLES
+    ]
+
+
+def _arrow_type(column: Column[Any]) -> pa.DataType:
+    column_type = column.type
+    # e.g. sqlmodel's AutoString, which stores a String
+    if isinstance(column_type, TypeDecorator):
+        column_type = column_type.impl_instance
+    for sql_type, arrow_type in (
+        (Boolean, pa.bool_()),
+        (Integer, pa.int64()),
+        (Float, pa.float64()),
+        (DateTime, pa.timestamp("us")),
+        (String, pa.string()),
+    ):
+        if isinstance(column_type, sql_type):
+            return arrow_type
+    raise SnapshotError(f"No arrow type for {column.table.name}.{column.name}")
+
+
+def arrow_schema(table: Table) -> pa.Schema:
+    return pa.schema(
+        pa.field(column.name, _arrow_type(column), nullable=column.nullable)
+        for column in table.columns
+    )
+
+
+def read_table(connection: Connection, table: Table, batch_size: int) -> pa.Table:
+    """
+    The rows of `table` in primary key order, read from the database cursor a batch at a
+    time into arrow columns.
+    """
+    schema = arrow_schema(table)
+    result = connection.execution_options(yield_per=batch_size).execute(
+        select(table).order_by(*table.primary_key.columns)
+    )
+    batches = [
+        pa.RecordBatch.from_arrays(
+            [
+                pa.array(values, type=field.type)
+                for values, field in zip(zip(*rows), schema)
+            ],
+            schema=schema,
+        )
+        for rows in result.partitions()
+    ]
+    return pa.Table.from_batches(batches, schema=schema)
+
+
+def dictionary_encode(table: pa.Table) -> pa.Table:
+    """
+    Dictionary encode the string columns with at most `settings.SNAPSHOT_DICTIONARY_MAX_RATIO`
+    distinct values per row, e.g. names repeated across many rows but not free text.
+    """
+    for index, field in enumerate(table.schema):
+        if not pa.types.is_string(field.type) or not table.num_rows:
+            continue
+        column = table.column(index)
+        distinct = pc.count_distinct(column).as_py()
+        if distinct <= settings.SNAPSHOT_DICTIONARY_MAX_RATIO * table.num_rows:
+            encoded = column.dictionary_encode()
+            table = table.set_column(index, field.with_type(encoded.type), encoded)
+    return table
+
+
+def _write(table: pa.Table, path: Path, format: str) -> None:
+    if format == "parquet":
+        # the arrow schema is stored too, so dictionary columns are read back as such
+        pq.write_table(table, path, compression=settings.SNAPSHOT_COMPRESSION)
+    else:
+        options = pa.ipc.IpcWriteOptions(compression=settings.SNAPSHOT_COMPRESSION)
+        with pa.ipc.new_file(path, table.schema, options=options) as writer:
+            writer.write_table(table)
+
+
+def _read(path: Path, format: str) -> pa.Table:
+    if format == "parquet":
+        return pq.read_table(path)
+    with pa.ipc.open_file(path) as reader:
+        return reader.read_all()
+
+
+def write_snapshot(
+    directory: str | Path | None = None,
+    format: str | None = None,
+    bind: Engine | None = None,
+    batch_size: int = 5000,
+) -> Path:
+    """
+    Write every table to a new snapshot in `directory` (`settings.SNAPSHOT_DIR` by default),
+    from the live generation unless `bind` is given. The snapshot only appears under its
+    final name once complete. Returns its path.
+    """
+    format = format or settings.SNAPSHOT_FORMAT
+    if format not in FORMATS:
+        raise SnapshotError(f"Unknown snapshot format {format!r}")
+
+    created_at = datetime.now(timezone.utc)
+    version = created_at.strftime("%Y%m%dT%H%M%S%fZ")
+    directory = Path(directory or settings.SNAPSHOT_DIR)
+    partial = directory / f".{version}.partial"
+    partial.mkdir(parents=True)
+
+    manifest: Dict[str, Any] = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "version": version,
+        "created_at": created_at.isoformat(),
+        "format": format,
+        "tables": {},
+    }
+    try:
+        with ExitStack() as stack:
+            if bind is None:
+                bind = stack.enter_context(pinned_generation()).reader_engine
+            connection = stack.enter_context(bind.connect())
+            # one read transaction, so the tables are consistent with each other
+            connection.exec_driver_sql("BEGIN")
+
+            for table in snapshot_tables():
+                arrow = dictionary_encode(read_table(connection, table, batch_size))
+                file_name = f"{table.name}.{format}"
+                _write(arrow, partial / file_name, format)
+                manifest["tables"][table.name] = {
+                    "file": file_name,
+                    "rows": arrow.num_rows,
+                    "dictionary_columns": [
+                        field.name
+                        for field in arrow.schema
+                        if pa.types.is_dictionary(field.type)
+                    ],
+                }
+
+        (partial / MANIFEST).write_text(json.dumps(manifest, indent=2))
+        snapshot = directory / version
+        partial.rename(snapshot)
+    except BaseException:
+        shutil.rmtree(partial, ignore_errors=True)
+        raise
+
+    logger.info(f"Wrote snapshot {version} to {snapshot}.")
+    return snapshot
+
+
+def read_manifest(snapshot: str | Path) -> Dict[str, Any]:
+    manifest = json.loads((Path(snapshot) / MANIFEST).read_text())
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        raise SnapshotError(
+            f"Unsupported snapshot format version {manifest.get('format_version')}"
+        )
+    return manifest
+
+
+def list_snapshots(directory: str | Path | None = None) -> List[Dict[str, Any]]:
+    """
+    Manifests of the complete snapshots in `directory`, oldest first.
+    """
+    directory = Path(directory or settings.SNAPSHOT_DIR)
+    if not directory.exists():
+        return []
+    return [
+        read_manifest(path)
+        for path in sorted(directory.iterdir())
+        if not path.name.startswith(".") and (path / MANIFEST).exists()
+    ]
+
+
+def load_snapshot(
+    snapshot: str | Path, path: str | Path | None = None, batch_size: int = 5000
+) -> Dict[str, int]:
+    """
+    Rebuild the database at `path` from a snapshot, without fetching anything from the
+    upstream apis. By default the snapshot is loaded as a new database generation, after the
+    latest one, so it is the generation the app serves when it next starts and the older
+    ones are removed as stale. The database is built next to `path` and only replaces it once
+    complete, so the app should not be serving from `path` at the time. Returns the number of
+    rows loaded into each table.
+    """
+    snapshot = Path(snapshot)
+    manifest = read_manifest(snapshot)
+    path = Path(path or generation_path(max(existing_generations(), default=-1) + 1))
+    building = path.with_name(f"{path.name}.loading")
+    remove_database_files(building)
+
+    loaded: Dict[str, int] = {}
+    engine = make_engine(building)
+    try:
+        init_db(engine)
+        with engine.begin() as connection:
+            for table in snapshot_tables():
+                entry = manifest["tables"].get(table.name)
+                if entry is None:
+                    logger.warning(
+                        f"Snapshot has no {table.name} table, leaving it empty."
+                    )
+                    continue
+
+                arrow = _read(snapshot / entry["file"], manifest["format"])
+                if arrow.num_rows != entry["rows"]:
+                    raise SnapshotError(
+                        f"{entry['file']} has {arrow.num_rows} rows, "
+                        f"the manifest lists {entry['rows']}"
+                    )
+                # columns added since the snapshot was taken are left to their defaults
+                arrow = arrow.select(
+                    [name for name in arrow.column_names if name in table.columns]
+                )
+                for batch in arrow.to_batches(max_chunksize=batch_size):
+                    connection.execute(insert(table), batch.to_pylist())
+                loaded[table.name] = arrow.num_rows
+            # field values are not indexed as they are inserted
+            rebuild_search_index(connection)
+
+        refresh_interest_totals(engine)
+        with engine.connect() as connection:
+            connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    except BaseException:
+        engine.dispose()
+        remove_database_files(building)
+        raise
+
+    engine.dispose()
+    remove_database_files(path)
+    os.replace(building, path)
+    remove_database_files(building)
+    logger.info(f"Loaded snapshot {manifest['version']} into {path}.")
+    return loaded
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Write the database to a columnar snapshot, or rebuild it from one."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    write = commands.add_parser("write", help="Snapshot the live database.")
+    write.add_argument("--dir", help="Directory to write the snapshot to.")
+    write.add_argument("--format", choices=FORMATS, help="File format of the tables.")
+    load = commands.add_parser("load", help="Rebuild the database from a snapshot.")
+    load.add_argument("snapshot", help="Directory of the snapshot to load.")
+    load.add_argument(
+        "--db", help="Path of the database to rebuild, a new generation by default."
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=settings.LOG_LEVEL.value,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    if args.command == "write":
+        write_snapshot(args.dir, args.format)
+    else:
+        load_snapshot(args.snapshot, args.db)
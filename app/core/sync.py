@@ -0,0 +1,198 @@
+from app.models import (
+    Interest,
+    SyncWatermark,
+    member_and_party_rows,
+    interest_rows,
+    parse_in_processes,
+)
+from app.client.fetch import (
+    fetch_all_active_members,
+    fetch_all_interests,
+    fetch_all_active_members_async,
+    fetch_all_interests_async,
+    iterate_async,
+)
+from app.client import make_client, make_async_client
+from app.core.config import settings
+from app.core.db import (
+    UpsertStats,
+    bump_data_version,
+    get_engine,
+    init_db,
+    merge_to_db,
+)
+from app.core.aggregates import refresh_interest_totals
+import app.core.metrics as metrics
+
+from sqlmodel import Session, select, func
+from sqlalchemy import Engine
+from typing import AsyncIterator, Callable, Iterable, Iterator, Dict, Any, Tuple
+from datetime import date, datetime
+from logging import getLogger
+import argparse
+import logging
+
+logger = getLogger(__name__)
+logger.setLevel(settings.LOG_LEVEL.value)
+
+MEMBERS_SOURCE = "members"
+INTERESTS_SOURCE = "interests"
+
+member_client = make_client(settings.MEMBERS_API_URL)
+interest_client = make_client(settings.INTERESTS_API_URL)
+
+
+async def _fetch_active_members_async() -> AsyncIterator[Dict[str, Any]]:
+    async with make_async_client(settings.MEMBERS_API_URL) as client:
+        async for item in fetch_all_active_members_async(
+            client, logger=logger, concurrency=settings.FETCH_CONCURRENCY
+        ):
+            yield item
+
+
+async def _fetch_interests_async(
+    published_from: date | None,
+) -> AsyncIterator[Dict[str, Any]]:
+    async with make_async_client(settings.INTERESTS_API_URL) as client:
+        async for item in fetch_all_interests_async(
+            client,
+            logger=logger,
+            concurrency=settings.FETCH_CONCURRENCY,
+            page_size=settings.INTERESTS_PAGE_SIZE,
+            published_from=published_from,
+        ):
+            yield item
+
+
+def fetch_active_members() -> Iterable[Dict[str, Any]]:
+    if settings.FETCH_ASYNC:
+        return iterate_async(_fetch_active_members_async())
+    return fetch_all_active_members(client=member_client, logger=logger)
+
+
+def fetch_interests(published_from: date | None = None) -> Iterable[Dict[str, Any]]:
+    if settings.FETCH_ASYNC:
+        return iterate_async(_fetch_interests_async(published_from))
+    return fetch_all_interests(
+        client=interest_client,
+        logger=logger,
+        published_from=published_from,
+        page_size=settings.INTERESTS_PAGE_SIZE,
+    )
+
+
+def parse_items(
+    source: str,
+    parse: Callable[[Dict[str, Any]], Tuple[Any, ...]],
+    items: Iterable[Dict[str, Any]],
+) -> Iterator[Tuple[Any, ...]]:
+    parsed = (
+        parse_in_processes(
+            parse, items, settings.PARSE_PROCESSES, settings.PARSE_BATCH_SIZE
+        )
+        if settings.PARSE_PROCESSES > 1
+        else map(parse, items)
+    )
+    for rows in parsed:
+        metrics.items_parsed.inc(source=source)
+        yield rows
+
+
+def get_watermark(source: str, bind: Engine | None = None) -> SyncWatermark | None:
+    with Session(bind or get_engine()) as session:
+        return session.get(SyncWatermark, source)
+
+
+def record_watermark(source: str, bind: Engine | None = None) -> SyncWatermark:
+    """
+    Mark `source` as synced now. For interests the highest published and registration dates
+    held in the database are stored, so the next sync can ask the upstream for newer ones only.
+    """
+    with Session(bind or get_engine()) as session:
+        watermark = SyncWatermark(source=source, last_synced_at=datetime.now())
+        if source == INTERESTS_SOURCE:
+            watermark.max_published_date, watermark.max_registration_date = (
+                session.exec(
+                    select(
+                        func.max(Interest.published_date),
+                        func.max(Interest.registration_date),
+                    )
+                ).one()
+            )
+        watermark = session.merge(watermark)
+        session.commit()
+        session.refresh(watermark)
+        return watermark
+
+
+def sync_db(bind: Engine | None = None, full: bool = False) -> Dict[str, UpsertStats]:
+    """
+    Bring the database up to date with the upstream apis. Active members are always fetched in
+    full (there are only a few hundred), while interests are only requested from the day of the
+    last synced publication onwards, unless `full` is set or no sync has completed yet. Only rows
+    whose values changed are written.
+
+    With `settings.FETCH_ASYNC` the pages are fetched concurrently on a private event loop, so
+    this must not be called from a thread that is running one.
+    """
+    bind = bind or get_engine()
+    init_db(bind)
+
+    # replaying only serves the pages of full syncs, stored without `PublishedFrom`
+    full = full or settings.UPSTREAM_STORE == "replay"
+    watermark = None if full else get_watermark(INTERESTS_SOURCE, bind)
+    published_from: date | None = None
+    if watermark and watermark.max_published_date:
+        published_from = watermark.max_published_date.date()
+        logger.info(f"Syncing interests published since {published_from}.")
+    else:
+        logger.info("Syncing all interests.")
+
+    # items are fetched, parsed and written in batches, so each phase times all three
+    with metrics.ingest_phase_duration.time(phase=MEMBERS_SOURCE):
+        stats = merge_to_db(
+            parse_items(MEMBERS_SOURCE, member_and_party_rows, fetch_active_members()),
+            bind=bind,
+        )
+    record_watermark(MEMBERS_SOURCE, bind)
+
+    with metrics.ingest_phase_duration.time(phase=INTERESTS_SOURCE):
+        stats.update(
+            merge_to_db(
+                parse_items(
+                    INTERESTS_SOURCE,
+                    interest_rows,
+                    fetch_interests(published_from),
+                ),
+                bind=bind,
+            )
+        )
+    with metrics.ingest_phase_duration.time(phase="interest_totals"):
+        refresh_interest_totals(bind)
+    record_watermark(INTERESTS_SOURCE, bind)
+    bump_data_version(bind)
+
+    return stats
+
+
+def setup_db(bind: Engine | None = None) -> Dict[str, UpsertStats]:
+    """
+    Create the tables and load every active member and interest from the upstream apis.
+    """
+    return sync_db(bind, full=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Sync the database with the parliament apis, e.g. hourly from cron."
+    )
+    parser.add_argument(
+        "--full", action="store_true", help="Reload every interest, not just new ones."
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=settings.LOG_LEVEL.value,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    sync_db(full=args.full)
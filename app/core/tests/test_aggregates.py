@@ -0,0 +1,50 @@
+from pathlib import Path
+from datetime import datetime
+import pytest
+from sqlalchemy import Engine
+from sqlmodel import Session, create_engine, select
+
+from app.core.aggregates import member_interest_totals, refresh_interest_totals
+from app.core.db import init_db
+from app.models import Interest, Member, MonetaryValueField
+
+# values whose running sums differ by 41539.65000000001 between the first and last day
+VALUES = [25127.34, 16693.63, 19268.83, 5577.19]
+
+
+@pytest.fixture
+def engine(tmp_path: Path) -> Engine:
+    engine = create_engine(f"sqlite:///{tmp_path / 'members.db'}")
+    init_db(engine)
+    with Session(engine) as session:
+        session.add(Member(id=1, name_display_as="Member"))
+        for day, value in enumerate(VALUES, start=1):
+            session.add(
+                Interest(id=day, member_id=1, published_date=datetime(2025, 1, day))
+            )
+            session.add(MonetaryValueField(id=day, interest_id=day, value=value))
+        session.commit()
+    refresh_interest_totals(engine)
+    return engine
+
+
+@pytest.mark.parametrize(
+    "published_after, published_before, expected",
+    [
+        (None, None, 66666.99),
+        (datetime(2025, 1, 2), None, 41539.65),
+        (datetime(2025, 1, 2), datetime(2025, 1, 3), 35962.46),
+        (None, datetime(2025, 1, 3), 61089.8),
+    ],
+)
+def test_range_totals_are_whole_pence(
+    engine: Engine,
+    published_after: datetime | None,
+    published_before: datetime | None,
+    expected: float,
+):
+    total_value, _ = member_interest_totals(published_after, published_before)
+    with Session(engine) as session:
+        total = session.exec(select(total_value).where(Member.id == 1)).one()
+
+    assert total == expected
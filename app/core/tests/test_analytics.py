@@ -0,0 +1,207 @@
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+
+import app.core.analytics as analytics_module
+import app.core.db as db
+import app.core.sync as sync
+from app.api_server import app
+from app.core.aggregates import refresh_interest_totals
+from app.core.cache import response_cache
+from app.core.config import settings
+from app.core.pagination import encode_cursor
+from app.models import interest_rows, member_and_party_rows
+from benchmarks import synthetic
+
+pytest.importorskip("numpy")
+
+from app.core.analytics import current_analytics, load_analytics  # noqa: E402
+
+SEARCHES = [
+    {},
+    {"take": "100"},
+    {"skip": "3", "take": "5"},
+    {"party": "lab", "take": "100"},
+    {"party": "conservative"},
+    {"house": "1", "take": "100"},
+    {"member_name": "abbott"},
+    {"member_name": "an", "party": "lab", "house": "1"},
+    {"published_after": "2025-07-12", "take": "100"},
+    {"published_before": "2025-07-11", "take": "100"},
+    {"published_after": "2025-07-11", "published_before": "2025-07-11"},
+    {"published_after": "2025-07-11T12:00:00", "take": "100"},
+    {"published_before": "2025-07-13T23:59:59", "take": "100"},
+    {"published_after": "2030-01-01"},
+    {"cursor": encode_cursor(0.0, 4000), "take": "100"},
+    {"cursor": encode_cursor(1396.0, 0), "take": "3"},
+]
+
+
+@pytest.fixture
+def analytics(live_db: db.DatabaseGeneration, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", False)
+    load_analytics(live_db)
+    assert current_analytics() is not None
+
+
+@pytest.mark.parametrize("params", SEARCHES)
+def test_analytics_match_the_database(
+    analytics: None, monkeypatch: pytest.MonkeyPatch, params: Dict[str, Any]
+):
+    client = TestClient(app)
+    from_engine = client.get("/interests/search", params=params)
+
+    monkeypatch.setattr(settings, "ANALYTICS_ENGINE", False)
+    assert current_analytics() is None
+    from_database = client.get("/interests/search", params=params)
+
+    assert from_engine.status_code == 200
+    assert from_engine.json() == from_database.json()
+    assert from_engine.headers.get("x-next-cursor") == from_database.headers.get(
+        "x-next-cursor"
+    )
+
+
+def test_analytics_only_serve_their_generation(
+    analytics: None, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(
+        db, "_generation", db.DatabaseGeneration(1, db.generation_path(1))
+    )
+
+    assert current_analytics() is None
+
+
+def test_analytics_are_rebuilt_after_a_sync_in_place(
+    analytics: None, live_db: db.DatabaseGeneration
+):
+    client = TestClient(app)
+    params = {"take": "100"}
+    before = client.get("/interests/search", params=params).json()
+    with live_db.engine.begin() as connection:
+        connection.exec_driver_sql(
+            "UPDATE monetaryvaluefield SET value = value + 1000000 "
+            "WHERE interest_id = (SELECT min(interest_id) FROM monetaryvaluefield)"
+        )
+    db.bump_data_version(live_db.engine)
+
+    # served by the database until the engine has caught up
+    assert current_analytics() is None
+    from_database = client.get("/interests/search", params=params).json()
+    assert from_database != before
+
+    analytics_module._rebuild_thread.join()
+    assert current_analytics() is not None
+    assert client.get("/interests/search", params=params).json() == from_database
+
+
+def test_analytics_are_not_used_for_dates_with_times(
+    live_db: db.DatabaseGeneration, monkeypatch: pytest.MonkeyPatch
+):
+    with live_db.engine.begin() as connection:
+        connection.exec_driver_sql(
+            "UPDATE interest SET published_date = '2025-07-11 09:30:00.000000' "
+            "WHERE id = (SELECT min(id) FROM interest)"
+        )
+
+    load_analytics(live_db)
+
+    assert current_analytics() is None
+
+
+# the synthetic dataset at the size of the real data, whose sums of many values are where
+# floating point differences between the engine and the database would show
+SYNTHETIC_SEARCHES = [
+    {"take": "100"},
+    {"published_after": "2025-03-01", "take": "100"},
+    {"published_before": "2025-01-31", "take": "100"},
+    {"published_after": "2024-11-01", "published_before": "2025-06-30", "take": "100"},
+    {"published_after": "2025-08-01", "party": "labour", "take": "100"},
+]
+
+
+@pytest.fixture(scope="module")
+def synthetic_db(
+    tmp_path_factory: pytest.TempPathFactory,
+) -> Iterator[db.DatabaseGeneration]:
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        path = Path(tmp_path_factory.mktemp("synthetic")) / "members.db"
+        monkeypatch.setattr(settings, "SQLITE_DB_PATH", str(path))
+        monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", False)
+        generation = db.DatabaseGeneration(0, db.generation_path(0))
+        monkeypatch.setattr(db, "_generation", generation)
+        monkeypatch.setattr(db, "engine", generation.engine)
+        response_cache.clear()
+
+        db.init_db(generation.engine)
+        db.merge_to_db(
+            map(member_and_party_rows, synthetic.members()), bind=generation.engine
+        )
+        db.merge_to_db(
+            map(interest_rows, synthetic.interests()), bind=generation.engine
+        )
+        refresh_interest_totals(generation.engine)
+        load_analytics(generation)
+        assert current_analytics() is not None
+        yield generation
+        asyncio.run(generation.dispose_async_engine())
+
+
+def search_pages(client: TestClient, params: Dict[str, Any]) -> List[Any]:
+    """
+    Every page of a search, following the `X-Next-Cursor` header.
+    """
+    pages = []
+    cursor = None
+    while True:
+        response = client.get(
+            "/interests/search",
+            params={**params, **({"cursor": cursor} if cursor else {})},
+        )
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return pages
+
+
+@pytest.mark.parametrize("params", SYNTHETIC_SEARCHES)
+def test_analytics_match_the_database_on_synthetic_data(
+    synthetic_db: db.DatabaseGeneration,
+    monkeypatch: pytest.MonkeyPatch,
+    params: Dict[str, Any],
+):
+    client = TestClient(app)
+    from_engine = search_pages(client, params)
+
+    monkeypatch.setattr(settings, "ANALYTICS_ENGINE", False)
+    assert search_pages(client, params) == from_engine
+
+
+def test_cursors_carry_over_between_the_engine_and_the_database(
+    synthetic_db: db.DatabaseGeneration, monkeypatch: pytest.MonkeyPatch
+):
+    params = {"published_after": "2024-11-01", "take": "50"}
+    client = TestClient(app)
+    expected = [row for page in search_pages(client, params) for row in page]
+
+    # e.g. while the engine is rebuilt, pages are alternately served by it and the database
+    rows = []
+    cursor = None
+    for page in range(len(expected)):
+        monkeypatch.setattr(settings, "ANALYTICS_ENGINE", page % 2 == 0)
+        response = client.get(
+            "/interests/search",
+            params={**params, **({"cursor": cursor} if cursor else {})},
+        )
+        rows.extend(response.json())
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+
+    assert [row["member"]["id"] for row in rows] == [
+        row["member"]["id"] for row in expected
+    ]
+    assert rows == expected
@@ -0,0 +1,237 @@
+import asyncio
+from copy import deepcopy
+from functools import partial
+from typing import List
+import pytest
+from fastapi import Request
+from fastapi.testclient import TestClient
+
+import app.core.db as db
+import app.core.sync as sync
+from app.api_server import app
+from app.core.cache import (
+    CachedResponse,
+    ResponseCache,
+    response_cache,
+    cache_key,
+    cached_response,
+)
+from app.core.config import settings
+from app.conftest import record_statements, served_members_data
+from app.client.tests.test_fetch import mock_get
+from datetime import datetime
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_response_cache_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2, max_bytes=1024, ttl_seconds=60)
+    cache.set("a", CachedResponse(b"1"))
+    cache.set("b", CachedResponse(b"2"))
+    assert cache.get("a") == CachedResponse(b"1")
+
+    cache.set("c", CachedResponse(b"3", {"X-Next-Cursor": "c"}))
+
+    assert cache.get("b") is None
+    assert cache.get("a") == CachedResponse(b"1")
+    assert cache.get("c") == CachedResponse(b"3", {"X-Next-Cursor": "c"})
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_response_cache_limits_bytes():
+    cache = ResponseCache(max_entries=10, max_bytes=8, ttl_seconds=60)
+    cache.set("a", CachedResponse(b"1234"))
+    cache.set("b", CachedResponse(b"5678"))
+    cache.set("c", CachedResponse(b"9"))
+    cache.set("too large", CachedResponse(b"123456789"))
+
+    assert cache.get("a") is None
+    assert cache.get("too large") is None
+    assert cache.size_bytes == 5
+    assert len(cache) == 2
+
+
+def test_response_cache_expires_entries():
+    clock = Clock()
+    cache = ResponseCache(max_entries=10, max_bytes=1024, ttl_seconds=60, clock=clock)
+    cache.set("a", CachedResponse(b"1"))
+
+    clock.now = 59
+    assert cache.get("a") == CachedResponse(b"1")
+    clock.now = 60
+    assert cache.get("a") is None
+    assert cache.size_bytes == 0
+
+
+def test_cache_key_normalizes_parameters():
+    assert cache_key("route", b=1, a=datetime(2025, 1, 1)) == cache_key(
+        "route", a=datetime(2025, 1, 1), b=1
+    )
+    assert cache_key("route", a=1) != cache_key("other", a=1)
+
+
+def test_repeated_requests_are_served_from_cache(live_db: db.DatabaseGeneration):
+    client = TestClient(app)
+    with record_statements(live_db) as statements:
+        first = client.get("/interests/search", params={"party": "lab", "take": "5"})
+        queries = len(statements)
+        second = client.get("/interests/search", params={"party": "lab", "take": 5})
+
+    assert queries > 0
+    assert len(statements) == queries
+    assert second.content == first.content
+
+
+def test_refresh_invalidates_cached_responses(
+    live_db: db.DatabaseGeneration, monkeypatch: pytest.MonkeyPatch
+):
+    client = TestClient(app)
+    client.get("/members/search", params={"skip": 0, "take": 5})
+    assert len(response_cache) == 1
+
+    generation = db.DatabaseGeneration(1, db.generation_path(1))
+    monkeypatch.setattr(live_db, "retire", lambda: None)
+    db.swap_generation(generation)
+
+    assert len(response_cache) == 0
+
+
+def test_sync_in_place_invalidates_cached_responses(live_db: db.DatabaseGeneration):
+    client = TestClient(app)
+
+    def display_name() -> str:
+        members = client.get("/members/search", params={"name": "abbott"}).json()
+        return next(member for member in members if member["id"] == 172)[
+            "name_display_as"
+        ]
+
+    assert display_name() == "Ms Diane Abbott"
+
+    renamed = deepcopy(served_members_data)
+    for item in renamed["items"]:
+        if item["value"]["id"] == 172:
+            item["value"]["nameDisplayAs"] = "Diane Abbott"
+    sync.member_client.get.side_effect = partial(mock_get, renamed)
+    sync.sync_db()
+
+    assert display_name() == "Diane Abbott"
+
+
+def test_conditional_requests_are_not_modified(live_db: db.DatabaseGeneration):
+    client = TestClient(app)
+    params = {"member_name": "abbott"}
+    first = client.get("/interests/search", params=params)
+    assert first.status_code == 200
+    assert first.headers["etag"].startswith('W/"')
+    assert first.headers["cache-control"] == "no-cache"
+
+    response_cache.clear()
+    with record_statements(live_db) as statements:
+        by_etag = client.get(
+            "/interests/search",
+            params=params,
+            headers={"If-None-Match": first.headers["etag"]},
+        )
+        by_date = client.get(
+            "/interests/search",
+            params=params,
+            headers={"If-Modified-Since": first.headers["last-modified"]},
+        )
+
+    assert (by_etag.status_code, by_date.status_code) == (304, 304)
+    assert by_etag.content == b""
+    assert by_etag.headers["etag"] == first.headers["etag"]
+    assert statements == []
+
+    other_query = client.get(
+        "/interests/search",
+        params={"member_name": "smith"},
+        headers={"If-None-Match": first.headers["etag"]},
+    )
+    stale = client.get(
+        "/interests/search",
+        params=params,
+        headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"},
+    )
+    assert (other_query.status_code, stale.status_code) == (200, 200)
+
+
+def test_etag_changes_with_generation(
+    live_db: db.DatabaseGeneration, monkeypatch: pytest.MonkeyPatch
+):
+    client = TestClient(app)
+    etag = client.get("/party/search", params={"party_id": 1}).headers["etag"]
+
+    monkeypatch.setattr(live_db, "number", 1)
+
+    response = client.get(
+        "/party/search", params={"party_id": 1}, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_etag_changes_with_sync_in_place(live_db: db.DatabaseGeneration):
+    client = TestClient(app)
+    first = client.get("/party/search", params={"party_id": 1})
+
+    sync.sync_db()
+
+    response = client.get(
+        "/party/search",
+        params={"party_id": 1},
+        headers={"If-None-Match": first.headers["etag"]},
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] != first.headers["etag"]
+
+
+def test_responses_are_cached_under_the_generation_they_are_read_from(
+    live_db: db.DatabaseGeneration, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(live_db, "retire", lambda: None)
+    generation = db.DatabaseGeneration(1, db.generation_path(1))
+    request = Request({"type": "http", "method": "GET", "headers": []})
+
+    async def respond_across_swap() -> None:
+        async with db.session_runner() as runner:
+            # swapped in after the request pinned the older generation
+            db.swap_generation(generation)
+            await cached_response(request, cache_key("route"), int, runner, lambda _: 1)
+
+    asyncio.run(respond_across_swap())
+
+    version = live_db.data_version().version
+    assert response_cache.get((*cache_key("route"), 0, version)) is not None
+    assert response_cache.get((*cache_key("route"), 1, version)) is None
+    generation.engine.dispose()
+
+
+def test_data_version_is_read_off_the_event_loop(
+    live_db: db.DatabaseGeneration, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(settings, "DATA_VERSION_CHECK_SECONDS", 0.0)
+    read_data_version = db.read_data_version
+    on_event_loop: List[bool] = []
+
+    def record(*args: object) -> db.DataVersionValue:
+        try:
+            asyncio.get_running_loop()
+            on_event_loop.append(True)
+        except RuntimeError:
+            on_event_loop.append(False)
+        return read_data_version(*args)  # type: ignore[arg-type]
+
+    monkeypatch.setattr(db, "read_data_version", record)
+    client = TestClient(app)
+    assert client.get("/interests/search", params={"take": 5}).status_code == 200
+    assert client.get("/party/search", params={"party_id": 1}).status_code == 200
+
+    assert on_event_loop
+    assert not any(on_event_loop)
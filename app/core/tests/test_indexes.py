@@ -0,0 +1,142 @@
+from pathlib import Path
+from datetime import datetime
+from typing import Any, List
+import pytest
+from sqlalchemy import Engine, inspect, text
+from sqlmodel import SQLModel, create_engine, select, col, func
+
+from app.core.db import init_db
+from app.models import Member, Party, Interest, InterestField, MonetaryValueField
+
+
+@pytest.fixture
+def engine(tmp_path: Path) -> Engine:
+    engine = create_engine(f"sqlite:///{tmp_path / 'members.db'}")
+    init_db(engine)
+    return engine
+
+
+def query_plan(engine: Engine, statement: Any) -> List[str]:
+    sql = statement.compile(engine, compile_kwargs={"literal_binds": True})
+    with engine.connect() as connection:
+        return [
+            row.detail
+            for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")
+        ]
+
+
+def uses_index(plan: List[str], table: str, index: str) -> bool:
+    return any(
+        detail.startswith(f"SEARCH {table} USING") and index in detail
+        for detail in plan
+    )
+
+
+def test_member_interests_in_date_range_use_composite_index(engine: Engine):
+    statement = select(Interest).where(
+        col(Interest.member_id) == 172,
+        col(Interest.published_date) >= datetime(2025, 1, 1),
+        col(Interest.published_date) <= datetime(2025, 6, 30),
+    )
+
+    plan = query_plan(engine, statement)
+
+    assert uses_index(plan, "interest", "ix_interest_member_id_published_date")
+
+
+def test_interest_totals_join_uses_indexes(engine: Engine):
+    total = func.coalesce(func.sum(MonetaryValueField.value), 0).label("total")
+    statement = (
+        select(Member, total)
+        .join(Party)
+        .join(Interest, col(Interest.member_id) == col(Member.id), isouter=True)
+        .join(
+            MonetaryValueField,
+            col(MonetaryValueField.interest_id) == col(Interest.id),
+            isouter=True,
+        )
+        .where(col(Member.house) == 1)
+        .group_by(col(Member.id))
+    )
+
+    plan = query_plan(engine, statement)
+
+    assert uses_index(plan, "interest", "ix_interest_member_id_published_date")
+    assert uses_index(plan, "monetaryvaluefield", "ix_monetaryvaluefield_interest_id")
+
+
+@pytest.mark.parametrize(
+    "statement, table, index",
+    [
+        (
+            select(Member).where(col(Member.party_id) == 8),
+            "member",
+            "ix_member_party_id",
+        ),
+        (select(Member).where(col(Member.house) == 2), "member", "ix_member_house"),
+        (
+            select(Interest).where(col(Interest.parent_id) == 12880),
+            "interest",
+            "ix_interest_parent_id",
+        ),
+        (
+            select(Interest).where(
+                col(Interest.published_date) >= datetime(2025, 1, 1)
+            ),
+            "interest",
+            "ix_interest_published_date",
+        ),
+        (
+            select(InterestField).where(col(InterestField.interest_id) == 12880),
+            "interestfield",
+            "ix_interestfield_interest_id_name",
+        ),
+    ],
+)
+def test_filters_use_indexes(engine: Engine, statement: Any, table: str, index: str):
+    assert uses_index(query_plan(engine, statement), table, index)
+
+
+def test_init_db_adds_missing_indexes(engine: Engine):
+    declared = {
+        index.name
+        for table in SQLModel.metadata.sorted_tables
+        for index in table.indexes
+    }
+    with engine.begin() as connection:
+        for name in declared:
+            connection.execute(text(f"DROP INDEX {name}"))
+
+    init_db(engine)
+
+    inspector = inspect(engine)
+    existing = {
+        index["name"]
+        for table in SQLModel.metadata.sorted_tables
+        for index in inspector.get_indexes(table.name)
+    }
+    assert declared <= existing
+
+
+def test_unique_index_migration_keeps_rows_with_null_keys(engine: Engine):
+    with engine.begin() as connection:
+        connection.execute(text("DROP INDEX ix_interestfield_interest_id_name"))
+        connection.execute(
+            text(
+                "INSERT INTO interestfield (id, interest_id, name, value) VALUES "
+                "(1, 10, NULL, 'a'), (2, 10, NULL, 'b'), "
+                "(3, 10, 'Donor', 'old'), (4, 10, 'Donor', 'new')"
+            )
+        )
+
+    init_db(engine)
+
+    with engine.connect() as connection:
+        rows = connection.execute(
+            text("SELECT id, name, value FROM interestfield ORDER BY id")
+        ).all()
+    assert [tuple(row) for row in rows] == [
+        (1, None, "a"),
+        (2, None, "b"),
+        (4, "Donor", "new"),
+    ]
@@ -0,0 +1,142 @@
+import json
+from pathlib import Path
+import pytest
+from sqlalchemy import Engine
+from sqlmodel import Session, create_engine, select, func, text
+
+from app.core.db import init_db, merge_to_db
+from app.models import (
+    Member,
+    Party,
+    Interest,
+    InterestCategory,
+    InterestField,
+    MonetaryValueField,
+    member_and_party_from_dict,
+    interest_from_dict,
+    member_and_party_rows,
+    interest_rows,
+)
+
+members_data = json.loads(
+    Path("app/client/mock_responses/mock_member_response.json").read_text()
+)
+interests_data = json.loads(
+    Path("app/client/mock_responses/mock_interest_response.json").read_text()
+)
+
+
+@pytest.fixture
+def engine(tmp_path: Path) -> Engine:
+    engine = create_engine(f"sqlite:///{tmp_path / 'members.db'}")
+    init_db(engine)
+    return engine
+
+
+def count(engine: Engine, model: type) -> int:
+    with Session(engine) as session:
+        return session.exec(select(func.count()).select_from(model)).one()
+
+
+def test_merge_to_db(engine: Engine):
+    member_stats = merge_to_db(
+        map(member_and_party_from_dict, members_data["items"]), bind=engine
+    )
+    interest_stats = merge_to_db(
+        map(interest_from_dict, interests_data["items"]), batch_size=7, bind=engine
+    )
+
+    assert count(engine, Member) == len(
+        {item["value"]["id"] for item in members_data["items"]}
+    )
+    assert count(engine, Party) == len(
+        {item["value"]["latestParty"]["id"] for item in members_data["items"]}
+    )
+    assert count(engine, Interest) == len(interests_data["items"])
+    assert count(engine, InterestCategory) == len(
+        {item["category"]["id"] for item in interests_data["items"]}
+    )
+    assert member_stats["member"].rows == count(engine, Member)
+    assert interest_stats["interest"].rows == len(interests_data["items"])
+
+    with Session(engine) as session:
+        interest = session.get(Interest, interests_data["items"][0]["id"])
+        assert interest is not None
+        assert interest.monetary_value_field is not None
+        assert interest.monetary_value_field.value == 1396.00
+        assert len(interest.fields) == len(interests_data["items"][0]["fields"]) - 1
+
+
+def dump(engine: Engine) -> dict:
+    with engine.connect() as connection:
+        return {
+            table: connection.execute(
+                text(f"SELECT * FROM {table} ORDER BY 2, 3")
+            ).all()
+            for table in (
+                "party",
+                "member",
+                "interestcategory",
+                "interest",
+                "interestfield",
+                "monetaryvaluefield",
+            )
+        }
+
+
+def test_rows_load_the_same_as_models(engine: Engine, tmp_path: Path):
+    rows_engine = create_engine(f"sqlite:///{tmp_path / 'rows.db'}")
+    init_db(rows_engine)
+
+    merge_to_db(map(member_and_party_from_dict, members_data["items"]), bind=engine)
+    merge_to_db(map(interest_from_dict, interests_data["items"]), bind=engine)
+    merge_to_db(map(member_and_party_rows, members_data["items"]), bind=rows_engine)
+    stats = merge_to_db(map(interest_rows, interests_data["items"]), bind=rows_engine)
+
+    assert stats["interest"].rows == len(interests_data["items"])
+    assert dump(rows_engine) == dump(engine)
+
+
+def test_merge_to_db_is_idempotent(engine: Engine):
+    for _ in range(2):
+        merge_to_db(map(interest_from_dict, interests_data["items"]), bind=engine)
+
+    counts = (
+        count(engine, Interest),
+        count(engine, InterestField),
+        count(engine, MonetaryValueField),
+    )
+
+    changed = json.loads(json.dumps(interests_data["items"]))
+    changed[0]["summary"] = "Updated summary"
+    merge_to_db(map(interest_from_dict, changed), bind=engine)
+
+    assert (
+        count(engine, Interest),
+        count(engine, InterestField),
+        count(engine, MonetaryValueField),
+    ) == counts
+    with Session(engine) as session:
+        interest = session.get(Interest, changed[0]["id"])
+        assert interest is not None
+        assert interest.summary == "Updated summary"
+
+
+def test_init_db_adds_missing_unique_indexes(tmp_path: Path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'members.db'}")
+    init_db(engine)
+    with engine.begin() as connection:
+        connection.execute(text("DROP INDEX ix_monetaryvaluefield_interest_id"))
+        for value in (1.0, 2.0):
+            connection.execute(
+                text(
+                    "INSERT INTO monetaryvaluefield (interest_id, value) VALUES (1, :value)"
+                ),
+                {"value": value},
+            )
+
+    init_db(engine)
+
+    with Session(engine) as session:
+        values = session.exec(select(MonetaryValueField.value)).all()
+    assert values == [2.0]
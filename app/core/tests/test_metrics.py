@@ -0,0 +1,59 @@
+import pytest
+
+from app.core.metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_metrics_render_in_the_prometheus_text_format():
+    registry = Registry()
+    requests = registry.register(
+        Counter("requests_total", "Requests answered.", ("route", "status"))
+    )
+    in_progress = registry.register(Gauge("in_progress", "Requests being answered."))
+    duration = registry.register(
+        Histogram("duration_seconds", "Time to answer.", ("route",), buckets=(0.1, 1))
+    )
+
+    requests.inc(route="/members/search", status=200)
+    requests.inc(2, route="/members/search", status=200)
+    requests.inc(route='/quote"d', status=404)
+    in_progress.inc()
+    in_progress.inc()
+    in_progress.dec()
+    for seconds in (0.05, 0.1, 0.5, 3):
+        duration.observe(seconds, route="/members/search")
+
+    assert registry.render().splitlines() == [
+        "# HELP requests_total Requests answered.",
+        "# TYPE requests_total counter",
+        'requests_total{route="/members/search",status="200"} 3',
+        'requests_total{route="/quote\\"d",status="404"} 1',
+        "# HELP in_progress Requests being answered.",
+        "# TYPE in_progress gauge",
+        "in_progress 1",
+        "# HELP duration_seconds Time to answer.",
+        "# TYPE duration_seconds histogram",
+        'duration_seconds_bucket{route="/members/search",le="0.1"} 2',
+        'duration_seconds_bucket{route="/members/search",le="1"} 3',
+        'duration_seconds_bucket{route="/members/search",le="+Inf"} 4',
+        'duration_seconds_sum{route="/members/search"} 3.65',
+        'duration_seconds_count{route="/members/search"} 4',
+    ]
+
+
+def test_metrics_read_from_a_function():
+    registry = Registry()
+    entries = [1, 2]
+    registry.register(Gauge("entries", "Entries.", function=lambda: len(entries)))
+
+    entries.append(3)
+
+    assert "entries 3" in registry.render().splitlines()
+
+
+def test_metrics_check_their_labels():
+    counter = Counter("requests_total", "Requests answered.", ("route",))
+
+    with pytest.raises(ValueError):
+        counter.inc(status=200)
+    with pytest.raises(ValueError):
+        Registry().register(counter).inc()
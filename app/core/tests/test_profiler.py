@@ -0,0 +1,90 @@
+from typing import Iterator
+import asyncio
+import pytest
+from sqlalchemy import text
+
+import app.core.db as db
+from app.core.config import settings
+from app.core.profiler import Profiler, normalize
+
+
+@pytest.fixture
+def profiler(monkeypatch: pytest.MonkeyPatch) -> Iterator[Profiler]:
+    monkeypatch.setattr(settings, "PROFILER_SLOW_QUERY_SECONDS", 60.0)
+    profiler = Profiler()
+    profiler.enable()
+    yield profiler
+    profiler.disable()
+
+
+def test_normalize_collapses_literals_and_value_lists():
+    assert normalize(
+        "SELECT *\n  FROM member WHERE id IN (?, ?, ?) AND name = 'O''Brien' AND house = 1"
+    ) == normalize(
+        "SELECT * FROM member WHERE id IN (?,?) AND name = 'Smith' AND house = 2"
+    )
+    assert normalize("SELECT * FROM member WHERE id IN (?, ?)") == (
+        "SELECT * FROM member WHERE id IN (?, ...)"
+    )
+
+
+def test_statements_are_grouped_with_their_rows(
+    live_db: db.DatabaseGeneration, profiler: Profiler
+):
+    with live_db.engine.connect() as conn:
+        members = conn.execute(text("SELECT id FROM member")).all()
+        for member_id in (members[0].id, members[1].id):
+            conn.execute(
+                text("SELECT id FROM member WHERE id = :id"), {"id": member_id}
+            ).all()
+
+    by_statement = {stats.statement: stats for stats in profiler.top(10)}
+    everyone = by_statement["SELECT id FROM member"]
+    assert everyone.calls == 1
+    assert everyone.rows == len(members)
+    one = by_statement["SELECT id FROM member WHERE id = ?"]
+    assert one.calls == 2
+    assert one.rows == 2
+    assert one.max_seconds <= one.total_seconds
+    assert not profiler.slow_queries
+
+    profiler.reset()
+    assert not profiler.top(10)
+
+
+def test_slow_queries_are_logged_with_their_plan(
+    live_db: db.DatabaseGeneration,
+    profiler: Profiler,
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
+):
+    monkeypatch.setattr(settings, "PROFILER_SLOW_QUERY_SECONDS", 0.0)
+
+    with live_db.engine.connect() as conn:
+        conn.execute(
+            text("SELECT * FROM member WHERE name_display_as LIKE :name"),
+            {"name": "%a%"},
+        ).all()
+        conn.execute(text("SELECT * FROM member WHERE id = :id"), {"id": 1}).all()
+
+    scan, search = list(profiler.slow_queries)[-2:]
+    assert scan.statement == "SELECT * FROM member WHERE name_display_as LIKE ?"
+    assert scan.scans == ["SCAN member"]
+    assert search.plan and not search.scans
+    assert "Slow query" in caplog.text
+    assert "SCAN member" in caplog.text
+
+
+def test_async_queries_are_profiled(live_db: db.DatabaseGeneration, profiler: Profiler):
+    async def query() -> int:
+        async with live_db.async_reader_engine.connect() as conn:
+            parties = len((await conn.execute(text("SELECT id FROM party"))).all())
+        await live_db.dispose_async_engine()
+        return parties
+
+    parties = asyncio.run(query())
+
+    stats = {stats.statement: stats for stats in profiler.top(10)}[
+        "SELECT id FROM party"
+    ]
+    assert stats.rows == parties
@@ -0,0 +1,50 @@
+from sqlmodel import Session, select, func
+import pytest
+
+import app.core.db as db
+import app.core.refresh as refresh
+from app.models import Interest
+
+
+def count_interests(generation: db.DatabaseGeneration) -> int:
+    with Session(generation.engine) as session:
+        return session.exec(select(func.count()).select_from(Interest)).one()
+
+
+def test_refresh_db_swaps_generation(live_db: db.DatabaseGeneration):
+    in_flight = db.get_session()
+    session = next(in_flight)
+    assert session.exec(select(Interest)).first() is not None
+
+    generation = refresh.refresh_db()
+
+    assert db.current_generation() is generation
+    assert generation.path.name == "members.1.db"
+    assert count_interests(generation) == count_interests(live_db)
+
+    # the request that started before the swap still reads the old generation
+    assert live_db.path.exists()
+    assert session.exec(select(Interest)).first() is not None
+
+    in_flight.close()
+    assert not live_db.path.exists()
+
+    new_session = db.get_session()
+    assert next(new_session).get_bind() is generation.reader_engine
+    new_session.close()
+
+
+def test_failed_refresh_keeps_live_generation(
+    live_db: db.DatabaseGeneration, monkeypatch: pytest.MonkeyPatch
+):
+    def invalid(*args: object) -> None:
+        raise refresh.ValidationError("No rows in interest")
+
+    monkeypatch.setattr(refresh, "validate_db", invalid)
+
+    with pytest.raises(refresh.ValidationError):
+        refresh.refresh_db()
+
+    assert db.current_generation() is live_db
+    assert live_db.path.exists()
+    assert not db.generation_path(1).exists()
@@ -0,0 +1,119 @@
+import json
+from math import ceil
+from typing import Any, List
+from sqlalchemy import event
+from sqlmodel import Session, select, func
+
+import app.core.db as db
+from app.core.db import merge_to_db, init_db
+from app.core.search import search, match_expression
+import app.core.filters as filter
+from app.client.tests.test_fetch import interests_data
+from app.models import Member, interest_from_dict
+
+
+def test_match_expression():
+    assert match_expression('tennis "club" OR -x') == '"tennis"* "club"* "OR"* "x"*'
+    assert match_expression("ab cde", min_length=3) == '"cde"*'
+    assert match_expression("  ") is None
+
+
+def test_search_members_and_interests(live_db: db.DatabaseGeneration):
+    with live_db.engine.connect() as connection:
+        members = search(connection, "diane abbott")
+        interests = search(connection, "wimbledon tennis")
+
+    assert [(match["kind"], match["id"]) for match in members] == [("member", 172)]
+    assert "[Diane]" in members[0]["snippet"]
+    assert interests[0]["kind"] == "interest"
+    assert interests[0]["id"] == 12880
+    assert interests[0]["member_id"] == 4597
+
+
+def test_search_index_follows_upserts(live_db: db.DatabaseGeneration):
+    changed = json.loads(json.dumps(interests_data["items"][:1]))
+    changed[0]["summary"] = "Quarterly retainer from Example Widgets Ltd"
+    merge_to_db(map(interest_from_dict, changed))
+
+    with live_db.engine.connect() as connection:
+        assert [match["id"] for match in search(connection, "widgets")] == [12880]
+
+
+def test_search_index_follows_field_upserts(live_db: db.DatabaseGeneration):
+    changed = json.loads(json.dumps(interests_data["items"][:1]))
+    for field in changed[0]["fields"]:
+        if field["name"] == "DonorName":
+            field["value"] = "Example Widgets Ltd"
+    merge_to_db(map(interest_from_dict, changed))
+
+    with live_db.engine.connect() as connection:
+        assert [match["id"] for match in search(connection, "widgets")] == [12880]
+
+
+def test_field_upserts_reindex_once_per_batch(live_db: db.DatabaseGeneration):
+    # indexing fields by trigger rebuilt an interest's index row once per field, which made
+    # writing fields several times slower
+    changed = json.loads(json.dumps(interests_data["items"]))
+    for item in changed:
+        for field in item["fields"]:
+            if field["type"] == "String" and field["value"]:
+                field["value"] += " amended"
+    statements: List[str] = []
+
+    def record(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+        statements.append(statement)
+
+    event.listen(live_db.engine, "before_cursor_execute", record)
+    try:
+        merge_to_db(map(interest_from_dict, changed), batch_size=4)
+    finally:
+        event.remove(live_db.engine, "before_cursor_execute", record)
+
+    index_writes = [statement for statement in statements if "interest_search" in statement]
+    assert len(index_writes) == 2 * ceil(len(changed) / 4)
+    with live_db.engine.connect() as connection:
+        assert {match["id"] for match in search(connection, "amended")} == {
+            item["id"] for item in changed
+        }
+
+
+def test_field_triggers_are_dropped_from_existing_databases(
+    live_db: db.DatabaseGeneration,
+):
+    with live_db.engine.begin() as connection:
+        connection.exec_driver_sql(
+            "CREATE TRIGGER interestfield_search_insert AFTER INSERT ON interestfield "
+            "BEGIN DELETE FROM interest_search WHERE rowid = new.interest_id; END"
+        )
+
+    init_db()
+
+    with live_db.engine.connect() as connection:
+        triggers = connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master "
+            "WHERE type = 'trigger' AND tbl_name = 'interestfield'"
+        ).all()
+    assert triggers == []
+
+
+def test_search_index_is_filled_for_existing_databases(
+    live_db: db.DatabaseGeneration,
+):
+    with live_db.engine.begin() as connection:
+        connection.exec_driver_sql("DROP TABLE member_search")
+        connection.exec_driver_sql("DROP TABLE interest_search")
+
+    init_db()
+
+    with live_db.engine.connect() as connection:
+        assert {match["id"] for match in search(connection, "abbott")} == {172, 5131}
+
+
+def test_by_member_name_matches_substrings(live_db: db.DatabaseGeneration):
+    with Session(live_db.engine) as session:
+        statement = filter.by_member_name(select(Member.id), "BBOT")
+        expected = select(Member.id).where(
+            func.lower(Member.name_display_as).like("%bbot%")
+        )
+        assert set(session.exec(statement).all()) == set(session.exec(expected).all())
+        assert set(session.exec(statement).all()) == {172, 5131}
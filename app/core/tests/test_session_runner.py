@@ -0,0 +1,60 @@
+import asyncio
+from typing import List
+import httpx
+import pytest
+
+import app.core.db as db
+from app.api_server import app
+from app.core.cache import response_cache
+from app.core.config import settings
+
+ROUTES = [
+    ("/members/search", {"party": "lab", "skip": "0", "take": "50"}),
+    ("/interests/search", {"take": "10"}),
+    ("/interests/search_interests_by_member_id", {"member_id": "350"}),
+    ("/party/search", {"party_id": "15"}),
+    ("/search", {"query": "tennis"}),
+]
+
+
+async def get_concurrently(requests: int) -> List[httpx.Response]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(
+            *(
+                client.get(url, params=params)
+                for _ in range(requests)
+                for url, params in ROUTES
+            )
+        )
+
+
+def test_thread_fallback_matches_async_driver(
+    live_db: db.DatabaseGeneration, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", False)
+
+    with_driver = asyncio.run(get_concurrently(1))
+    monkeypatch.setattr(db, "ASYNC_DRIVER_INSTALLED", False)
+    without_driver = asyncio.run(get_concurrently(1))
+
+    assert [response.status_code for response in with_driver] == [200] * len(ROUTES)
+    assert [response.json() for response in with_driver] == [
+        response.json() for response in without_driver
+    ]
+
+
+@pytest.mark.parametrize("async_driver", [True, False])
+def test_concurrent_requests_share_the_pool(
+    live_db: db.DatabaseGeneration, monkeypatch: pytest.MonkeyPatch, async_driver: bool
+):
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", False)
+    monkeypatch.setattr(db, "ASYNC_DRIVER_INSTALLED", async_driver)
+    response_cache.clear()
+
+    responses = asyncio.run(get_concurrently(20))
+
+    assert all(response.status_code == 200 for response in responses)
+    for index, (url, _) in enumerate(ROUTES):
+        bodies = {response.content for response in responses[index :: len(ROUTES)]}
+        assert len(bodies) == 1, url
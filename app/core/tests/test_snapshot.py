@@ -0,0 +1,125 @@
+from pathlib import Path
+from typing import Any, Dict, List
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import Engine, select
+
+import app.core.db as db
+from app.core.config import settings
+from app.core.search import search
+from app.models import MemberInterestTotal
+
+pytest.importorskip("pyarrow")
+
+from app.core.snapshot import (  # noqa: E402
+    SnapshotError,
+    list_snapshots,
+    load_snapshot,
+    read_manifest,
+    write_snapshot,
+)
+
+
+def dump(engine: Engine) -> Dict[str, List[Any]]:
+    tables = db.SQLModel.metadata.sorted_tables
+    with engine.connect() as connection:
+        return {
+            table.name: connection.execute(
+                select(table).order_by(*table.primary_key.columns)
+            ).all()
+            for table in tables
+        }
+
+
+@pytest.mark.parametrize("format", ["parquet", "arrow"])
+def test_snapshot_round_trip(
+    live_db: db.DatabaseGeneration, tmp_path: Path, format: str
+):
+    snapshot = write_snapshot(tmp_path / "snapshots", format=format)
+    loaded = load_snapshot(snapshot, tmp_path / "loaded.db")
+
+    engine = db.make_engine(tmp_path / "loaded.db")
+    assert dump(engine) == dump(live_db.engine)
+    assert MemberInterestTotal.__tablename__ not in loaded
+    with engine.connect() as connection, live_db.engine.connect() as live:
+        assert search(connection, "tennis")
+        # matched on field values alone
+        assert search(connection, "SW19") == search(live, "SW19") != []
+    engine.dispose()
+
+
+def test_snapshot_replaces_refreshed_generations(
+    live_db: db.DatabaseGeneration, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    snapshot = write_snapshot(tmp_path / "snapshots")
+    expected = dump(live_db.engine)
+    # a refresh has since swapped in generation 1, which then lost its members
+    refreshed = db.make_engine(db.generation_path(1))
+    db.init_db(refreshed)
+    refreshed.dispose()
+
+    load_snapshot(snapshot)
+
+    # the next start serves the latest generation and removes the others
+    latest = max(db.existing_generations())
+    restarted = db.DatabaseGeneration(latest, db.generation_path(latest))
+    monkeypatch.setattr(db, "_generation", restarted)
+    db.remove_stale_generations()
+
+    assert list(db.existing_generations()) == [latest]
+    assert dump(restarted.engine) == expected
+    restarted.engine.dispose()
+
+
+def test_snapshot_manifest(live_db: db.DatabaseGeneration, tmp_path: Path):
+    snapshot = write_snapshot(tmp_path)
+    manifest = read_manifest(snapshot)
+
+    assert manifest["version"] == snapshot.name
+    assert [item["version"] for item in list_snapshots(tmp_path)] == [snapshot.name]
+    tables = manifest["tables"]
+    assert tables["interest"]["rows"] == len(dump(live_db.engine)["interest"])
+    assert "name" in tables["interestfield"]["dictionary_columns"]
+    assert "summary" not in tables["interest"]["dictionary_columns"]
+    for table in tables.values():
+        assert (snapshot / table["file"]).exists()
+
+
+def test_incomplete_snapshot_is_not_loaded(
+    live_db: db.DatabaseGeneration, tmp_path: Path
+):
+    snapshot = write_snapshot(tmp_path / "snapshots")
+    manifest = (snapshot / "manifest.json").read_text()
+    (snapshot / "manifest.json").write_text(
+        manifest.replace('"rows": ', '"rows": 1', 1)
+    )
+    target = tmp_path / "loaded.db"
+    target.write_bytes(b"previous database")
+
+    with pytest.raises(SnapshotError):
+        load_snapshot(snapshot, target)
+
+    assert target.read_bytes() == b"previous database"
+    assert not (tmp_path / "loaded.db.loading").exists()
+
+
+def test_snapshot_endpoints(
+    live_db: db.DatabaseGeneration, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    from app.api_server import app
+
+    monkeypatch.setattr(settings, "SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    client = TestClient(app)
+
+    manifest = client.post("/snapshots").json()
+    version = manifest["version"]
+    file_name = manifest["tables"]["member"]["file"]
+
+    assert client.get("/snapshots").json() == [manifest]
+    response = client.get(f"/snapshots/{version}/{file_name}")
+    assert response.status_code == 200
+    assert (
+        response.content == (tmp_path / "snapshots" / version / file_name).read_bytes()
+    )
+    assert client.get(f"/snapshots/{version}/members.db").status_code == 404
+    assert client.get(f"/snapshots/missing/{file_name}").status_code == 404
@@ -0,0 +1,41 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, select, func
+
+import app.core.db as db
+from app.models import Party
+
+
+def pragma(engine, name: str):
+    with engine.connect() as connection:
+        return connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+
+def test_connections_use_the_performance_profile(live_db: db.DatabaseGeneration):
+    assert pragma(live_db.engine, "journal_mode") == "wal"
+    assert pragma(live_db.engine, "synchronous") == 1  # NORMAL
+    for engine in (live_db.engine, live_db.reader_engine):
+        assert pragma(engine, "temp_store") == 2  # MEMORY
+        assert pragma(engine, "cache_size") == -64 * 1024
+        assert pragma(engine, "mmap_size") == 256 * 1024 * 1024
+
+
+def test_readers_are_read_only(live_db: db.DatabaseGeneration):
+    with pytest.raises(OperationalError, match="readonly"):
+        with live_db.reader_engine.begin() as connection:
+            connection.exec_driver_sql("DELETE FROM party")
+
+
+def test_readers_are_not_blocked_by_writes(live_db: db.DatabaseGeneration):
+    with Session(live_db.reader_engine) as reader:
+        parties = reader.exec(select(func.count()).select_from(Party)).one()
+
+    with live_db.engine.connect() as writer:
+        # without WAL, an exclusive lock would keep readers out until the writer finishes
+        writer.exec_driver_sql("BEGIN EXCLUSIVE")
+        writer.exec_driver_sql("DELETE FROM party")
+
+        with Session(live_db.reader_engine) as reader:
+            assert reader.exec(select(func.count()).select_from(Party)).one() == parties
+
+        writer.rollback()
@@ -0,0 +1,72 @@
+import json
+from pathlib import Path
+from unittest.mock import Mock
+from datetime import date
+import pytest
+from sqlalchemy import Engine
+from sqlmodel import Session, create_engine, select, func
+
+import app.core.sync as sync
+from app.models import Interest
+
+interests_data = json.loads(
+    Path("app/client/mock_responses/mock_interest_response.json").read_text()
+)
+
+
+@pytest.fixture
+def engine(tmp_path: Path) -> Engine:
+    return create_engine(f"sqlite:///{tmp_path / 'members.db'}")
+
+
+def test_sync_db_uses_watermark(engine: Engine, clients: Mock):
+    sync.setup_db(engine)
+
+    watermark = sync.get_watermark(sync.INTERESTS_SOURCE, engine)
+    assert watermark is not None
+    assert watermark.last_synced_at is not None
+    assert watermark.max_published_date is not None
+    assert "PublishedFrom" not in clients.get.call_args.kwargs["params"]
+
+    clients.get.reset_mock()
+    stats = sync.sync_db(engine)
+
+    published_from = clients.get.call_args.kwargs["params"]["PublishedFrom"]
+    assert published_from == watermark.max_published_date.date().isoformat()
+    assert date.fromisoformat(published_from) == max(
+        date.fromisoformat(item["publishedDate"]) for item in interests_data["items"]
+    )
+    # nothing changed upstream, so nothing is rewritten
+    assert stats["interest"].changed == 0
+
+    with Session(engine) as session:
+        assert session.exec(select(func.count()).select_from(Interest)).one() == len(
+            interests_data["items"]
+        )
+
+
+def test_sync_db_replays_full_syncs(
+    engine: Engine, clients: Mock, monkeypatch: pytest.MonkeyPatch
+):
+    sync.setup_db(engine)
+    monkeypatch.setattr(sync.settings, "UPSTREAM_STORE", "replay")
+
+    clients.get.reset_mock()
+    sync.sync_db(engine)
+
+    assert "PublishedFrom" not in clients.get.call_args.kwargs["params"]
+
+
+def test_sync_db_parses_in_processes(
+    engine: Engine, clients: Mock, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(sync.settings, "PARSE_PROCESSES", 2)
+    monkeypatch.setattr(sync.settings, "PARSE_BATCH_SIZE", 3)
+
+    stats = sync.setup_db(engine)
+
+    assert stats["interest"].rows == len(interests_data["items"])
+    with Session(engine) as session:
+        assert session.exec(select(func.count()).select_from(Interest)).one() == len(
+            interests_data["items"]
+        )
@@ -5,5 +5,15 @@ from app.models.sqlmodel_models import (
     InterestCategory,
     InterestField,
     MonetaryValueField,
+    MemberInterestTotal,
+    SyncWatermark,
+    DataVersion,
+)
+from app.models.parsers import (
+    TableRow,
+    member_and_party_from_dict,
+    interest_from_dict,
+    member_and_party_rows,
+    interest_rows,
+    parse_in_processes,
 )
-from app.models.parsers import member_and_party_from_dict, interest_from_dict
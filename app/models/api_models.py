@@ -1,13 +1,15 @@
 from pydantic import BaseModel, Field
-from typing import List
-from datetime import datetime
+from typing import List, Literal
+from datetime import date, datetime
 from app.models import (
     Member,
     InterestField,
     MonetaryValueField,
-    InterestCategory
+    InterestCategory,
+    Party,
 )
 
+
 class MemberWithTotalInterestValue(BaseModel):
     member: Member = Field(..., description="Member details")
     total_interests_value: float = Field(
@@ -39,7 +41,84 @@ class InterestRead(BaseModel):
 
 class MemberWithInterests(BaseModel):
     member: Member = Field(..., description="Member details")
-    total_interests_value: float = Field(..., description="Total value of interests for the member")
+    total_interests_value: float = Field(
+        ..., description="Total value of interests for the member"
+    )
     interests: List[InterestRead] = Field(
         ..., description="List of interests associated with the member"
     )
+
+
+class SearchMatch(BaseModel):
+    kind: Literal["member", "interest"] = Field(
+        ..., description="Whether the match is a member or one of their interests"
+    )
+    id: int = Field(..., description="ID of the matching member or interest")
+    member_id: int | None = Field(
+        default=None,
+        description="ID of the member, or of the member the interest belongs to",
+    )
+    member_name: str | None = Field(
+        default=None, description="Display name of the member"
+    )
+    snippet: str | None = Field(
+        default=None, description="Matching text, with matched words in [brackets]"
+    )
+    score: float = Field(
+        ..., description="Relevance of the match, lower is more relevant"
+    )
+
+
+class Contributor(BaseModel):
+    member_id: int = Field(..., description="ID of the member")
+    member_name: str | None = Field(
+        default=None, description="Display name of the member"
+    )
+    total_interests_value: float = Field(
+        ..., description="Total value of the member's interests in the group"
+    )
+    interest_count: int = Field(
+        ..., description="Number of the member's interests in the group"
+    )
+
+
+class GroupInterestTotals(BaseModel):
+    member_count: int = Field(
+        ..., description="Number of members with interests counted in the group"
+    )
+    interest_count: int = Field(..., description="Number of interests in the group")
+    total_interests_value: float = Field(
+        ..., description="Total value of the interests in the group"
+    )
+    mean_value_per_member: float = Field(
+        ..., description="Total value of the interests divided by the number of members"
+    )
+    mean_value_per_interest: float = Field(
+        ..., description="Total value of the interests divided by their number"
+    )
+    top_contributors: List[Contributor] = Field(
+        ...,
+        description="Members with the largest total value of interests in the group",
+    )
+
+
+class PartyInterestTotals(GroupInterestTotals):
+    party: Party | None = Field(
+        default=None, description="Party, or None for members without one"
+    )
+
+
+class CategoryInterestTotals(GroupInterestTotals):
+    category: InterestCategory | None = Field(
+        default=None, description="Category, or None for uncategorised interests"
+    )
+
+
+class InterestTimeSeriesBucket(BaseModel):
+    period_start: date = Field(
+        ..., description="First day of the week, month or quarter of the bucket"
+    )
+    interest_count: int = Field(..., description="Number of interests in the period")
+    total_interests_value: float = Field(
+        ..., description="Total value of the interests in the period"
+    )
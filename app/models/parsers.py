@@ -1,4 +1,16 @@
-from typing import Dict, Any, List, Tuple
+from typing import (
+    Dict,
+    Any,
+    Callable,
+    Deque,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Sequence,
+    Tuple,
+)
 from app.models import (
     Member,
     Party,
@@ -7,7 +19,11 @@ from app.models import (
     InterestField,
     MonetaryValueField,
 )
+from concurrent.futures import Future, ProcessPoolExecutor
+from collections import deque
 from datetime import datetime
+from itertools import batched
+from multiprocessing import get_context
 from sqlmodel import SQLModel
 
 
@@ -27,108 +43,222 @@ def parse_date(date_str: str | None) -> datetime | None:
     return datetime.fromisoformat(date_str) if date_str else None
 
 
-def member_and_party_from_dict(data: Dict[str, Any]) -> Tuple[Member, Party]:
-    party = Party(
-        id=deep_get(data, ["value", "latestParty", "id"]),
-        name=deep_get(data, ["value", "latestParty", "name"]),
-        abbreviation=deep_get(data, ["value", "latestParty", "abbreviation"]),
-        background_colour=deep_get(data, ["value", "latestParty", "backgroundColour"]),
-        foreground_colour=deep_get(data, ["value", "latestParty", "foregroundColour"]),
-        is_independent_party=deep_get(
-            data, ["value", "latestParty", "isIndependentParty"]
-        ),
-    )
+class TableRow(NamedTuple):
+    """
+    The column values of a row of `table`, which `merge_to_db` writes like a parsed model,
+    without the cost of building one.
+    """
 
-    member = Member(
-        id=deep_get(data, ["value", "id"]),
-        name_list_as=deep_get(data, ["value", "nameListAs"]),
-        name_display_as=deep_get(data, ["value", "nameDisplayAs"]),
-        name_full_title=deep_get(data, ["value", "nameFullTitle"]),
-        name_address_as=deep_get(data, ["value", "nameAddressAs"]),
-        gender=deep_get(data, ["value", "gender"]),
-        thumbnail_url=deep_get(data, ["value", "thumbnailUrl"]),
-        party_id=deep_get(data, ["value", "latestParty", "id"]),
-        house=deep_get(data, ["value", "latestHouseMembership", "house"]),
-        membership_from=deep_get(
-            data, ["value", "latestHouseMembership", "membershipFrom"]
-        ),
-        membership_from_id=deep_get(
-            data, ["value", "latestHouseMembership", "membershipFromId"]
-        ),
-        membership_start_date=parse_date(
-            deep_get(data, ["value", "latestHouseMembership", "membershipStartDate"])
-        ),
-        membership_end_date=parse_date(
-            deep_get(data, ["value", "latestHouseMembership", "membershipEndDate"])
-        ),
-        membership_end_reason=deep_get(
-            data, ["value", "latestHouseMembership", "membershipEndReason"]
-        ),
-        status_is_active=deep_get(
-            data,
-            ["value", "latestHouseMembership", "membershipStatus", "statusIsActive"],
-        ),
-        status_start_date=parse_date(
-            deep_get(
-                data,
-                [
-                    "value",
-                    "latestHouseMembership",
-                    "membershipStatus",
-                    "statusStartDate",
-                ],
-            )
-        ),
-    )
+    table: str
+    values: Dict[str, Any]
 
-    return member, party
 
+Path = Sequence[str | int]
 
-def interest_from_dict(data: Dict[str, Any]) -> Tuple[SQLModel | None, ...]:
-    category = InterestCategory(
-        id=deep_get(data, ["category", "id"]),
-        number=deep_get(data, ["category", "number"]),
-        name=deep_get(data, ["category", "name"]),
-    )
 
-    fields: List[InterestField] = []
-    monetary_value_field: MonetaryValueField | None = None
+def compile_paths(
+    *tables: Mapping[str, Path],
+) -> Callable[[Any], Tuple[Dict[str, Any], ...]]:
+    """
+    Compile the paths to the values of the columns of one or more tables into a function
+    returning a dict of column values per table. Paths are merged into a tree, so a key shared
+    by several paths, e.g. `["value", "latestHouseMembership"]`, is looked up once per item.
+    Missing keys give None, as with `deep_get`.
+    """
+    # each node maps a key to the columns its value fills and the nodes below it
+    tree: Dict[str | int, Tuple[List[Tuple[int, str]], Dict[Any, Any]]] = {}
+    for index, paths in enumerate(tables):
+        for column, path in paths.items():
+            node = tree
+            for depth, key in enumerate(path):
+                columns, children = node.setdefault(key, ([], {}))
+                if depth == len(path) - 1:
+                    columns.append((index, column))
+                node = children
+
+    def walk(node: Dict[Any, Any], data: Any, rows: Tuple[Dict[str, Any], ...]) -> None:
+        for key, (columns, children) in node.items():
+            try:
+                value = data[key]
+            except (KeyError, IndexError, TypeError):
+                value = None
+            for index, column in columns:
+                rows[index][column] = value
+            if children:
+                walk(children, value, rows)
+
+    def extract(data: Any) -> Tuple[Dict[str, Any], ...]:
+        rows: Tuple[Dict[str, Any], ...] = tuple({} for _ in tables)
+        walk(tree, data, rows)
+        return rows
+
+    return extract
+
+
+PARTY_PATHS: Dict[str, Path] = {
+    "id": ["value", "latestParty", "id"],
+    "name": ["value", "latestParty", "name"],
+    "abbreviation": ["value", "latestParty", "abbreviation"],
+    "background_colour": ["value", "latestParty", "backgroundColour"],
+    "foreground_colour": ["value", "latestParty", "foregroundColour"],
+    "is_independent_party": ["value", "latestParty", "isIndependentParty"],
+}
+MEMBER_PATHS: Dict[str, Path] = {
+    "id": ["value", "id"],
+    "name_list_as": ["value", "nameListAs"],
+    "name_display_as": ["value", "nameDisplayAs"],
+    "name_full_title": ["value", "nameFullTitle"],
+    "name_address_as": ["value", "nameAddressAs"],
+    "gender": ["value", "gender"],
+    "thumbnail_url": ["value", "thumbnailUrl"],
+    "party_id": ["value", "latestParty", "id"],
+    "house": ["value", "latestHouseMembership", "house"],
+    "membership_from": ["value", "latestHouseMembership", "membershipFrom"],
+    "membership_from_id": ["value", "latestHouseMembership", "membershipFromId"],
+    "membership_start_date": ["value", "latestHouseMembership", "membershipStartDate"],
+    "membership_end_date": ["value", "latestHouseMembership", "membershipEndDate"],
+    "membership_end_reason": ["value", "latestHouseMembership", "membershipEndReason"],
+    "status_is_active": [
+        "value", "latestHouseMembership", "membershipStatus", "statusIsActive"
+    ],
+    "status_start_date": [
+        "value", "latestHouseMembership", "membershipStatus", "statusStartDate"
+    ],
+}
+MEMBER_DATES = ("membership_start_date", "membership_end_date", "status_start_date")
+INTEREST_PATHS: Dict[str, Path] = {
+    "id": ["id"],
+    "parent_id": ["parentInterestId"],
+    "summary": ["summary"],
+    "member_id": ["member", "id"],
+    "category_id": ["category", "id"],
+    "registration_date": ["registrationDate"],
+    "published_date": ["publishedDate"],
+    "rectified": ["rectified"],
+    "rectified_details": ["rectifiedDetails"],
+}
+INTEREST_DATES = ("registration_date", "published_date")
+CATEGORY_PATHS: Dict[str, Path] = {
+    "id": ["category", "id"],
+    "number": ["category", "number"],
+    "name": ["category", "name"],
+}
+
+_member_and_party = compile_paths(MEMBER_PATHS, PARTY_PATHS)
+_interest_and_category = compile_paths(INTEREST_PATHS, CATEGORY_PATHS)
+
+
+def _member_and_party_values(
+    data: Dict[str, Any],
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    member, party = _member_and_party(data)
+    for column in MEMBER_DATES:
+        member[column] = parse_date(member[column])
+    return member, party
+
 
+def _interest_values(
+    data: Dict[str, Any],
+) -> Tuple[Dict[str, Any], Dict[str, Any], List[Dict[str, Any]], Dict[str, Any] | None]:
+    interest, category = _interest_and_category(data)
+    for column in INTEREST_DATES:
+        interest[column] = parse_date(interest[column])
+
+    interest_id = interest["id"]
+    fields: List[Dict[str, Any]] = []
+    monetary_value: Dict[str, Any] | None = None
     for field in data.get("fields", []):
-        if deep_get(field, ["typeInfo", "currencyCode"]):
-            monetary_value_field = MonetaryValueField(
-                interest_id=data.get("id"),
-                value=field.get("value"),
-                currency=deep_get(field, ["typeInfo", "currencyCode"]),
-            )
+        type_info = field.get("typeInfo")
+        currency = type_info.get("currencyCode") if isinstance(type_info, dict) else None
+        if currency:
+            monetary_value = {
+                "interest_id": interest_id,
+                "value": field.get("value"),
+                "currency": currency,
+            }
             continue
-
         fields.append(
-            InterestField(
-                interest_id=data.get("id"),
-                name=field.get("name"),
-                description=field.get("description"),
-                type=field.get("type", {}),
-                value=field.get("value"),
-            )
+            {
+                "interest_id": interest_id,
+                "name": field.get("name"),
+                "description": field.get("description"),
+                "type": field.get("type", {}),
+                "value": field.get("value"),
+            }
         )
+    return interest, category, fields, monetary_value
+
+
+def member_and_party_from_dict(data: Dict[str, Any]) -> Tuple[Member, Party]:
+    member, party = _member_and_party_values(data)
+    return Member(**member), Party(**party)
+
+
+def member_and_party_rows(data: Dict[str, Any]) -> Tuple[TableRow, TableRow]:
+    """
+    The rows `member_and_party_from_dict` would give, as plain values for the bulk loader.
+    """
+    member, party = _member_and_party_values(data)
+    return TableRow("member", member), TableRow("party", party)
+
+
+def interest_rows(data: Dict[str, Any]) -> Tuple[TableRow, ...]:
+    """
+    The rows `interest_from_dict` would give, as plain values for the bulk loader.
+    """
+    interest, category, fields, monetary_value = _interest_values(data)
+    rows = [TableRow("interestcategory", category), TableRow("interest", interest)]
+    rows.extend(TableRow("interestfield", field) for field in fields)
+    if monetary_value:
+        rows.append(TableRow("monetaryvaluefield", monetary_value))
+    return tuple(rows)
 
-    interest = Interest(
-        id=data.get("id"),
-        parent_id=data.get("parentInterestId"),
-        summary=data.get("summary"),
-        member_id=deep_get(data, ["member", "id"]),
-        category_id=category.id,
-        registration_date=parse_date(data.get("registrationDate")),
-        published_date=parse_date(data.get("publishedDate")),
-        rectified=data.get("rectified"),
-        rectified_details=data.get("rectifiedDetails"),
-        category=category,
-        fields=fields,
+
+def _parse_batch(
+    parse: Callable[[Dict[str, Any]], Tuple[Any, ...]], items: Sequence[Dict[str, Any]]
+) -> List[Tuple[Any, ...]]:
+    return [parse(item) for item in items]
+
+
+def parse_in_processes(
+    parse: Callable[[Dict[str, Any]], Tuple[Any, ...]],
+    items: Iterable[Dict[str, Any]],
+    processes: int,
+    batch_size: int = 200,
+) -> Iterator[Tuple[Any, ...]]:
+    """
+    Parse `items` in batches on a pool of `processes` worker processes, yielding the results
+    in the order of the items. `parse` must be a module level function, so it can be sent to
+    the workers. At most two batches per worker are in flight, so items are still read as
+    they arrive rather than all up front.
+    """
+    # spawned rather than forked, as the fetching threads and event loop must not be copied
+    with ProcessPoolExecutor(processes, mp_context=get_context("spawn")) as executor:
+        pending: Deque[Future[List[Tuple[Any, ...]]]] = deque()
+        for batch in batched(items, batch_size):
+            pending.append(executor.submit(_parse_batch, parse, batch))
+            if len(pending) >= processes * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def interest_from_dict(data: Dict[str, Any]) -> Tuple[SQLModel | None, ...]:
+    interest, category, fields, monetary_value = _interest_values(data)
+
+    category_model = InterestCategory(**category)
+    field_models = [InterestField(**field) for field in fields]
+    monetary_value_field = (
+        MonetaryValueField(**monetary_value) if monetary_value else None
+    )
+    interest_model = Interest(
+        **interest,
+        category=category_model,
+        fields=field_models,
         monetary_value_field=monetary_value_field,
     )
 
-    return interest, category, *fields, monetary_value_field
+    return interest_model, category_model, *field_models, monetary_value_field
 
 
 if __name__ == "__main__":
@@ -1,4 +1,4 @@
-from sqlmodel import SQLModel, Field, Relationship
+from sqlmodel import SQLModel, Field, Relationship, Index
 from typing import Optional, List
 from datetime import datetime
 
@@ -61,9 +61,11 @@ class Member(SQLModel, table=True):
     )
 
     # Membership flattening
-    party_id: int | None = Field(default=None, foreign_key="party.id")
+    party_id: int | None = Field(default=None, foreign_key="party.id", index=True)
     house: int | None = Field(
-        None, description="House the member belongs to (1 for Commons, 2 for Lords)"
+        None,
+        description="House the member belongs to (1 for Commons, 2 for Lords)",
+        index=True,
     )
 
     membership_from: str | None = Field(
@@ -120,19 +122,26 @@ class Interest(SQLModel, table=True):
     Represents an interest of a member, such as eployment, directorships, or shareholdings
     """
 
+    # interests are looked up per member, usually within a range of published dates
+    __table_args__ = (
+        Index("ix_interest_member_id_published_date", "member_id", "published_date"),
+    )
+
     id: int | None = Field(
         default=None, primary_key=True, description="Unique identifier for the interest"
     )
     summary: str | None = Field(default=None, description="Summary of the interest")
 
     member_id: int | None = Field(default=None, foreign_key="member.id")
-    category_id: int | None = Field(default=None, foreign_key="interestcategory.id")
+    category_id: int | None = Field(
+        default=None, foreign_key="interestcategory.id", index=True
+    )
 
     registration_date: datetime | None = Field(
         default=None, description="Date when the interest was registered"
     )
     published_date: datetime | None = Field(
-        default=None, description="Date when the interest was published"
+        default=None, description="Date when the interest was published", index=True
     )
     rectified: bool | None = Field(
         default=None, description="Indicates if the interest has been rectified"
@@ -154,6 +163,7 @@ class Interest(SQLModel, table=True):
         default=None,
         foreign_key="interest.id",
         description="ID of the parent interest if this is a child interest e.g. each one off payment from a company is a child of the main interest (employment at that company)",
+        index=True,
     )
 
     # Self-referential relationships
@@ -173,6 +183,12 @@ class InterestField(SQLModel, table=True):
     Field holding information about an interest, such as donor information
     """
 
+    # field names are unique within an interest, which gives the bulk loader a conflict target,
+    # and the index also serves lookups by interest_id alone
+    __table_args__ = (
+        Index("ix_interestfield_interest_id_name", "interest_id", "name", unique=True),
+    )
+
     id: int | None = Field(
         default=None,
         primary_key=True,
@@ -200,6 +216,10 @@ class MonetaryValueField(SQLModel, table=True):
     Field holding the monetary value of an interest
     """
 
+    __table_args__ = (
+        Index("ix_monetaryvaluefield_interest_id", "interest_id", unique=True),
+    )
+
     id: int | None = Field(
         default=None,
         primary_key=True,
@@ -215,3 +235,67 @@ class MonetaryValueField(SQLModel, table=True):
     )
 
     interest: Interest = Relationship(back_populates="monetary_value_field")
+
+
+# ---------- Aggregates ----------
+
+
+class MemberInterestTotal(SQLModel, table=True):
+    """
+    Running totals of each member's interests by publication date, rebuilt on every sync. The
+    total for any range of published dates is the difference of two cumulative values.
+    """
+
+    member_id: int = Field(primary_key=True, foreign_key="member.id")
+    published_date: datetime = Field(
+        primary_key=True,
+        description="Publication date, or `datetime.min` for interests without one",
+    )
+    value: float = Field(
+        default=0.0, description="Total monetary value of interests published on the date"
+    )
+    count: int = Field(default=0, description="Number of interests published on the date")
+    cumulative_value: float = Field(
+        default=0.0, description="Total monetary value of interests published up to the date"
+    )
+    cumulative_count: int = Field(
+        default=0, description="Number of interests published up to the date"
+    )
+
+
+# ---------- Sync ----------
+
+
+class SyncWatermark(SQLModel, table=True):
+    """
+    Records how far the database has been synced with an upstream source, so later syncs only
+    request newer data.
+    """
+
+    source: str = Field(
+        primary_key=True, description="Upstream source e.g. 'members' or 'interests'"
+    )
+    last_synced_at: datetime | None = Field(
+        default=None, description="Time the last successful sync of the source finished"
+    )
+    max_published_date: datetime | None = Field(
+        default=None, description="Latest published date among the synced rows"
+    )
+    max_registration_date: datetime | None = Field(
+        default=None, description="Latest registration date among the synced rows"
+    )
+
+
+class DataVersion(SQLModel, table=True):
+    """
+    Counts the syncs written to the database, so cached responses and in-memory copies of the
+    data can tell when it changed, even when it was synced in place by another process.
+    """
+
+    id: int = Field(default=1, primary_key=True)
+    version: int = Field(
+        default=0, description="Number of syncs written to the database"
+    )
+    synced_at: datetime | None = Field(
+        default=None, description="Time the last sync finished"
+    )
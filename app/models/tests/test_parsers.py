@@ -9,6 +9,12 @@ from app.models import (
 )
 
 from app.models.parsers import member_and_party_from_dict, interest_from_dict
+from app.models.parsers import (
+    compile_paths,
+    member_and_party_rows,
+    interest_rows,
+    parse_in_processes,
+)
 
 from app.models.tests.parsed_member_response import (
     member_response_data,
@@ -71,3 +77,48 @@ def test_interest_from_dict(interest_response_data: Dict[str, Any], expected: Tu
     #TODO monetary_value_field's value is a string here for some reason
     monetary_value_field.value = float(monetary_value_field.value) if monetary_value_field.value else None
     assert monetary_value_field == expected[-1]
+
+
+def test_compile_paths():
+    extract = compile_paths(
+        {"a": ["one", "two"], "b": ["one", "three", "four"]},
+        {"c": ["one", "two"], "d": ["missing", "key"], "e": ["list", 1]},
+    )
+
+    assert extract({"one": {"two": 2, "three": {"four": 4}}, "list": [0, 1]}) == (
+        {"a": 2, "b": 4},
+        {"c": 2, "d": None, "e": 1},
+    )
+    assert extract({"one": "not a dict"}) == (
+        {"a": None, "b": None},
+        {"c": None, "d": None, "e": None},
+    )
+
+
+def column_values(model: SQLModel, exclude: Tuple[str, ...] = ()) -> Dict[str, Any]:
+    return {column.name: getattr(model, column.name) for column in model.__table__.columns if column.name not in exclude}
+
+
+def test_member_and_party_rows():
+    member, party = member_and_party_rows(member_response_data)
+
+    assert member == ("member", column_values(parsed_member))
+    assert party == ("party", column_values(parsed_party))
+
+
+def test_interest_rows():
+    interest, category, *fields, monetary_value_field = interest_from_dict(interest_response_data)
+    rows = interest_rows(interest_response_data)
+
+    assert rows[0] == ("interestcategory", column_values(category))
+    assert rows[1] == ("interest", column_values(interest))
+    assert rows[2:-1] == tuple(("interestfield", column_values(field, exclude=("id",))) for field in fields)
+    assert rows[-1] == ("monetaryvaluefield", column_values(monetary_value_field, exclude=("id",)))
+
+
+def test_parse_in_processes_keeps_the_order():
+    items = [member_response_data] * 5
+
+    parsed = list(parse_in_processes(member_and_party_rows, items, processes=2, batch_size=2))
+
+    assert parsed == [member_and_party_rows(member_response_data)] * 5
@@ -0,0 +1,48 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Annotated, Any, Dict, Literal
+
+from app.core.config import settings
+from app.core.profiler import profiler
+
+router = APIRouter(prefix="/debug", tags=["debug"])
+
+ORDERS = {
+    "total": "total_seconds",
+    "max": "max_seconds",
+    "calls": "calls",
+    "rows": "rows",
+}
+
+
+def _check_enabled() -> None:
+    if not profiler.enabled:
+        raise HTTPException(
+            status_code=404, detail="The query profiler is not enabled."
+        )
+
+
+@router.get(
+    "/queries",
+    include_in_schema=False,
+    description="The statements run on the database with the most total time, and the most recent slow queries with their query plans.",
+)
+async def queries(
+    top: Annotated[int, Query(ge=1, description="Number of statements to list.")] = 20,
+    order: Annotated[
+        Literal["total", "max", "calls", "rows"],
+        Query(description="Rank statements by total or max time, calls or rows."),
+    ] = "total",
+) -> Dict[str, Any]:
+    _check_enabled()
+    return {
+        "slow_query_ms": settings.PROFILER_SLOW_QUERY_SECONDS * 1000,
+        "statements": [stats.as_dict() for stats in profiler.top(top, ORDERS[order])],
+        "slow_queries": [slow.as_dict() for slow in reversed(profiler.slow_queries)],
+    }
+
+
+@router.delete("/queries", include_in_schema=False)
+async def reset_queries() -> Dict[str, Any]:
+    _check_enabled()
+    profiler.reset()
+    return {"reset": True}
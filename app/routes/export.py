@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from typing import Annotated
+
+from app.core.export import EXPORT_TABLES, MEDIA_TYPES, ExportFormat, export_table
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+FORMAT_DESCRIPTION = (
+    "`ndjson` for one JSON object per line, or `csv` with a header row."
+)
+
+
+def export_response(name: str, format: ExportFormat) -> StreamingResponse:
+    extension = "ndjson" if format == ExportFormat.NDJSON else "csv"
+    return StreamingResponse(
+        export_table(EXPORT_TABLES[name], format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{extension}"'},
+    )
+
+
+@router.get(
+    "/members",
+    description="Every member, streamed in order of id.",
+)
+async def export_members(
+    format: Annotated[
+        ExportFormat, Query(description=FORMAT_DESCRIPTION)
+    ] = ExportFormat.NDJSON,
+) -> StreamingResponse:
+    return export_response("members", format)
+
+
+@router.get(
+    "/interests",
+    description="Every interest, streamed in order of id. The fields of each interest are exported separately by `/export/interest_fields`.",
+)
+async def export_interests(
+    format: Annotated[
+        ExportFormat, Query(description=FORMAT_DESCRIPTION)
+    ] = ExportFormat.NDJSON,
+) -> StreamingResponse:
+    return export_response("interests", format)
+
+
+@router.get(
+    "/interest_fields",
+    description="Every field of every interest, streamed in order of id. Fields reference their interest by `interest_id`.",
+)
+async def export_interest_fields(
+    format: Annotated[
+        ExportFormat, Query(description=FORMAT_DESCRIPTION)
+    ] = ExportFormat.NDJSON,
+) -> StreamingResponse:
+    return export_response("interest_fields", format)
@@ -1,18 +1,38 @@
-from fastapi import APIRouter, Query, Depends
-from sqlmodel import Session, select, col, func
-from typing import List, Annotated
+from fastapi import APIRouter, Query, Depends, HTTPException, Request, Response
+from sqlmodel import Session, select, col, func, or_, and_
+from sqlalchemy.orm import joinedload, selectinload
+from typing import Dict, List, Annotated
 
 from app.models import (
     Interest,
+    InterestCategory,
     Member,
-    MonetaryValueField
+    MonetaryValueField,
+    Party
 )
 from app.models.api_models import (
+    CategoryInterestTotals,
+    InterestTimeSeriesBucket,
     MemberWithTotalInterestValue,
     MemberWithInterests,
     InterestRead
 )
-from app.core.db import get_session
+from app.core.db import SessionRunner, get_session_runner
+from app.core.cache import cache_key, cached_response
+from app.core.pagination import (
+    NEXT_CURSOR_HEADER,
+    InvalidCursor,
+    decode_cursor,
+    encode_cursor,
+)
+from app.core.aggregates import (
+    InterestDate,
+    Period,
+    group_totals,
+    member_interest_totals,
+    period_start,
+)
+from app.core.analytics import current_analytics
 import app.core.filters as filter
 from datetime import datetime
 
@@ -23,11 +43,12 @@ router = APIRouter(prefix="/interests", tags=["interests"])
     "/search",
     response_model=List[MemberWithTotalInterestValue],
     operation_id="search_members_with_grouped_interest_values",
-    description="Search members and when their interests where published. Results are returned sorted in descending value of interests.",
+    description="Search members and when their interests where published. Results are returned sorted in descending value of interests, and when there may be more, the `X-Next-Cursor` response header holds a cursor for the next page.",
 )
-def search_members_with_grouped_interest_values(
+async def search_members_with_grouped_interest_values(
     *,
-    session: Session = Depends(get_session),
+    request: Request,
+    runner: SessionRunner = Depends(get_session_runner),
     member_name: Annotated[
         str | None,
         Query(
@@ -68,46 +89,106 @@ def search_members_with_grouped_interest_values(
             description="Number of records to return. E.g. 20 will return the next 20 records after the skipped ones, if None, returns all records"
         ),
     ] = None,
-) -> List[MemberWithTotalInterestValue]:
+    cursor: Annotated[
+        str | None,
+        Query(
+            description="Cursor from the `X-Next-Cursor` header of the previous page, to continue after its last record."
+        ),
+    ] = None,
+) -> Response:
 
     # these are necessary for claude to be able to call the api
     house = int(house) if house else None
     skip = int(skip) if skip else 0
     take = int(take) if take else 20
+    try:
+        after = decode_cursor(cursor, float, int)
+    except InvalidCursor as error:
+        raise HTTPException(status_code=400, detail=str(error))
 
-    total = func.coalesce(func.sum(MonetaryValueField.value), 0).label("total")
+    # totals come from the running totals table rather than grouping every interest
+    total_value, interest_count = member_interest_totals(published_after, published_before)
+    total = total_value.label("total")
     statement = (
         select(Member, total)
-        .join(Interest, col(Interest.member_id) == col(Member.id), isouter=True)
-        .join(
-            MonetaryValueField,
-            col(MonetaryValueField.interest_id) == col(Interest.id),
-            isouter=True,
-        )
-        .order_by(total.desc())
+        .join(Party, isouter=True)
+        .order_by(total.desc(), col(Member.id))
     )
 
+    # as with filtering the interests directly, a date range only matches members who
+    # published interests within it
+    if published_after or published_before:
+        statement = statement.where(interest_count > 0)
+
     statement = filter.by_member_name(statement, name=member_name)
     statement = filter.by_party(statement, party)
     statement = filter.by_house(statement, house)
-    statement = filter.by_interest_published_after(statement, published_after)
-    statement = filter.by_interest_published_before(statement, published_before)
 
+    # continue after the (total, id) of the previous page's last member. Totals depend on the
+    # requested dates so cannot be indexed, but members ranked before the cursor are dropped
+    # before sorting rather than sorted and then skipped
+    if after:
+        last_total, last_id = after
+        statement = statement.where(
+            or_(total < last_total, and_(total == last_total, col(Member.id) > last_id))
+        )
+
+    # paginate the ranked members, after their totals are computed
     statement = statement.offset(skip)
 
     if take:
         statement = statement.limit(take)
 
-    statement = statement.group_by(col(Member.id))
+    # checked against the generation the runner reads, without blocking the event loop
+    generation = runner.generation
+    analytics = current_analytics(
+        generation, (await generation.data_version_async()).version
+    )
 
-    results = session.exec(statement).all()
+    def load(session: Session) -> List[MemberWithTotalInterestValue]:
+        if analytics:
+            return analytics.search(
+                session,
+                member_name=member_name,
+                party=party,
+                house=house,
+                published_after=published_after,
+                published_before=published_before,
+                after=after,
+                skip=skip,
+                take=take,
+            )
+        return [
+            MemberWithTotalInterestValue(
+                member=row[0], total_interests_value=row[1] if row[1] else 0.0
+            )
+            for row in session.exec(statement).all()
+        ]
 
-    return [
-        MemberWithTotalInterestValue(
-            member=row[0], total_interests_value=row[1] if row[1] else 0.0
-        )
-        for row in results
-    ]
+    def next_page(members: List[MemberWithTotalInterestValue]) -> Dict[str, str]:
+        if not take or len(members) < take:
+            return {}
+        last = members[-1]
+        return {
+            NEXT_CURSOR_HEADER: encode_cursor(
+                float(last.total_interests_value), last.member.id
+            )
+        }
+
+    key = cache_key(
+        "search_members_with_grouped_interest_values",
+        member_name=member_name,
+        party=party,
+        house=house,
+        published_before=published_before,
+        published_after=published_after,
+        skip=skip,
+        take=take,
+        cursor=after,
+    )
+    return await cached_response(
+        request, key, List[MemberWithTotalInterestValue], runner, load, next_page
+    )
 
 
 @router.get(
@@ -116,9 +197,10 @@ def search_members_with_grouped_interest_values(
     operation_id="search_member_interests",
     description="Search for the interests of member with <member_id>.",
 )
-def search_member_interests(
+async def search_member_interests(
     *,
-    session: Session = Depends(get_session),
+    request: Request,
+    runner: SessionRunner = Depends(get_session_runner),
     member_id: Annotated[
         str | int, Query(description="ID of the member to search for.")
     ],
@@ -134,23 +216,60 @@ def search_member_interests(
             description="Filter by interests published after this date in ISO format (YYYY-MM-DD)."
         ),
     ] = None,
-) -> MemberWithInterests | None:
+) -> Response:
 
     # these are necessary for claude to be able to call the api
     member_id = int(member_id)
 
-    statement = select(Member)
+    key = cache_key(
+        "search_member_interests",
+        member_id=member_id,
+        published_before=published_before,
+        published_after=published_after,
+    )
+    return await cached_response(
+        request,
+        key,
+        MemberWithInterests | None,
+        runner,
+        lambda session: load_member_interests(
+            session, member_id, published_after, published_before
+        ),
+    )
+
 
+def load_member_interests(
+    session: Session,
+    member_id: int,
+    published_after: datetime | None,
+    published_before: datetime | None,
+) -> MemberWithInterests | None:
+    statement = select(Member)
     statement = filter.by_member_id(statement, member_id)
-    statement = filter.by_interest_published_after(statement, published_after)
-    statement = filter.by_interest_published_before(statement, published_before)
 
     member: Member | None = session.exec(statement).one_or_none()
     if not member:
         return None
 
+    # the interests and everything read from them are loaded up front, in a fixed number of
+    # queries, rather than lazily per interest
+    statement = (
+        select(Interest)
+        .where(col(Interest.member_id) == member_id)
+        .options(
+            joinedload(Interest.category),
+            joinedload(Interest.monetary_value_field),
+            selectinload(Interest.fields),
+        )
+        .order_by(col(Interest.id))
+    )
+    statement = filter.by_interest_published_after(statement, published_after)
+    statement = filter.by_interest_published_before(statement, published_before)
+
+    interests = session.exec(statement).unique().all()
+
     result = MemberWithInterests(member=member, interests=[], total_interests_value=0.0)
-    for interest in member.interests:
+    for interest in interests:
         result.total_interests_value += interest.monetary_value_field.value \
                                         if interest.monetary_value_field and \
                                             interest.monetary_value_field.value else 0.0
@@ -166,3 +285,201 @@ def search_member_interests(
         result.interests.append(interest_read)
 
     return result
+
+
+@router.get(
+    "/categories/totals",
+    response_model=List[CategoryInterestTotals],
+    operation_id="search_category_totals",
+    description="Totals of the registered interests in each interest category: the number of members and interests, their total and mean values, and the members contributing the most. Categories are sorted in descending total value of interests.",
+)
+async def search_category_totals(
+    *,
+    request: Request,
+    runner: SessionRunner = Depends(get_session_runner),
+    house: Annotated[
+        str | None,
+        Query(description="House ID to filter members by. 1 for Commons, 2 for Lords"),
+    ] = None,
+    published_before: Annotated[
+        datetime | None,
+        Query(
+            description="Only count interests published before this date in ISO format (YYYY-MM-DD)."
+        ),
+    ] = None,
+    published_after: Annotated[
+        datetime | None,
+        Query(
+            description="Only count interests published after this date in ISO format (YYYY-MM-DD)."
+        ),
+    ] = None,
+    top: Annotated[
+        str,
+        Query(description="Number of top contributing members to return for each category."),
+    ] = "5",
+) -> Response:
+
+    # these are necessary for claude to be able to call the api
+    house = int(house) if house else None
+    top = int(top) if top else 0
+
+    key = cache_key(
+        "search_category_totals",
+        house=house,
+        published_before=published_before,
+        published_after=published_after,
+        top=top,
+    )
+    return await cached_response(
+        request,
+        key,
+        List[CategoryInterestTotals],
+        runner,
+        lambda session: load_category_totals(
+            session, house, published_after, published_before, top
+        ),
+    )
+
+
+def load_category_totals(
+    session: Session,
+    house: int | None,
+    published_after: datetime | None,
+    published_before: datetime | None,
+    top: int,
+) -> List[CategoryInterestTotals]:
+    # each member's interests are grouped by category, and then the members by category
+    statement = (
+        select(
+            col(Interest.category_id).label("group_id"),
+            col(Member.id).label("member_id"),
+            col(Member.name_display_as).label("name"),
+            func.coalesce(func.sum(MonetaryValueField.value), 0.0).label("total"),
+            func.count(col(Interest.id)).label("count"),
+        )
+        .join(Member, col(Interest.member_id) == col(Member.id))
+        .join(
+            MonetaryValueField,
+            col(MonetaryValueField.interest_id) == col(Interest.id),
+            isouter=True,
+        )
+        .group_by(col(Interest.category_id), col(Member.id))
+    )
+    statement = filter.by_house(statement, house)
+    statement = filter.by_interest_published_after(statement, published_after)
+    statement = filter.by_interest_published_before(statement, published_before)
+
+    groups = group_totals(session, statement.subquery("per_member"), top)
+    categories = {
+        category.id: category
+        for category in session.exec(
+            select(InterestCategory).where(
+                col(InterestCategory.id).in_([group.group_id for group in groups])
+            )
+        )
+    }
+    return [
+        CategoryInterestTotals(category=categories.get(group.group_id), **group.fields())
+        for group in groups
+    ]
+
+
+@router.get(
+    "/timeseries",
+    response_model=List[InterestTimeSeriesBucket],
+    operation_id="search_interest_timeseries",
+    description="Number and total value of interests in each week, month or quarter, by the date they were published or registered. Periods without interests are left out, and the rest are sorted by date.",
+)
+async def search_interest_timeseries(
+    *,
+    request: Request,
+    runner: SessionRunner = Depends(get_session_runner),
+    period: Annotated[
+        Period,
+        Query(description="Length of the periods to bucket interests by: week (starting on Monday), month or quarter."),
+    ] = Period.MONTH,
+    date_field: Annotated[
+        InterestDate,
+        Query(description="Date of the interests to bucket them by."),
+    ] = InterestDate.PUBLISHED,
+    member_id: Annotated[
+        str | None,
+        Query(description="ID of the member to count the interests of."),
+    ] = None,
+    member_name: Annotated[
+        str | None,
+        Query(
+            description="Name of the members to count the interests of. Supports partial matches and is case insensitive."
+        ),
+    ] = None,
+    party: Annotated[
+        str | None,
+        Query(
+            description="Name of the party of the members to count the interests of, supports partial matches and is case insensitive."
+        ),
+    ] = None,
+    house: Annotated[
+        str | None,
+        Query(description="House ID to filter members by. 1 for Commons, 2 for Lords"),
+    ] = None,
+    category: Annotated[
+        str | None,
+        Query(
+            description="Name of the category of interests to count, supports partial matches and is case insensitive."
+        ),
+    ] = None,
+) -> Response:
+
+    # these are necessary for claude to be able to call the api
+    member_id = int(member_id) if member_id else None
+    house = int(house) if house else None
+
+    date_column = col(getattr(Interest, date_field.value))
+    start = period_start(date_column, period).label("period_start")
+    # every period is counted in one grouped pass over the matching interests
+    statement = (
+        select(
+            start,
+            func.count(col(Interest.id)),
+            func.coalesce(func.sum(MonetaryValueField.value), 0.0),
+        )
+        .join(Member, col(Interest.member_id) == col(Member.id))
+        .join(Party, isouter=True)
+        .join(InterestCategory, isouter=True)
+        .join(
+            MonetaryValueField,
+            col(MonetaryValueField.interest_id) == col(Interest.id),
+            isouter=True,
+        )
+        .where(date_column.is_not(None))
+        .group_by(start)
+        .order_by(start)
+    )
+    statement = filter.by_member_id(statement, member_id)
+    statement = filter.by_member_name(statement, name=member_name)
+    statement = filter.by_party(statement, party)
+    statement = filter.by_house(statement, house)
+    statement = filter.by_category(statement, category)
+
+    key = cache_key(
+        "search_interest_timeseries",
+        period=period.value,
+        date_field=date_field.value,
+        member_id=member_id,
+        member_name=member_name,
+        party=party,
+        house=house,
+        category=category,
+    )
+    return await cached_response(
+        request,
+        key,
+        List[InterestTimeSeriesBucket],
+        runner,
+        lambda session: [
+            InterestTimeSeriesBucket(
+                period_start=row[0], interest_count=row[1], total_interests_value=row[2]
+            )
+            for row in session.exec(statement).all()
+        ],
+    )
@@ -1,9 +1,16 @@
-from fastapi import APIRouter, Query, Depends
-from sqlmodel import Session, select
-from typing import List, Annotated
+from fastapi import APIRouter, Query, Depends, HTTPException, Request, Response
+from sqlmodel import select, col
+from typing import Dict, List, Annotated
 
 from app.models import Member, Party
-from app.core.db import get_session
+from app.core.db import SessionRunner, get_session_runner
+from app.core.cache import cache_key, cached_response
+from app.core.pagination import (
+    NEXT_CURSOR_HEADER,
+    InvalidCursor,
+    decode_cursor,
+    encode_cursor,
+)
 import app.core.filters as filter
 from datetime import datetime
 
@@ -14,11 +21,12 @@ router = APIRouter(prefix="/members", tags=["members"])
     "/search",
     response_model=List[Member],
     operation_id="search_members",
-    description="Search members by name, party, house, and membership dates.",
+    description="Search members by name, party, house, and membership dates. Members are returned in order of id, and when there may be more, the `X-Next-Cursor` response header holds a cursor for the next page.",
 )
-def search_members(
+async def search_members(
     *,
-    session: Session = Depends(get_session),
+    request: Request,
+    runner: SessionRunner = Depends(get_session_runner),
     name: Annotated[
         str | None,
         Query(
@@ -55,27 +63,64 @@ def search_members(
         Query(
             description="Number of records to skip for pagination. E.g. 50 will skip the first 50 records"
         ),
-    ] = 0,
+    ] = "0",
     take: Annotated[
         str | None,
         Query(
             description="Number of records to return. E.g. 20 will return the next 20 records after the skipped ones"
         ),
-    ] = 20,
-) -> List[Member]:
+    ] = "20",
+    cursor: Annotated[
+        str | None,
+        Query(
+            description="Cursor from the `X-Next-Cursor` header of the previous page, to continue after its last record."
+        ),
+    ] = None,
+) -> Response:
 
     # type conversions are necessary for claude to be able to call the api
     house = int(house) if house else None
     skip = int(skip) if skip else 0
     take = int(take) if take else 20
+    try:
+        after = decode_cursor(cursor, int)
+    except InvalidCursor as error:
+        raise HTTPException(status_code=400, detail=str(error))
 
-    statement = select(Member).join(Party)
+    statement = select(Member).join(Party).order_by(col(Member.id))
     statement = filter.by_member_name(statement, name)
     statement = filter.by_party(statement, party)
     statement = filter.by_house(statement, house)
     statement = filter.by_membership_start(statement, membership_started_since)
     statement = filter.by_membership_end(statement, membership_ended_since)
 
+    # seek past the previous page on the primary key, rather than counting through it
+    if after:
+        statement = statement.where(col(Member.id) > after[0])
+
     statement = statement.offset(skip).limit(take)
 
-    return list(session.exec(statement).all())
+    def next_page(members: List[Member]) -> Dict[str, str]:
+        if len(members) < take:
+            return {}
+        return {NEXT_CURSOR_HEADER: encode_cursor(members[-1].id)}
+
+    key = cache_key(
+        "search_members",
+        name=name,
+        party=party,
+        house=house,
+        membership_started_since=membership_started_since,
+        membership_ended_since=membership_ended_since,
+        skip=skip,
+        take=take,
+        cursor=after,
+    )
+    return await cached_response(
+        request,
+        key,
+        List[Member],
+        runner,
+        lambda session: session.exec(statement).all(),
+        next_page,
+    )
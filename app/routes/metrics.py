@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Response
+
+from app.core.metrics import CONTENT_TYPE, registry
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get(
+    "/metrics",
+    include_in_schema=False,
+    description="Request, database query, cache and ingest metrics in the Prometheus text format.",
+)
+async def metrics() -> Response:
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
@@ -1,9 +1,14 @@
-from fastapi import APIRouter, Query, Depends
+from fastapi import APIRouter, Query, Depends, Request, Response
 from sqlmodel import Session, select, col
-from typing import Annotated
+from typing import Annotated, List
+from datetime import datetime
 
-from app.models import Party
-from app.core.db import get_session
+from app.models import Member, Party
+from app.models.api_models import PartyInterestTotals
+from app.core.db import SessionRunner, get_session_runner
+from app.core.cache import cache_key, cached_response
+from app.core.aggregates import group_totals, member_interest_totals
+import app.core.filters as filter
 
 router = APIRouter(prefix="/party", tags=["party"])
 
@@ -14,16 +19,111 @@ router = APIRouter(prefix="/party", tags=["party"])
     operation_id="search_party",
     description="Search for the information of a political party by their unique id number.",
 )
-def search_party(
+async def search_party(
     *,
-    session: Session = Depends(get_session),
+    request: Request,
+    runner: SessionRunner = Depends(get_session_runner),
     party_id: Annotated[str, Query(description="ID of the party to search for. Supports exact matches.")]
-) -> Party | None:
+) -> Response:
 
     # type conversions are necessary for claude to be able to call the api
     party_id = int(party_id)
 
     statement = select(Party).where(col(Party.id) == party_id)
 
-    return session.exec(statement).one_or_none()
+    return await cached_response(
+        request,
+        cache_key("search_party", party_id=party_id),
+        Party | None,
+        runner,
+        lambda session: session.exec(statement).one_or_none(),
+    )
 
+
+@router.get(
+    "/totals",
+    response_model=List[PartyInterestTotals],
+    operation_id="search_party_totals",
+    description="Totals of the registered interests of the members of each party: the number of members and interests, their total and mean values, and the members contributing the most. Parties are sorted in descending total value of interests.",
+)
+async def search_party_totals(
+    *,
+    request: Request,
+    runner: SessionRunner = Depends(get_session_runner),
+    house: Annotated[
+        str | None,
+        Query(description="House ID to filter members by. 1 for Commons, 2 for Lords"),
+    ] = None,
+    published_before: Annotated[
+        datetime | None,
+        Query(
+            description="Only count interests published before this date in ISO format (YYYY-MM-DD)."
+        ),
+    ] = None,
+    published_after: Annotated[
+        datetime | None,
+        Query(
+            description="Only count interests published after this date in ISO format (YYYY-MM-DD)."
+        ),
+    ] = None,
+    top: Annotated[
+        str,
+        Query(description="Number of top contributing members to return for each party."),
+    ] = "5",
+) -> Response:
+
+    # type conversions are necessary for claude to be able to call the api
+    house = int(house) if house else None
+    top = int(top) if top else 0
+
+    key = cache_key(
+        "search_party_totals",
+        house=house,
+        published_before=published_before,
+        published_after=published_after,
+        top=top,
+    )
+    return await cached_response(
+        request,
+        key,
+        List[PartyInterestTotals],
+        runner,
+        lambda session: load_party_totals(
+            session, house, published_after, published_before, top
+        ),
+    )
+
+
+def load_party_totals(
+    session: Session,
+    house: int | None,
+    published_after: datetime | None,
+    published_before: datetime | None,
+    top: int,
+) -> List[PartyInterestTotals]:
+    # each member's totals come from the running totals table, and are then grouped by party
+    total_value, interest_count = member_interest_totals(published_after, published_before)
+    count = interest_count.label("count")
+    statement = select(
+        col(Member.party_id).label("group_id"),
+        col(Member.id).label("member_id"),
+        col(Member.name_display_as).label("name"),
+        total_value.label("total"),
+        count,
+    )
+    statement = filter.by_house(statement, house)
+    # as in `search_members_with_grouped_interest_values`, only members with interests (within
+    # the date range, if any) are counted
+    statement = statement.where(count > 0)
+
+    groups = group_totals(session, statement.subquery("per_member"), top)
+    parties = {
+        party.id: party
+        for party in session.exec(
+            select(Party).where(col(Party.id).in_([group.group_id for group in groups]))
+        )
+    }
+    return [
+        PartyInterestTotals(party=parties.get(group.group_id), **group.fields())
+        for group in groups
+    ]
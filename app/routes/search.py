@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Query, Depends, Request, Response
+from sqlmodel import Session
+from typing import List, Annotated
+
+from app.models.api_models import SearchMatch
+from app.core.db import SessionRunner, get_session_runner
+from app.core.cache import cache_key, cached_response
+from app.core.search import search
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get(
+    "",
+    response_model=List[SearchMatch],
+    operation_id="search_text",
+    description="Free text search over member names, constituencies, and the summaries and details of interests (e.g. donor names or companies). Results are returned most relevant first.",
+)
+async def search_text(
+    *,
+    request: Request,
+    runner: SessionRunner = Depends(get_session_runner),
+    query: Annotated[
+        str,
+        Query(
+            description="Words to search for. Matches contain every word, words are matched as prefixes and case insensitively.",
+            example="tennis club",
+        ),
+    ],
+    take: Annotated[
+        str | None,
+        Query(description="Maximum number of matches to return."),
+    ] = None,
+) -> Response:
+
+    # type conversions are necessary for claude to be able to call the api
+    take = int(take) if take else 20
+
+    return await cached_response(
+        request,
+        cache_key("search_text", query=query, take=take),
+        List[SearchMatch],
+        runner,
+        lambda session: [
+            SearchMatch(**match)
+            for match in search(session.connection(), query, limit=take)
+        ],
+    )
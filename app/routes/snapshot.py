@@ -0,0 +1,41 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+from pathlib import Path
+from typing import Any, Dict, List
+import asyncio
+
+from app.core.config import settings
+from app.core.snapshot import MANIFEST, list_snapshots, read_manifest, write_snapshot
+
+router = APIRouter(prefix="/snapshots", tags=["snapshots"])
+
+
+@router.get("", description="Manifests of the available snapshots, oldest first.")
+async def get_snapshots() -> List[Dict[str, Any]]:
+    return await asyncio.to_thread(list_snapshots)
+
+
+@router.post(
+    "",
+    description="Write a columnar snapshot of the live database and return its manifest.",
+)
+async def create_snapshot() -> Dict[str, Any]:
+    snapshot = await asyncio.to_thread(write_snapshot)
+    return read_manifest(snapshot)
+
+
+@router.get(
+    "/{version}/{file_name}",
+    description="Download the manifest or a table file of a snapshot.",
+)
+async def get_snapshot_file(version: str, file_name: str) -> FileResponse:
+    snapshot = Path(settings.SNAPSHOT_DIR) / version
+    try:
+        manifest = read_manifest(snapshot)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"No snapshot {version}")
+
+    files = {MANIFEST} | {table["file"] for table in manifest["tables"].values()}
+    if version != manifest["version"] or file_name not in files:
+        raise HTTPException(status_code=404, detail=f"No file {file_name} in {version}")
+    return FileResponse(snapshot / file_name, filename=file_name)
@@ -0,0 +1,54 @@
+from typing import Iterator
+import pytest
+from fastapi.testclient import TestClient
+
+import app.core.db as db
+from app.api_server import app
+from app.core.config import settings
+from app.core.profiler import profiler
+
+
+@pytest.fixture
+def client(live_db: db.DatabaseGeneration) -> TestClient:
+    return TestClient(app)
+
+
+@pytest.fixture
+def profiling(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    monkeypatch.setattr(settings, "PROFILER_SLOW_QUERY_SECONDS", 0.0)
+    profiler.reset()
+    profiler.enable()
+    yield
+    profiler.disable()
+    profiler.reset()
+
+
+def test_queries_not_found_unless_enabled(client: TestClient):
+    assert client.get("/debug/queries").status_code == 404
+
+
+def test_queries_lists_statements_and_slow_queries(client: TestClient, profiling: None):
+    for name in ("smith", "jones", "smith"):
+        assert client.get("/members/search", params={"name": name}).is_success
+
+    response = client.get("/debug/queries", params={"top": 3})
+    assert response.status_code == 200
+    body = response.json()
+    assert 0 < len(body["statements"]) <= 3
+    totals = [statement["total_ms"] for statement in body["statements"]]
+    assert totals == sorted(totals, reverse=True)
+    assert body["slow_queries"]
+    assert all(
+        slow["plan"]
+        for slow in body["slow_queries"]
+        if slow["statement"].startswith("SELECT")
+    )
+
+    by_calls = client.get("/debug/queries", params={"order": "calls"}).json()
+    calls = [statement["calls"] for statement in by_calls["statements"]]
+    assert calls == sorted(calls, reverse=True)
+
+    assert client.get("/debug/queries", params={"order": "nope"}).status_code == 422
+    assert client.get("/debug/queries", params={"top": 0}).status_code == 422
+    assert client.delete("/debug/queries").is_success
+    assert client.get("/debug/queries").json()["statements"] == []
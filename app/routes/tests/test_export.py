@@ -0,0 +1,84 @@
+import asyncio
+import csv
+import gzip
+import json
+from io import StringIO
+from typing import List
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+import app.core.db as db
+from app.api_server import app
+from app.core.config import settings
+from app.core.export import EXPORT_TABLES, ExportFormat, export_table
+from app.models import Interest, InterestField, Member
+
+
+@pytest.fixture
+def client(live_db: db.DatabaseGeneration) -> TestClient:
+    return TestClient(app)
+
+
+def test_export_members_as_ndjson(client: TestClient, live_db: db.DatabaseGeneration):
+    response = client.get("/export/members")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    with Session(live_db.engine) as session:
+        members = session.exec(select(Member).order_by(Member.id)).all()
+    assert [row["id"] for row in rows] == [member.id for member in members]
+    assert rows[0]["name_display_as"] == members[0].name_display_as
+
+
+def test_export_interest_fields_as_csv(
+    client: TestClient, live_db: db.DatabaseGeneration
+):
+    response = client.get("/export/interest_fields", params={"format": "csv"})
+
+    assert response.headers["content-type"].startswith("text/csv")
+    header, *rows = list(csv.reader(StringIO(response.text)))
+    assert header == [
+        column.name for column in EXPORT_TABLES["interest_fields"].columns
+    ]
+    with Session(live_db.engine) as session:
+        fields = session.exec(select(InterestField).order_by(InterestField.id)).all()
+    assert [int(row[0]) for row in rows] == [field.id for field in fields]
+
+
+def test_export_is_gzipped_on_request(client: TestClient):
+    plain = client.get("/export/interests", headers={"Accept-Encoding": "identity"})
+
+    with client.stream(
+        "GET", "/export/interests", headers={"Accept-Encoding": "gzip"}
+    ) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        compressed = b"".join(response.iter_raw())
+
+    assert "content-encoding" not in plain.headers
+    assert gzip.decompress(compressed) == plain.content
+    assert len(compressed) < len(plain.content)
+
+
+async def collect(format: ExportFormat) -> List[str]:
+    return [chunk async for chunk in export_table(EXPORT_TABLES["interests"], format)]
+
+
+@pytest.mark.parametrize("async_driver", [True, False])
+def test_export_streams_in_batches(
+    live_db: db.DatabaseGeneration,
+    monkeypatch: pytest.MonkeyPatch,
+    async_driver: bool,
+):
+    monkeypatch.setattr(db, "ASYNC_DRIVER_INSTALLED", async_driver)
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 7)
+
+    chunks = asyncio.run(collect(ExportFormat.NDJSON))
+
+    with Session(live_db.engine) as session:
+        interest_ids = session.exec(select(Interest.id).order_by(Interest.id)).all()
+    assert len(chunks) == -(-len(interest_ids) // 7)
+    assert all(chunk.count("\n") == 7 for chunk in chunks[:-1])
+    rows = [json.loads(line) for chunk in chunks for line in chunk.splitlines()]
+    assert [row["id"] for row in rows] == interest_ids
@@ -0,0 +1,320 @@
+from datetime import date, datetime, timedelta
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Tuple
+import pytest
+from fastapi.testclient import TestClient
+
+import app.core.db as db
+from app.api_server import app
+from app.client.tests.test_fetch import interests_data
+from app.conftest import record_statements, served_members_data
+
+
+def expected_totals(
+    published_after: datetime | None = None, published_before: datetime | None = None
+) -> List[Tuple[int, float]]:
+    """
+    Members ranked by the total value of their interests, computed from the mock responses.
+    """
+    totals: Dict[int, float] = {
+        item["value"]["id"]: 0.0 for item in served_members_data["items"]
+    }
+    in_range: Dict[int, int] = defaultdict(int)
+    for interest in interests_data["items"]:
+        member_id = interest["member"]["id"]
+        published = datetime.fromisoformat(interest["publishedDate"])
+        if member_id not in totals:
+            continue
+        if published_after and published < published_after:
+            continue
+        if published_before and published > published_before:
+            continue
+        in_range[member_id] += 1
+        for field in interest["fields"]:
+            if (field.get("typeInfo") or {}).get("currencyCode"):
+                totals[member_id] += float(field["value"])
+
+    if published_after or published_before:
+        totals = {id: total for id, total in totals.items() if in_range[id]}
+    # totals are rounded to whole pence
+    totals = {id: round(total, 2) for id, total in totals.items()}
+    return sorted(totals.items(), key=lambda item: (-item[1], item[0]))
+
+
+@pytest.fixture
+def client(live_db: db.DatabaseGeneration) -> TestClient:
+    return TestClient(app)
+
+
+def search(client: TestClient, **params: Any) -> List[Tuple[int, float]]:
+    response = client.get("/interests/search", params=params)
+    assert response.status_code == 200
+    return [
+        (row["member"]["id"], row["total_interests_value"]) for row in response.json()
+    ]
+
+
+def test_totals_are_ranked_before_pagination(client: TestClient):
+    expected = expected_totals()
+
+    assert search(client, take=100) == expected
+    assert search(client, skip=2, take=3) == expected[2:5]
+
+
+@pytest.mark.parametrize(
+    "published_after, published_before",
+    [
+        (datetime(2025, 7, 12), None),
+        (None, datetime(2025, 7, 12)),
+        (datetime(2025, 7, 11), datetime(2025, 7, 11)),
+        (datetime(2025, 7, 1), datetime(2025, 7, 31)),
+        (datetime(2030, 1, 1), None),
+    ],
+)
+def test_totals_within_published_dates(
+    client: TestClient,
+    published_after: datetime | None,
+    published_before: datetime | None,
+):
+    params = {"take": 100}
+    if published_after:
+        params["published_after"] = published_after.isoformat()
+    if published_before:
+        params["published_before"] = published_before.isoformat()
+
+    assert search(client, **params) == expected_totals(
+        published_after, published_before
+    )
+
+
+def test_totals_filtered_by_party(client: TestClient):
+    party_members = {
+        item["value"]["id"]
+        for item in served_members_data["items"]
+        if "labour" in item["value"]["latestParty"]["name"].lower()
+    }
+
+    assert search(client, party="lab", take=100) == [
+        row for row in expected_totals() if row[0] in party_members
+    ]
+
+
+def member_interests(
+    client: TestClient, member_id: int, **params: Any
+) -> Dict[str, Any]:
+    response = client.get(
+        "/interests/search_interests_by_member_id",
+        params={"member_id": member_id, **params},
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.parametrize("member_id", [350, 4597, 5158])
+def test_member_interests_use_a_fixed_number_of_queries(
+    client: TestClient, live_db: db.DatabaseGeneration, member_id: int
+):
+    # the data version is read once per sync, for cache keys and the Last-Modified header
+    live_db.data_version()
+    with record_statements(live_db) as statements:
+        result = member_interests(client, member_id)
+
+    expected = [
+        interest
+        for interest in interests_data["items"]
+        if interest["member"]["id"] == member_id
+    ]
+    assert [interest["id"] for interest in result["interests"]] == sorted(
+        interest["id"] for interest in expected
+    )
+    assert all(interest["category"] for interest in result["interests"])
+    assert sum(len(interest["fields"]) for interest in result["interests"]) > 0
+    # the member, the interests with their category and value, and the fields
+    assert len(statements) == 3
+
+
+def test_member_interests_within_published_dates(client: TestClient):
+    member_id = 350
+    all_interests = member_interests(client, member_id)
+    assert {interest["published_date"] for interest in all_interests["interests"]} == {
+        "2025-07-14T00:00:00"
+    }
+
+    assert member_interests(client, member_id, published_after="2025-07-12") == (
+        all_interests
+    )
+
+    result = member_interests(client, member_id, published_before="2025-07-12")
+    assert result["interests"] == []
+    assert result["total_interests_value"] == 0.0
+
+
+def expected_category_totals(
+    published_after: datetime | None = None, published_before: datetime | None = None
+) -> Dict[int, Tuple[int, int, float]]:
+    """
+    Number of members and interests, and total value, of each category from the mock
+    responses.
+    """
+    members = {item["value"]["id"] for item in served_members_data["items"]}
+    categories: Dict[int, Tuple[set, int, float]] = {}
+    for interest in interests_data["items"]:
+        published = datetime.fromisoformat(interest["publishedDate"])
+        if interest["member"]["id"] not in members:
+            continue
+        if published_after and published < published_after:
+            continue
+        if published_before and published > published_before:
+            continue
+        value = sum(
+            float(field["value"])
+            for field in interest["fields"]
+            if (field.get("typeInfo") or {}).get("currencyCode")
+        )
+        category_members, count, total = categories.get(
+            interest["category"]["id"], (set(), 0, 0.0)
+        )
+        category_members.add(interest["member"]["id"])
+        categories[interest["category"]["id"]] = (
+            category_members,
+            count + 1,
+            total + value,
+        )
+    return {
+        id: (len(category_members), count, total)
+        for id, (category_members, count, total) in categories.items()
+    }
+
+
+@pytest.mark.parametrize(
+    "published_after, published_before",
+    [
+        (None, None),
+        (datetime(2025, 7, 12), None),
+        (datetime(2025, 7, 11), datetime(2025, 7, 11)),
+        (datetime(2030, 1, 1), None),
+    ],
+)
+def test_category_totals(
+    client: TestClient,
+    published_after: datetime | None,
+    published_before: datetime | None,
+):
+    params = {}
+    if published_after:
+        params["published_after"] = published_after.isoformat()
+    if published_before:
+        params["published_before"] = published_before.isoformat()
+
+    response = client.get("/interests/categories/totals", params=params)
+    assert response.status_code == 200
+    result = response.json()
+
+    assert {
+        row["category"]["id"]: (
+            row["member_count"],
+            row["interest_count"],
+            row["total_interests_value"],
+        )
+        for row in result
+    } == pytest.approx(expected_category_totals(published_after, published_before))
+    totals = [row["total_interests_value"] for row in result]
+    assert totals == sorted(totals, reverse=True)
+    for row in result:
+        contributors = row["top_contributors"]
+        assert len(contributors) <= 5
+        assert sum(member["interest_count"] for member in contributors) <= (
+            row["interest_count"]
+        )
+        assert row["mean_value_per_interest"] == pytest.approx(
+            row["total_interests_value"] / row["interest_count"]
+        )
+
+
+def expected_timeseries(
+    bucket: Callable[[date], date], date_field: str = "publishedDate", **match: Any
+) -> List[Tuple[str, int, float]]:
+    """
+    Number and total value of the mock interests in each period, of the interests whose
+    member matches all of `match`.
+    """
+    members = {item["value"]["id"] for item in served_members_data["items"]}
+    buckets: Dict[date, Tuple[int, float]] = {}
+    for interest in interests_data["items"]:
+        if interest["member"]["id"] not in members:
+            continue
+        if any(interest["member"][name] != value for name, value in match.items()):
+            continue
+        start = bucket(date.fromisoformat(interest[date_field]))
+        count, total = buckets.get(start, (0, 0.0))
+        buckets[start] = (
+            count + 1,
+            total
+            + sum(
+                float(field["value"])
+                for field in interest["fields"]
+                if (field.get("typeInfo") or {}).get("currencyCode")
+            ),
+        )
+    return [(start.isoformat(), *buckets[start]) for start in sorted(buckets)]
+
+
+def timeseries(client: TestClient, **params: Any) -> List[Tuple[str, int, float]]:
+    response = client.get("/interests/timeseries", params=params)
+    assert response.status_code == 200
+    return [
+        (row["period_start"], row["interest_count"], row["total_interests_value"])
+        for row in response.json()
+    ]
+
+
+@pytest.mark.parametrize(
+    "period, bucket",
+    [
+        ("week", lambda day: day - timedelta(days=day.weekday())),
+        ("month", lambda day: day.replace(day=1)),
+        ("quarter", lambda day: date(day.year, (day.month - 1) // 3 * 3 + 1, 1)),
+    ],
+)
+@pytest.mark.parametrize(
+    "date_field, interest_date",
+    [("published_date", "publishedDate"), ("registration_date", "registrationDate")],
+)
+def test_timeseries_buckets(
+    client: TestClient,
+    period: str,
+    bucket: Callable[[date], date],
+    date_field: str,
+    interest_date: str,
+):
+    assert timeseries(client, period=period, date_field=date_field) == pytest.approx(
+        expected_timeseries(bucket, interest_date)
+    )
+
+
+def test_timeseries_filters(client: TestClient):
+    def week(day: date) -> date:
+        return day - timedelta(days=day.weekday())
+
+    assert timeseries(client, period="week", party="labour") == pytest.approx(
+        expected_timeseries(week, party="Labour")
+    )
+    assert timeseries(client, period="week", member_id=350) == pytest.approx(
+        expected_timeseries(week, id=350)
+    )
+    assert timeseries(client, period="week", house=2) == pytest.approx(
+        expected_timeseries(week, house="Lords")
+    )
+
+    categories = {interest["category"]["name"] for interest in interests_data["items"]}
+    assert sum(
+        count
+        for category in categories
+        for _, count, _ in timeseries(client, period="week", category=category)
+    ) == sum(count for _, count, _ in expected_timeseries(week))
+    assert timeseries(client, category="no such category") == []
+
+
+def test_timeseries_rejects_unknown_periods(client: TestClient):
+    response = client.get("/interests/timeseries", params={"period": "fortnight"})
+    assert response.status_code == 422
@@ -0,0 +1,100 @@
+from typing import Dict
+import pytest
+from fastapi.testclient import TestClient
+
+import app.core.db as db
+import app.core.metrics as metrics
+from app.api_server import app
+
+
+@pytest.fixture
+def client(live_db: db.DatabaseGeneration) -> TestClient:
+    return TestClient(app)
+
+
+def samples(client: TestClient) -> Dict[str, float]:
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    return {
+        line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+        for line in response.text.splitlines()
+        if not line.startswith("#")
+    }
+
+
+def test_requests_are_counted_by_route_template(client: TestClient):
+    labels = {
+        "method": "GET",
+        "route": "/party/search",
+        "operation": "search_party",
+        "interface": "http",
+    }
+    before = metrics.http_requests.value(status=200, **labels)
+    timed = metrics.http_request_duration.count(**labels)
+
+    for party_id in (4, 15):
+        assert client.get("/party/search", params={"party_id": party_id}).is_success
+
+    assert metrics.http_requests.value(status=200, **labels) == before + 2
+    assert metrics.http_request_duration.count(**labels) == timed + 2
+    assert metrics.http_requests_in_progress.value(**labels) == 0
+    text = client.get("/metrics").text
+    assert (
+        'mp_http_request_duration_seconds_bucket{method="GET",route="/party/search",'
+        'operation="search_party",interface="http",le="+Inf"}'
+    ) in text
+
+
+def test_unknown_routes_share_a_label(client: TestClient):
+    client.get("/no/such/route/1")
+    client.get("/no/such/route/2")
+
+    assert (
+        metrics.http_requests.value(
+            method="GET",
+            route="unmatched",
+            operation="",
+            interface="http",
+            status=404,
+        )
+        >= 2
+    )
+
+
+def test_queries_cache_and_ingest_are_measured(client: TestClient):
+    before = samples(client)
+    client.get("/members/search", params={"take": 5})
+    client.get("/members/search", params={"take": 5})
+    after = samples(client)
+
+    select = 'mp_db_queries_total{kind="select"}'
+    assert after[select] > before.get(select, 0)
+    assert after["mp_response_cache_hits_total"] == (
+        before["mp_response_cache_hits_total"] + 1
+    )
+    assert 0 < after["mp_response_cache_hit_ratio"] <= 1
+
+    # the database was loaded from the mock responses by `live_db`
+    assert after['mp_ingest_pages_fetched_total{endpoint="/Interests"}'] >= 1
+    assert after['mp_ingest_items_parsed_total{source="interests"}'] >= 20
+    assert after['mp_ingest_rows_upserted_total{table="interest"}'] >= 20
+    assert after['mp_ingest_phase_duration_seconds_count{phase="interests"}'] >= 1
+
+
+def test_mcp_tool_calls_are_labelled(client: TestClient):
+    labels = {
+        "method": "GET",
+        "route": "/party/search",
+        "operation": "search_party",
+        "interface": "mcp",
+        "status": 200,
+    }
+    before = metrics.http_requests.value(**labels)
+
+    # fastapi-mcp calls the operations in process, through a client for this host
+    client.get(
+        "/party/search", params={"party_id": 4}, headers={"host": metrics.MCP_HOST}
+    )
+
+    assert metrics.http_requests.value(**labels) == before + 1
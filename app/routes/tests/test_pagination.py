@@ -0,0 +1,86 @@
+from typing import Any, Dict, List
+import pytest
+from fastapi.testclient import TestClient
+
+import app.core.db as db
+from app.api_server import app
+from app.core.pagination import InvalidCursor, decode_cursor, encode_cursor
+from app.conftest import served_members_data
+
+
+@pytest.fixture
+def client(live_db: db.DatabaseGeneration) -> TestClient:
+    return TestClient(app)
+
+
+def page_through(
+    client: TestClient, url: str, **params: Any
+) -> List[List[Dict[str, Any]]]:
+    pages = []
+    cursor = None
+    while True:
+        response = client.get(
+            url, params={**params, "cursor": cursor} if cursor else params
+        )
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            return pages
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(12.0, 3), float, int) == (12.0, 3)
+    assert decode_cursor(encode_cursor(12, 3), float, int) == (12.0, 3)
+    assert decode_cursor(None, int) is None
+
+    for cursor in ("not a cursor", encode_cursor(1), encode_cursor(1.5, 2)):
+        with pytest.raises(InvalidCursor):
+            decode_cursor(cursor, int, int)
+
+
+def test_members_page_through_with_cursors(client: TestClient):
+    pages = page_through(client, "/members/search", take=7)
+    ids = [member["id"] for page in pages for member in page]
+
+    assert ids == sorted({item["value"]["id"] for item in served_members_data["items"]})
+    assert all(len(page) == 7 for page in pages[:-1])
+
+
+def test_members_default_pagination(client: TestClient):
+    response = client.get("/members/search")
+
+    assert response.status_code == 200
+    assert len(response.json()) == 20
+
+
+def test_cursor_and_skip_combine(client: TestClient):
+    everything = client.get("/members/search", params={"take": 100}).json()
+    first = client.get("/members/search", params={"take": 5})
+
+    response = client.get(
+        "/members/search",
+        params={"take": 5, "skip": 2, "cursor": first.headers["x-next-cursor"]},
+    )
+
+    assert response.json() == everything[7:12]
+
+
+@pytest.mark.parametrize(
+    "params",
+    [{}, {"party": "lab"}, {"published_after": "2025-07-12"}],
+)
+def test_totals_page_through_with_cursors(client: TestClient, params: Dict[str, str]):
+    everything = client.get("/interests/search", params={**params, "take": 100}).json()
+
+    pages = page_through(client, "/interests/search", **params, take=4)
+
+    assert [row for page in pages for row in page] == everything
+    assert all(len(page) == 4 for page in pages[:-1])
+
+
+@pytest.mark.parametrize("url", ["/members/search", "/interests/search"])
+def test_invalid_cursor(client: TestClient, url: str):
+    response = client.get(url, params={"cursor": encode_cursor(1, 2, 3)})
+
+    assert response.status_code == 400
@@ -0,0 +1,124 @@
+from datetime import datetime
+from collections import defaultdict
+from typing import Any, Dict, List
+import pytest
+from fastapi.testclient import TestClient
+
+import app.core.db as db
+from app.api_server import app
+from app.conftest import served_members_data
+from app.client.tests.test_fetch import interests_data
+from app.routes.tests.test_interests_total_value import expected_totals
+
+
+@pytest.fixture
+def client(live_db: db.DatabaseGeneration) -> TestClient:
+    return TestClient(app)
+
+
+def party_totals(client: TestClient, **params: Any) -> List[Dict[str, Any]]:
+    response = client.get("/party/totals", params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def expected_party_totals(
+    published_after: datetime | None = None, published_before: datetime | None = None
+) -> Dict[int, List[tuple[int, float]]]:
+    """
+    Members of each party with interests, ranked by the total value of their interests.
+    """
+    parties = {
+        item["value"]["id"]: item["value"]["latestParty"]["id"]
+        for item in served_members_data["items"]
+    }
+    with_interests = {interest["member"]["id"] for interest in interests_data["items"]}
+    members: Dict[int, List[tuple[int, float]]] = defaultdict(list)
+    for member_id, total in expected_totals(published_after, published_before):
+        if member_id in with_interests:
+            members[parties[member_id]].append((member_id, total))
+    return members
+
+
+@pytest.mark.parametrize(
+    "published_after, published_before",
+    [
+        (None, None),
+        (datetime(2025, 7, 12), None),
+        (None, datetime(2025, 7, 12)),
+        (datetime(2030, 1, 1), None),
+    ],
+)
+def test_party_totals(
+    client: TestClient,
+    published_after: datetime | None,
+    published_before: datetime | None,
+):
+    params = {}
+    if published_after:
+        params["published_after"] = published_after.isoformat()
+    if published_before:
+        params["published_before"] = published_before.isoformat()
+
+    result = party_totals(client, **params)
+    expected = expected_party_totals(published_after, published_before)
+
+    assert {row["party"]["id"] for row in result} == set(expected)
+    for row in result:
+        members = expected[row["party"]["id"]]
+        assert row["member_count"] == len(members)
+        assert row["total_interests_value"] == pytest.approx(
+            sum(total for _, total in members)
+        )
+        assert [
+            (member["member_id"], member["total_interests_value"])
+            for member in row["top_contributors"]
+        ] == [member for member in members if member[1] > 0][:5]
+
+    totals = [row["total_interests_value"] for row in result]
+    assert totals == sorted(totals, reverse=True)
+
+
+def test_party_totals_only_count_members_with_interests(client: TestClient):
+    parties = {
+        item["value"]["id"]: item["value"]["latestParty"]["id"]
+        for item in served_members_data["items"]
+    }
+    with_interests = {interest["member"]["id"] for interest in interests_data["items"]}
+    # e.g. Diane Abbott, an independent, has no interests in the mock responses
+    assert 172 not in with_interests
+
+    result = party_totals(client, top=100)
+
+    assert {row["party"]["id"]: row["member_count"] for row in result} == {
+        party_id: sum(
+            1
+            for member_id, member_party in parties.items()
+            if member_party == party_id and member_id in with_interests
+        )
+        for party_id in {parties[member_id] for member_id in with_interests}
+    }
+
+
+def test_party_totals_filtered_by_house(client: TestClient):
+    houses = {
+        item["value"]["id"]: item["value"]["latestHouseMembership"]["house"]
+        for item in served_members_data["items"]
+    }
+    with_interests = {interest["member"]["id"] for interest in interests_data["items"]}
+
+    for house in (1, 2):
+        result = party_totals(client, house=house, top=100)
+        members = [
+            member["member_id"] for row in result for member in row["top_contributors"]
+        ]
+        assert all(houses[member_id] == house for member_id in members)
+        assert sum(row["member_count"] for row in result) == sum(
+            1
+            for member_id, member_house in houses.items()
+            if member_house == house and member_id in with_interests
+        )
+
+
+def test_party_totals_without_top_contributors(client: TestClient):
+    assert all(row["top_contributors"] == [] for row in party_totals(client, top=0))
@@ -0,0 +1,412 @@
+from app.api_server import app
+from app.core.config import settings
+from app.core.db import DatabaseGeneration, init_db, merge_to_db, UpsertStats
+from app.core.aggregates import refresh_interest_totals
+from app.core.analytics import load_analytics
+from app.core.cache import response_cache
+from app.core.sync import INTERESTS_SOURCE, MEMBERS_SOURCE, record_watermark
+from app.models import (
+    interest_from_dict,
+    interest_rows,
+    member_and_party_from_dict,
+    member_and_party_rows,
+)
+from app.client import make_async_client
+from app.client.fetch import fetch_all_interests_async
+import app.core.db as db
+from benchmarks import synthetic, upstream
+
+from fastapi.testclient import TestClient
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+import argparse
+import asyncio
+import json
+import logging
+import math
+import platform
+import sqlite3
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+RESULTS_FORMAT_VERSION = 1
+
+
+def routes() -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    The requests timed at each scale, covering every route that reads the database.
+    """
+    member_id = synthetic.member_id(0)
+    return [
+        ("/members/search", {"take": 20}),
+        ("/members/search", {"name": "smith", "take": 20}),
+        ("/interests/search", {"take": 20}),
+        ("/interests/search", {"party": "labour", "take": 20}),
+        ("/interests/search", {"published_after": "2025-03-01", "take": 20}),
+        ("/interests/search_interests_by_member_id", {"member_id": member_id}),
+        ("/interests/categories/totals", {}),
+        ("/interests/timeseries", {"period": "month"}),
+        ("/party/search", {"party_id": 4}),
+        ("/party/totals", {"published_after": "2025-03-01"}),
+        ("/search", {"query": "tennis club"}),
+        ("/export/members", {}),
+    ]
+
+
+def percentile(samples: List[float], percent: float) -> float:
+    """
+    The nearest-rank percentile of `samples`.
+    """
+    ordered = sorted(samples)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def timed(function: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """
+    Latency percentiles of `repeat` calls of `function`, in milliseconds.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = perf_counter()
+        function()
+        samples.append((perf_counter() - start) * 1000)
+    return {
+        "requests": repeat,
+        "mean_ms": sum(samples) / repeat,
+        "p50_ms": percentile(samples, 50),
+        "p95_ms": percentile(samples, 95),
+        "p99_ms": percentile(samples, 99),
+    }
+
+
+def bench_parse(scale: float) -> Dict[str, Any]:
+    """
+    Items per second parsed into models by `member_and_party_from_dict` and
+    `interest_from_dict`, and into rows for the bulk loader by `member_and_party_rows` and
+    `interest_rows`. Items are generated up front so only parsing is timed.
+    """
+    members = list(synthetic.members(scale))
+    interests = list(synthetic.interests(scale))
+    results = {}
+    for name, parse, items in (
+        ("members", member_and_party_from_dict, members),
+        ("interests", interest_from_dict, interests),
+        ("member_rows", member_and_party_rows, members),
+        ("interest_rows", interest_rows, interests),
+    ):
+        start = perf_counter()
+        for item in items:
+            parse(item)
+        seconds = perf_counter() - start
+        results[name] = {
+            "items": len(items),
+            "seconds": seconds,
+            "items_per_second": len(items) / seconds if seconds else 0.0,
+        }
+    return results
+
+
+def _ingest_result(stats: Dict[str, UpsertStats], seconds: float) -> Dict[str, Any]:
+    rows = sum(table.rows for table in stats.values())
+    return {
+        "rows": rows,
+        "seconds": seconds,
+        # including parsing, as when syncing
+        "rows_per_second": rows / seconds if seconds else 0.0,
+        "tables": {
+            name: {
+                "rows": table.rows,
+                "write_seconds": table.seconds,
+                "rows_per_second": table.rows_per_second,
+            }
+            for name, table in stats.items()
+        },
+    }
+
+
+def bench_ingest(scale: float, generation: DatabaseGeneration) -> Dict[str, Any]:
+    """
+    Rows per second written by `merge_to_db` into an empty database, then again when every
+    row is already there, and the time taken to rebuild the running totals.
+    """
+    engine = generation.engine
+    init_db(engine)
+    results: Dict[str, Any] = {}
+
+    def merge(name: str, items: Iterable[Tuple[Any, ...]]) -> None:
+        start = perf_counter()
+        stats = merge_to_db(items, bind=engine)
+        results[name] = _ingest_result(stats, perf_counter() - start)
+
+    merge("members", map(member_and_party_rows, synthetic.members(scale)))
+    merge("interests", map(interest_rows, synthetic.interests(scale)))
+    merge("interests_unchanged", map(interest_rows, synthetic.interests(scale)))
+
+    start = perf_counter()
+    refresh_interest_totals(engine)
+    results["refresh_interest_totals_seconds"] = perf_counter() - start
+
+    record_watermark(MEMBERS_SOURCE, engine)
+    record_watermark(INTERESTS_SOURCE, engine)
+    return results
+
+
+def bench_fetch(
+    scale: float, concurrencies: List[int], faults: upstream.Faults, page_size: int
+) -> Dict[str, Any]:
+    """
+    Interests per second fetched by `fetch_all_interests_async` from the stand-in api, with
+    each number of concurrent requests, and how the stand-in answered the requests.
+    """
+    app = upstream.synthetic_app(scale, faults, max_take=page_size)
+    results = {}
+    with upstream.serve(app) as base_url:
+        url = upstream.urls(base_url)["INTERESTS_API_URL"]
+
+        async def fetch(concurrency: int) -> int:
+            async with make_async_client(url) as client:
+                return sum(
+                    [
+                        1
+                        async for _ in fetch_all_interests_async(
+                            client, concurrency=concurrency, page_size=page_size
+                        )
+                    ]
+                )
+
+        for concurrency in concurrencies:
+            app.state.responses.clear()
+            start = perf_counter()
+            items = asyncio.run(fetch(concurrency))
+            seconds = perf_counter() - start
+            results[f"concurrency_{concurrency}"] = {
+                "items": items,
+                "seconds": seconds,
+                "items_per_second": items / seconds if seconds else 0.0,
+                "responses": dict(app.state.responses),
+            }
+            logger.info(f"Fetched {items} interests {concurrency} at a time.")
+    return results
+
+
+def bench_routes(
+    scale: float, generation: DatabaseGeneration, repeat: int, warmup: int
+) -> Dict[str, Any]:
+    """
+    Latency percentiles of each of `routes`, requested `repeat` times through `TestClient`
+    after `warmup` untimed requests. Unless `settings.RESPONSE_CACHE_ENABLED` is set, every
+    request is answered from the database.
+    """
+    load_analytics(generation)
+    client = TestClient(app)
+    results = {}
+    for path, params in routes():
+
+        def request() -> None:
+            response = client.get(path, params=params)
+            response.raise_for_status()
+
+        for _ in range(warmup):
+            request()
+        name = f"GET {path}"
+        if params:
+            name += "?" + "&".join(f"{key}={value}" for key, value in params.items())
+        results[name] = timed(request, repeat)
+        logger.info(f"{name}: p50 {results[name]['p50_ms']:.2f}ms")
+    return results
+
+
+@contextmanager
+def scaled_database(directory: Path) -> Iterator[DatabaseGeneration]:
+    """
+    An empty database generation in `directory`, served as the live generation.
+    """
+    live_path, live, live_engine = settings.SQLITE_DB_PATH, db._generation, db.engine
+    settings.SQLITE_DB_PATH = str(directory / "members.db")
+    generation = DatabaseGeneration(0, db.generation_path(0))
+    db._generation, db.engine = generation, generation.engine
+    response_cache.clear()
+    try:
+        yield generation
+    finally:
+        settings.SQLITE_DB_PATH = live_path
+        db._generation, db.engine = live, live_engine
+        asyncio.run(generation.dispose_async_engine())
+        generation.retire()
+
+
+def run(
+    scales: List[float],
+    repeat: int,
+    warmup: int,
+    skip_routes: bool = False,
+    fetch_concurrencies: List[int] | None = None,
+    faults: upstream.Faults | None = None,
+) -> Dict[str, Any]:
+    results: Dict[str, Any] = {
+        "format_version": RESULTS_FORMAT_VERSION,
+        "environment": environment(),
+        "scales": {},
+    }
+    for scale in scales:
+        logger.info(f"Benchmarking at {scale:g}x scale.")
+        with (
+            TemporaryDirectory() as directory,
+            scaled_database(Path(directory)) as generation,
+        ):
+            scale_results: Dict[str, Any] = {
+                "parse": bench_parse(scale),
+                "ingest": bench_ingest(scale, generation),
+            }
+            if not skip_routes:
+                scale_results["routes"] = bench_routes(
+                    scale, generation, repeat, warmup
+                )
+        if fetch_concurrencies:
+            scale_results["fetch"] = bench_fetch(
+                scale,
+                fetch_concurrencies,
+                faults or upstream.Faults(),
+                settings.INTERESTS_PAGE_SIZE,
+            )
+        results["scales"][f"{scale:g}x"] = scale_results
+    return results
+
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "db_async": settings.DB_ASYNC,
+        "response_cache": settings.RESPONSE_CACHE_ENABLED,
+        "analytics_engine": settings.ANALYTICS_ENGINE,
+    }
+
+
+def _metrics(results: Dict[str, Any], prefix: str = "") -> Iterator[Tuple[str, float]]:
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from _metrics(value, f"{name}.")
+        elif isinstance(value, float) and key.endswith(("_ms", "seconds", "_second")):
+            yield name, value
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """
+    Lines comparing each timing in `results` with the same timing in `baseline`. Rates are
+    better when higher, and durations when lower.
+    """
+    before = dict(_metrics(baseline["scales"]))
+    lines = []
+    for name, value in _metrics(results["scales"]):
+        if name not in before or not before[name]:
+            continue
+        change = (value - before[name]) / before[name] * 100
+        better = change > 0 if name.endswith("_per_second") else change < 0
+        lines.append(
+            f"{name}: {before[name]:.4g} -> {value:.4g} "
+            f"({change:+.1f}%{', better' if better else ''})"
+        )
+    return lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark parsing, ingestion and routes on synthetic data."
+    )
+    parser.add_argument(
+        "--scale",
+        type=float,
+        nargs="+",
+        default=[1],
+        help="Multiples of the real data size to benchmark, e.g. 1 10 100.",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=50, help="Timed requests per route."
+    )
+    parser.add_argument(
+        "--warmup", type=int, default=5, help="Untimed requests per route."
+    )
+    parser.add_argument(
+        "--skip-routes",
+        action="store_true",
+        help="Only benchmark parsing and ingestion.",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Answer repeated requests from the response cache.",
+    )
+    parser.add_argument(
+        "--fetch-concurrency",
+        type=int,
+        nargs="+",
+        help="Also fetch the interests from the stand-in api in `benchmarks/upstream.py`, "
+        "this many pages at a time, e.g. 1 4 8 16.",
+    )
+    parser.add_argument(
+        "--upstream-latency-ms",
+        type=float,
+        default=50.0,
+        help="Latency of the stand-in api.",
+    )
+    parser.add_argument(
+        "--upstream-jitter-ms",
+        type=float,
+        default=20.0,
+        help="Jitter of the stand-in api.",
+    )
+    parser.add_argument("--output", help="File to write the results to as JSON.")
+    parser.add_argument(
+        "--baseline", help="Results of an earlier run to compare the results with."
+    )
+    args = parser.parse_args()
+
+    logger.setLevel(logging.INFO)
+    # one line per request
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    settings.RESPONSE_CACHE_ENABLED = args.cache
+    # for the Cache-Control headers, nothing is refreshed while benchmarking
+    settings.REFRESH_INTERVAL_SECONDS = None
+
+    results = run(
+        args.scale,
+        args.repeat,
+        args.warmup,
+        args.skip_routes,
+        args.fetch_concurrency,
+        upstream.Faults(
+            latency_ms=args.upstream_latency_ms,
+            jitter_ms=args.upstream_jitter_ms,
+            seed=0,
+        ),
+    )
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+        logger.info(f"Wrote results to {args.output}.")
+    else:
+        print(output)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        print("\n".join(compare(results, baseline)))
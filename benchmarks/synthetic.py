@@ -0,0 +1,127 @@
+from copy import deepcopy
+from datetime import date, timedelta
+from functools import lru_cache
+from pathlib import Path
+from random import Random
+from typing import Any, Dict, Iterator, List
+import json
+
+# Synthetic members and interests api items, modelled on the mock responses the tests use, at
+# a multiple of the size of the real data. Each item is generated from its own seeded random
+# number generator, so the same scale always gives the same data, any item can be generated
+# without the ones before it (e.g. for a page of `benchmarks/upstream.py`) and memory use
+# does not grow with the scale.
+
+MOCK_RESPONSES = Path(__file__).parent.parent / "app" / "client" / "mock_responses"
+
+# roughly the number of current members of both houses, and of their registered interests
+REAL_MEMBERS = 1_450
+REAL_INTERESTS = 6_000
+
+FIRST_PUBLISHED = date(2024, 9, 2)
+PUBLISHED_DAYS = 365
+SURNAMES = [
+    "Abbott", "Baker", "Chen", "Davies", "Evans", "Fraser", "Green", "Hughes", "Iqbal",
+    "Jones", "Khan", "Lewis", "Morgan", "Nolan", "Owen", "Patel", "Quinn", "Roberts",
+    "Smith", "Taylor", "Underwood", "Vaughan", "Walker", "Young",
+]  # fmt: skip
+FORENAMES = [
+    "Alex", "Beth", "Chris", "Diane", "Ed", "Fiona", "George", "Hannah", "Imran", "Jo",
+    "Kemi", "Liam", "Maria", "Nadia", "Oliver", "Priya", "Rachel", "Sam", "Tom", "Zara",
+]  # fmt: skip
+
+
+@lru_cache
+def mock_items(file_name: str) -> List[Dict[str, Any]]:
+    return json.loads((MOCK_RESPONSES / file_name).read_text())["items"]
+
+
+def member_count(scale: float) -> int:
+    return int(REAL_MEMBERS * scale)
+
+
+def interest_count(scale: float) -> int:
+    return int(REAL_INTERESTS * scale)
+
+
+def member_id(number: int) -> int:
+    return 100_000 + number
+
+
+def member(number: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    A members api item, a mock member with a new id, name, house and a party taken from the
+    mock members.
+    """
+    random = Random(f"member-{seed}-{number}")
+    templates = mock_items("mock_member_response.json")
+    item = deepcopy(random.choice(templates))
+    value = item["value"]
+    forename, surname = random.choice(FORENAMES), random.choice(SURNAMES)
+    value["id"] = member_id(number)
+    value["nameListAs"] = f"{surname}, {forename}"
+    value["nameDisplayAs"] = f"{forename} {surname} {number}"
+    value["nameFullTitle"] = f"{forename} {surname} {number} MP"
+    value["nameAddressAs"] = f"{surname} {number}"
+    value["latestParty"] = deepcopy(random.choice(templates)["value"]["latestParty"])
+    value["latestHouseMembership"]["house"] = 1 if number % 2 else 2
+    value["latestHouseMembership"]["membershipFrom"] = f"Constituency {number}"
+    value["thumbnailUrl"] = (
+        f"https://members-api.parliament.uk/api/Members/{value['id']}/Thumbnail"
+    )
+    return item
+
+
+def published_date(number: int, scale: float) -> date:
+    """
+    When interest `number` was published. Interests are published in the order of their
+    numbers, spread over `PUBLISHED_DAYS`.
+    """
+    count = max(interest_count(scale), 1)
+    return FIRST_PUBLISHED + timedelta(days=number * PUBLISHED_DAYS // count)
+
+
+def interest(number: int, scale: float = 1, seed: int = 0) -> Dict[str, Any]:
+    """
+    An interests api item of one of the members generated at `scale`, a mock interest with a
+    new id, member, dates, summary and monetary value. A tenth of interests are children of
+    the interest before.
+    """
+    random = Random(f"interest-{seed}-{number}")
+    item = deepcopy(random.choice(mock_items("mock_interest_response.json")))
+    item["id"] = 1_000_000 + number
+    item["parentInterestId"] = (
+        item["id"] - 1 if number and random.random() < 0.1 else None
+    )
+
+    item["member"]["id"] = member_id(random.randrange(max(member_count(scale), 1)))
+    item["member"]["nameDisplayAs"] = f"Member {item['member']['id']}"
+
+    published = published_date(number, scale)
+    item["publishedDate"] = published.isoformat()
+    item["registrationDate"] = (
+        published - timedelta(days=random.randrange(28))
+    ).isoformat()
+
+    value = round(random.lognormvariate(7, 1.5), 2)
+    item["summary"] = f"Synthetic interest {number} - £{value:,.2f}"
+    for field in item["fields"]:
+        if (field.get("typeInfo") or {}).get("currencyCode"):
+            field["value"] = f"{value:.2f}"
+        elif field["type"] == "String" and field["value"]:
+            field["value"] = f"{field['value']} {number}"
+    return item
+
+
+def members(scale: float = 1, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """
+    `REAL_MEMBERS * scale` members api items.
+    """
+    return (member(number, seed) for number in range(member_count(scale)))
+
+
+def interests(scale: float = 1, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """
+    `REAL_INTERESTS * scale` interests api items of the members `members(scale)` generates.
+    """
+    return (interest(number, scale, seed) for number in range(interest_count(scale)))
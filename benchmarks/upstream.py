@@ -0,0 +1,318 @@
+from benchmarks import synthetic
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date
+from random import Random
+from threading import Lock, Thread
+from time import monotonic, sleep
+from typing import Any, Dict, Iterator, List, Protocol
+import argparse
+import asyncio
+import math
+import uvicorn
+
+# A stand-in for the parliament members and interests apis, serving paginated
+# `/Members/Search` and `/Interests` responses from synthetic or mock data, with injected
+# latency, rate limits and errors. Point the app at it with the `MEMBERS_API_URL` and
+# `INTERESTS_API_URL` settings to sync, benchmark or tune fetching without a network, e.g.
+#
+#   uv run python -m benchmarks.upstream --scale 10 --latency-ms 80 --error-rate 0.01
+#   MEMBERS_API_URL=http://localhost:8001/members-api/api \
+#   INTERESTS_API_URL=http://localhost:8001/interests-api/api/v1 make sync
+
+MEMBERS_PREFIX = "/members-api/api"
+INTERESTS_PREFIX = "/interests-api/api/v1"
+SERVER_ERRORS = (500, 502, 503, 504)
+
+
+@dataclass
+class Faults:
+    latency_ms: float = 0.0  # added to every response
+    jitter_ms: float = 0.0  # up to this much more latency, drawn uniformly
+    error_rate: float = 0.0  # share of requests answered with a 5xx error
+    throttle_rate: float = 0.0  # share of requests answered 429, as if rate limited
+    rate_limit: float | None = None  # requests per second allowed, 429 above it
+    retry_after_seconds: float = 1.0  # `Retry-After` of injected 429s
+    seed: int | None = None  # of the random draws, for repeatable runs
+
+
+class Items(Protocol):
+    def __len__(self) -> int: ...
+
+    def page(self, skip: int, take: int) -> List[Dict[str, Any]]: ...
+
+    def published_from(self, day: date) -> "Items": ...
+
+
+class ListItems:
+    """
+    Items held in memory, e.g. the mock responses.
+    """
+
+    def __init__(self, items: List[Dict[str, Any]]):
+        self.items = items
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def page(self, skip: int, take: int) -> List[Dict[str, Any]]:
+        return self.items[skip : skip + take]
+
+    def published_from(self, day: date) -> "ListItems":
+        return ListItems(
+            [
+                item
+                for item in self.items
+                if date.fromisoformat(item["publishedDate"][:10]) >= day
+            ]
+        )
+
+
+class SyntheticMembers:
+    def __init__(self, scale: float, seed: int = 0):
+        self.scale = scale
+        self.seed = seed
+
+    def __len__(self) -> int:
+        return synthetic.member_count(self.scale)
+
+    def page(self, skip: int, take: int) -> List[Dict[str, Any]]:
+        return [
+            synthetic.member(number, self.seed)
+            for number in range(skip, min(skip + take, len(self)))
+        ]
+
+    def published_from(self, day: date) -> "SyntheticMembers":
+        return self
+
+
+class SyntheticInterests:
+    """
+    Interests generated as they are requested, from `start` onwards.
+    """
+
+    def __init__(self, scale: float, seed: int = 0, start: int = 0):
+        self.scale = scale
+        self.seed = seed
+        self.start = start
+
+    def __len__(self) -> int:
+        return synthetic.interest_count(self.scale) - self.start
+
+    def page(self, skip: int, take: int) -> List[Dict[str, Any]]:
+        end = min(self.start + skip + take, synthetic.interest_count(self.scale))
+        return [
+            synthetic.interest(number, self.scale, self.seed)
+            for number in range(self.start + skip, end)
+        ]
+
+    def published_from(self, day: date) -> "SyntheticInterests":
+        # interests are published in the order of their numbers
+        start = bisect_left(
+            range(synthetic.interest_count(self.scale)),
+            day,
+            key=lambda number: synthetic.published_date(number, self.scale),
+        )
+        return SyntheticInterests(self.scale, self.seed, max(start, self.start))
+
+
+class RateLimiter:
+    """
+    Token bucket allowing `rate` requests per second, in bursts of up to `rate`.
+    """
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = monotonic()
+        self._lock = Lock()
+
+    def acquire(self) -> float:
+        """
+        Take a token, returning 0, or the seconds until one is available without taking it.
+        """
+        with self._lock:
+            now = monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+
+def create_app(
+    members: Items, interests: Items, faults: Faults | None = None, max_take: int = 20
+) -> FastAPI:
+    """
+    The stand-in api, serving `members` and `interests` in pages of at most `max_take` items.
+    How each request was answered is counted in `app.state.responses` and served at `/stats`.
+    """
+    faults = faults or Faults()
+    random = Random(faults.seed)
+    limiter = RateLimiter(faults.rate_limit) if faults.rate_limit else None
+    responses: Counter[int] = Counter()
+
+    app = FastAPI()
+    app.state.responses = responses
+
+    @app.middleware("http")
+    async def inject_faults(request: Request, call_next: Any) -> Response:
+        if request.url.path == "/stats":
+            return await call_next(request)
+
+        delay = faults.latency_ms + random.uniform(0, faults.jitter_ms)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+
+        wait = limiter.acquire() if limiter else 0.0
+        draw = random.random()
+        if wait or draw < faults.throttle_rate:
+            retry_after = math.ceil(wait) if wait else faults.retry_after_seconds
+            response: Response = JSONResponse(
+                {"title": "Too Many Requests"},
+                status_code=429,
+                headers={"Retry-After": f"{retry_after:g}"},
+            )
+        elif draw < faults.throttle_rate + faults.error_rate:
+            response = JSONResponse(
+                {"title": "Injected error"}, status_code=random.choice(SERVER_ERRORS)
+            )
+        else:
+            response = await call_next(request)
+        responses[response.status_code] += 1
+        return response
+
+    def page(items: Items, skip: int, take: int) -> Dict[str, Any]:
+        take = min(max(take, 0), max_take)
+        return {
+            "skip": skip,
+            "take": take,
+            "totalResults": len(items),
+            "items": items.page(skip, take),
+            "links": [],
+        }
+
+    @app.get(f"{MEMBERS_PREFIX}/Members/Search")
+    def search_members(skip: int = 0, take: int = 20) -> Dict[str, Any]:
+        return page(members, skip, take)
+
+    @app.get(f"{INTERESTS_PREFIX}/Interests")
+    def search_interests(
+        skip: int = 0, take: int = 20, PublishedFrom: date | None = None
+    ) -> Dict[str, Any]:
+        items = interests.published_from(PublishedFrom) if PublishedFrom else interests
+        return page(items, skip, take)
+
+    @app.get("/stats")
+    def stats() -> Dict[str, int]:
+        return {str(status): count for status, count in sorted(responses.items())}
+
+    return app
+
+
+def synthetic_app(
+    scale: float = 1, faults: Faults | None = None, max_take: int = 20, seed: int = 0
+) -> FastAPI:
+    return create_app(
+        SyntheticMembers(scale, seed), SyntheticInterests(scale, seed), faults, max_take
+    )
+
+
+def mock_app(faults: Faults | None = None, max_take: int = 20) -> FastAPI:
+    return create_app(
+        ListItems(synthetic.mock_items("mock_member_response.json")),
+        ListItems(synthetic.mock_items("mock_interest_response.json")),
+        faults,
+        max_take,
+    )
+
+
+def urls(base_url: str) -> Dict[str, str]:
+    """
+    The settings pointing the app at the stand-in api served at `base_url`.
+    """
+    return {
+        "MEMBERS_API_URL": base_url + MEMBERS_PREFIX,
+        "INTERESTS_API_URL": base_url + INTERESTS_PREFIX,
+    }
+
+
+@contextmanager
+def serve(app: FastAPI, host: str = "127.0.0.1", port: int = 0) -> Iterator[str]:
+    """
+    Serve `app` on a background thread, on a free port unless `port` is given, yielding its
+    base url.
+    """
+    server = uvicorn.Server(
+        uvicorn.Config(app, host=host, port=port, log_level="warning")
+    )
+    thread = Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("The stand-in api did not start")
+        sleep(0.01)
+    try:
+        port = server.servers[0].sockets[0].getsockname()[1]
+        yield f"http://{host}:{port}"
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serve a stand-in for the parliament members and interests apis."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument(
+        "--mock",
+        action="store_true",
+        help="Serve the mock responses rather than synthetic data.",
+    )
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1,
+        help="Multiple of the real data size to generate.",
+    )
+    parser.add_argument("--max-take", type=int, default=20, help="Largest page size.")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="Share of 5xx responses."
+    )
+    parser.add_argument(
+        "--throttle-rate", type=float, default=0.0, help="Share of 429 responses."
+    )
+    parser.add_argument(
+        "--rate-limit", type=float, help="Requests per second allowed, 429 above it."
+    )
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    faults = Faults(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        rate_limit=args.rate_limit,
+        retry_after_seconds=args.retry_after,
+        seed=args.seed,
+    )
+    app = (
+        mock_app(faults, args.max_take)
+        if args.mock
+        else synthetic_app(args.scale, faults, args.max_take)
+    )
+    for name, url in urls(f"http://{args.host}:{args.port}").items():
+        print(f"{name}={url}")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")